@@ -2,10 +2,6 @@
 
 PORT=/dev/ttyUSB1
 DIR=test_images
-while true; do
-	for img in "$DIR"/*.bmp; do
-	  python scripts/push.py "$img" "$PORT"
-	  sleep 3
-	done
-done
-
+# Port otwarty raz, kolejny slajd konwertowany w tle; sterowanie:
+#   python scripts/slideshow.py --send next|prev|pause|resume|reload|status|quit
+python scripts/slideshow.py "$PORT" "$DIR" --interval 3
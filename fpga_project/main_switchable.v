@@ -134,12 +134,17 @@ assign led2 = 1;
     * 0xH3 - Set display mode (H - mode)
     * 0x04 - Vcounter read: returns 2 bytes: first byte is high byte of vcounter, 
         second byte is low byte of vcounter
+    * 0xH5 - Fill: write one value N times starting at the current address.
+        Next byte is a low byte of N (H is bits 11:8, like in 0xH1), following byte is the value.
+        The fill writes one byte per clk160m cycle and ignores SPI bytes received meanwhile,
+        so the master pads it with 0x00 (no command) - one byte per 64 filled bytes at 20 MHz SPI.
 */
 
 localparam SPI_CMD_WRITE_CODE = 4'h1;
 localparam SPI_CMD_SET_ADDR_CODE = 4'h2;
 localparam SPI_CMD_SET_DISPLAY_MODE_CODE = 4'h3;
 localparam SPI_CMD_READ_VCOUNTER_CODE = 4'h4;
+localparam SPI_CMD_FILL_CODE = 4'h5;
 
 
 wire spi_rx_ready;
@@ -184,20 +189,31 @@ spi_slave spi_slave_inst (
 
 
 // SPI command state machine
-localparam SPI_CMD_IDLE = 3'd0;
-localparam SPI_CMD_WRITE_AMOUNT = 3'd1;
-localparam SPI_CMD_WRITE = 3'd2;
-localparam SPI_CMD_SET_ADDR_L = 3'd3;
-localparam SPI_CMD_SET_ADDR_H = 3'd4;
-localparam SPI_CMD_READ_VCOUNTER1 = 3'd5;
-
-reg [2:0] spi_state = SPI_CMD_IDLE;
+localparam SPI_CMD_IDLE = 4'd0;
+localparam SPI_CMD_WRITE_AMOUNT = 4'd1;
+localparam SPI_CMD_WRITE = 4'd2;
+localparam SPI_CMD_SET_ADDR_L = 4'd3;
+localparam SPI_CMD_SET_ADDR_H = 4'd4;
+localparam SPI_CMD_READ_VCOUNTER1 = 4'd5;
+localparam SPI_CMD_FILL_AMOUNT = 4'd6;
+localparam SPI_CMD_FILL_VALUE = 4'd7;
+localparam SPI_CMD_FILL = 4'd8;
+
+reg [3:0] spi_state = SPI_CMD_IDLE;
 
 always @(posedge clk160m) begin
     vram_write_en <= 0;  // Default to no write
     spi_set_mode <= 0;
 
-    if (spi_rx_ready) begin
+    if (spi_state == SPI_CMD_FILL) begin
+        // One write per clock, vram_write_data holds the value since SPI_CMD_FILL_VALUE
+        vram_write_en <= 1;
+        vram_write_addr <= vram_write_addr + 1;
+        if (spi_write_bytes_remaining == 1) begin
+            spi_state <= SPI_CMD_IDLE;
+        end
+        spi_write_bytes_remaining <= spi_write_bytes_remaining - 1;
+    end else if (spi_rx_ready) begin
         case (spi_state)
             SPI_CMD_IDLE: begin
                 case (spi_rx_byte[3:0])
@@ -222,6 +238,11 @@ always @(posedge clk160m) begin
                         spi_state <= SPI_CMD_READ_VCOUNTER1;
                     end
 
+                    SPI_CMD_FILL_CODE: begin // Fill
+                        spi_state <= SPI_CMD_FILL_AMOUNT;
+                        spi_write_bytes_remaining[11:8] <= spi_rx_byte[7:4];
+                    end
+
   
                     default: begin
                         spi_state <= SPI_CMD_IDLE; // Unknown command, ignore
@@ -257,6 +278,14 @@ always @(posedge clk160m) begin
                 spi_tx_byte <= vcounter_dbuf[7:0];
                 spi_state <= SPI_CMD_IDLE;
             end
+            SPI_CMD_FILL_AMOUNT: begin
+                spi_write_bytes_remaining[7:0] <= spi_rx_byte;
+                spi_state <= SPI_CMD_FILL_VALUE;
+            end
+            SPI_CMD_FILL_VALUE: begin
+                vram_write_data <= spi_rx_byte;
+                spi_state <= SPI_CMD_FILL;
+            end
             
         endcase
     end
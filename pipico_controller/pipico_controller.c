@@ -25,8 +25,14 @@
     * 0x02 - Set VRAM address, following 2 bytes: high byte then low byte
     * 0xH3 - Set display mode (H - mode)
     * 0x04 - Read vcounter, send 2 dummy bytes, next 2 bytes are returned vcounter value
+    * 0xH5 - Fill: next byte is a low byte of amount of bytes, H is its high nibble (like 0xH1),
+        following byte is the value written amount times from the current address.
+        The FPGA ignores bytes received while filling (one VRAM write per clk160m cycle),
+        so the command is followed by 0x00 bytes - one per FILL_WRITES_PER_BYTE filled bytes.
 */
 
+#define FILL_WRITES_PER_BYTE 64 // clk160m / (20 MHz SPI / 8 bits)
+
 /*
  * VRAM map for text mode h_res x v_res and 8x16 font, 4 bit color:
  * cols: abs(h_res / 8)
@@ -71,6 +77,20 @@ void write_data(uint8_t *data, size_t len) { // limit 4095 bytes
     spi_write_blocking(SPI_PORT, data, len);
 }
 
+void fill_data(uint8_t value, size_t count) { // limit 4095 bytes
+    count = count & 0x0FFF;
+    uint8_t cmd[3];
+    cmd[0] = 0x05 | ((count >> 8) << 4); // Fill command + high nibble of count
+    cmd[1] = count & 0xFF;
+    cmd[2] = value;
+    spi_write_blocking(SPI_PORT, cmd, sizeof(cmd));
+
+    // Wait until the FPGA finishes filling
+    uint8_t zero = 0;
+    for (size_t i = 0; i < (count + FILL_WRITES_PER_BYTE - 1) / FILL_WRITES_PER_BYTE; i++)
+        spi_write_blocking(SPI_PORT, &zero, 1);
+}
+
 void set_display_mode(uint8_t mode) {
     uint8_t cmd = 0x03 | (mode << 4); // Set display mode command
     spi_write_blocking(SPI_PORT, &cmd, 1);
@@ -111,15 +131,9 @@ void wait_for_sync() {
 }
 
 void write_repeated_characters(uint8_t character, size_t count) {
-    const size_t buffer_size = 256;
-    uint8_t buffer[buffer_size];
-    for (size_t i = 0; i < buffer_size; i++) {
-        buffer[i] = character;
-    }
-
     while (count > 0) {
-        size_t chunk_size = count > buffer_size ? buffer_size : count;
-        write_data(buffer, chunk_size);
+        size_t chunk_size = count > 4095 ? 4095 : count;
+        fill_data(character, chunk_size);
         count -= chunk_size;
     }
 }
@@ -2,14 +2,32 @@
 """
 Konwerter obrazka na ASCII art 180x56 z 16 kolorami i wysyłka przez UART
 Używa pełnego zakresu znaków ASCII (0-255) i zaawansowanej konwersji kolorów
+
+Tryb --glyphs dobiera znaki po kształcie: obraz skalowany jest do 1440x896
+i każda komórka 8x16 dostaje glif z fontu oraz parę kolorów fg/bg, które
+najlepiej ją odwzorowują.
 """
 
+import os
 import sys
 import serial
 import argparse
 import cv2
 import numpy as np
 
+import profiling
+from dither import (
+    BAYER_SIZES,
+    floyd_steinberg,
+    keep_previous,
+    ordered_dither,
+)
+from palette_lut import METRICS, get_lut_6bit
+from vram_render import FONT_HEIGHT, FONT_SIZE, FONT_WIDTH, TEXT_MODE_RGB, render_text
+
+# Font ładowany do VRAM razem z output_1440x900.hex
+DEFAULT_FONT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "terminus.raw")
+
 # 16-kolorowa paleta w formacie 6-bitowym RGB (2 bity na kanał)
 PALETTE_6BIT = [
     0x00,  # 000000 - czarny
@@ -31,6 +49,21 @@ PALETTE_6BIT = [
 ]
 
 
+# Kolor znaku w trybie bez --glyphs (starszy nibble atrybutu); tło to kolor piksela
+TEXT_FG = 0
+
+# Progi trybu czasowego (previous w image_to_ascii_art). 16 kolorów zostawia
+# w przestrzeni RGB dziury do ~180 od najbliższego koloru (64 kolory trybu
+# graficznego: ~73), więc przy progu 85 z dither.py i tak zmienia się większość
+# pól; 150 zmniejsza liczbę zmienionych atrybutów ~2,5x przy niezauważalnym
+# wzroście błędu, a nadal jest poniżej największej dziury.
+TEXT_KEEP_THRESHOLD = 150
+# Znak to jasność 0-255 wprost jako kod, a kody nie są uporządkowane według
+# wyglądu glifu - każda zmiana o 1 to inny znak. Próg w poziomach szarości
+# pochłania szum (ok. 3% jasności), a prawdziwe zmiany jasności przechodzą.
+CHAR_KEEP_THRESHOLD = 8
+
+
 def rgb_to_6bit(r, g, b):
     """
     Konwertuje kolor RGB 8-bit na 6-bit (2 bity na kanał)
@@ -44,187 +77,224 @@ def rgb_to_6bit(r, g, b):
 
 def find_closest_color(r, g, b, palette):
     """
-    Znajduje najbliższy kolor w palecie używając dystansu RGB
+    Znajduje najbliższy kolor w palecie używając dystansu RGB (przez tablicę LUT)
     """
-    min_dist = float("inf")
-    best_color = 0
-
-    for i, palette_color in enumerate(palette):
-        # Konwertuj kolor 6-bit na RGB
-        pr = ((palette_color >> 4) & 0x03) * 85
-        pg = ((palette_color >> 2) & 0x03) * 85
-        pb = (palette_color & 0x03) * 85
-
-        # Oblicz dystans w przestrzeni RGB - używamy liczb całkowitych
-        r_int = int(r)
-        g_int = int(g)
-        b_int = int(b)
-        dist = (r_int - pr) ** 2 + (g_int - pg) ** 2 + (b_int - pb) ** 2
+    # Używamy liczb całkowitych (obcięcie jak int())
+    return get_lut_6bit(palette).index(int(r), int(g), int(b))
 
-        if dist < min_dist:
-            min_dist = dist
-            best_color = i
 
-    return best_color
-
-
-def apply_simple_dither(img, palette):
+def load_image(image_path, width, height):
     """
-    Stosuje prosty dithering do obrazu - naprawiona wersja bez przepełnień
+    Wczytuje obrazek jako RGB przeskalowany do width x height
     """
-    height, width = img.shape[:2]
-    # Konwertuj na float dla obliczeń
-    img_dithered = img.astype(np.float32)
-
-    for y in range(height):
-        for x in range(width):
-            r, g, b = img_dithered[y, x]
-
-            # Znajdź najbliższy kolor w palecie
-            color_idx = find_closest_color(r, g, b, palette)
-            palette_color = palette[color_idx]
-
-            # Konwertuj z powrotem na RGB
-            new_r = ((palette_color >> 4) & 0x03) * 85
-            new_g = ((palette_color >> 2) & 0x03) * 85
-            new_b = (palette_color & 0x03) * 85
-
-            # Oblicz błąd kwantyzacji
-            error_r = float(r - new_r)
-            error_g = float(g - new_g)
-            error_b = float(b - new_b)
-
-            # Rozprowadź błąd na sąsiednie piksele z zabezpieczeniem przed przepełnieniem
-            if x + 1 < width:
-                img_dithered[y, x + 1] = np.clip(
-                    img_dithered[y, x + 1]
-                    + [error_r * 7 / 16, error_g * 7 / 16, error_b * 7 / 16],
-                    0,
-                    255,
-                )
-            if y + 1 < height:
-                if x > 0:
-                    img_dithered[y + 1, x - 1] = np.clip(
-                        img_dithered[y + 1, x - 1]
-                        + [error_r * 3 / 16, error_g * 3 / 16, error_b * 3 / 16],
-                        0,
-                        255,
-                    )
-                img_dithered[y + 1, x] = np.clip(
-                    img_dithered[y + 1, x]
-                    + [error_r * 5 / 16, error_g * 5 / 16, error_b * 5 / 16],
-                    0,
-                    255,
-                )
-                if x + 1 < width:
-                    img_dithered[y + 1, x + 1] = np.clip(
-                        img_dithered[y + 1, x + 1]
-                        + [error_r * 1 / 16, error_g * 1 / 16, error_b * 1 / 16],
-                        0,
-                        255,
-                    )
-
-    # Przycięcie wartości do zakresu 0-255 i konwersja z powrotem do uint8
-    return np.clip(img_dithered, 0, 255).astype(np.uint8)
-
-
-def apply_ordered_dither(img, palette):
+    with profiling.span("asciiart.load"):
+        img = cv2.imread(image_path)
+        if img is None:
+            raise ValueError(f"Nie można wczytać obrazka: {image_path}")
+
+        # Konwertuj BGR na RGB
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        return cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def apply_simple_dither(
+    img,
+    palette,
+    serpentine=False,
+    metric="rgb",
+    previous=None,
+    keep_threshold=TEXT_KEEP_THRESHOLD,
+):
     """
-    Alternatywna metoda: dithering z użyciem matrycy Bayer'a - szybsza i bez przepełnień
+    Stosuje prosty dithering Floyda-Steinberga do obrazu (wspólny silnik z push.py);
+    zwraca indeksy palety (H, W)
     """
-    height, width = img.shape[:2]
-
-    # Matryca Bayer'a 4x4 dla ditheringu
-    bayer_matrix = (
-        np.array([[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]]) / 16.0
-    )  # Normalizacja do 0-1
-
-    img_dithered = img.copy()
-
-    for y in range(height):
-        for x in range(width):
-            r, g, b = img_dithered[y, x]
-
-            # Dodaj szum ditheringu oparty na matrycy Bayer'a
-            threshold = bayer_matrix[y % 4, x % 4] * 64 - 32  # -32 do +32
-
-            r_dithered = np.clip(r + threshold, 0, 255)
-            g_dithered = np.clip(g + threshold, 0, 255)
-            b_dithered = np.clip(b + threshold, 0, 255)
-
-            # Znajdź najbliższy kolor dla ditherowanych wartości
-            color_idx = find_closest_color(r_dithered, g_dithered, b_dithered, palette)
-            palette_color = palette[color_idx]
-
-            # Konwertuj z powrotem na RGB
-            new_r = ((palette_color >> 4) & 0x03) * 85
-            new_g = ((palette_color >> 2) & 0x03) * 85
-            new_b = (palette_color & 0x03) * 85
+    lut = get_lut_6bit(palette)
+    # Przycinanie sąsiadów do 0-255 i obcięcie jak int() - jak w pierwotnej pętli
+    return floyd_steinberg(
+        img,
+        lut.palette,
+        clip=True,
+        rounding="floor",
+        serpentine=serpentine,
+        metric=metric,
+        previous=previous,
+        keep_threshold=keep_threshold,
+    )
 
-            img_dithered[y, x] = [new_r, new_g, new_b]
 
-    return img_dithered
+def apply_ordered_dither(
+    img,
+    palette,
+    matrix_size=4,
+    metric="rgb",
+    previous=None,
+    keep_threshold=TEXT_KEEP_THRESHOLD,
+):
+    """
+    Alternatywna metoda: dithering z użyciem matrycy Bayer'a (2x2, 4x4 lub 8x8),
+    liczony na całym obrazie naraz; zwraca indeksy palety (H, W)
+    """
+    lut = get_lut_6bit(palette)
+    return ordered_dither(
+        img,
+        lut.palette,
+        size=matrix_size,
+        metric=metric,
+        previous=previous,
+        keep_threshold=keep_threshold,
+    )
 
 
 def image_to_ascii_art(
-    image_path, width=180, height=56, use_dithering=True, dither_type="floyd"
+    image_path,
+    width=180,
+    height=56,
+    use_dithering=True,
+    dither_type="floyd",
+    serpentine=False,
+    bayer_size=4,
+    metric="rgb",
+    previous=None,
+    keep_threshold=TEXT_KEEP_THRESHOLD,
+    char_threshold=CHAR_KEEP_THRESHOLD,
 ):
     """
-    Konwertuje obrazek na ASCII art z zaawansowaną kwantyzacją kolorów
+    Konwertuje obrazek na ASCII art z zaawansowaną kwantyzacją kolorów;
+    metric - odległość przy wyborze koloru: "rgb" albo "lab" (CIELAB);
+    previous - para (znaki, atrybuty) poprzedniej klatki: kolor zostaje, dopóki
+    jest w odległości RGB keep_threshold, a znak, dopóki jasność różni się
+    najwyżej o char_threshold
     """
-    # Wczytaj obrazek
-    img = cv2.imread(image_path)
-    if img is None:
-        raise ValueError(f"Nie można wczytać obrazka: {image_path}")
-
-    # Konwertuj BGR na RGB
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img_resized = load_image(image_path, width, height)
+    prev_chars = prev_indices = None
+    if previous is not None:
+        prev_chars = np.frombuffer(bytes(previous[0]), dtype=np.uint8)
+        prev_attrs = np.frombuffer(bytes(previous[1]), dtype=np.uint8)
+        prev_indices = (prev_attrs & 0x0F).reshape(height, width)
+
+    with profiling.span("asciiart.dither"):
+        if use_dithering:
+            if dither_type == "ordered":
+                # Zastosuj dithering z matrycą Bayer'a
+                indices = apply_ordered_dither(
+                    img_resized,
+                    PALETTE_6BIT,
+                    matrix_size=bayer_size,
+                    metric=metric,
+                    previous=prev_indices,
+                    keep_threshold=keep_threshold,
+                )
+            else:
+                # Zastosuj dithering Floyd-Steinberg
+                indices = apply_simple_dither(
+                    img_resized,
+                    PALETTE_6BIT,
+                    serpentine=serpentine,
+                    metric=metric,
+                    previous=prev_indices,
+                    keep_threshold=keep_threshold,
+                )
+        else:
+            # Prosta kwantyzacja bez ditheringu - cały obraz naraz przez tablicę LUT
+            lut = get_lut_6bit(PALETTE_6BIT, metric)
+            indices = lut.quantize(img_resized)
+            if prev_indices is not None:
+                indices = keep_previous(
+                    img_resized, lut.palette, indices, prev_indices, keep_threshold
+                )
 
-    # Przeskaluj do docelowego rozmiaru
-    img_resized = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+    with profiling.span("asciiart.encode"):
+        # Znak ASCII na podstawie jasności - użyj pełnego zakresu 0-255
+        gray = cv2.cvtColor(img_resized, cv2.COLOR_RGB2GRAY)
+        if prev_chars is not None:
+            gray = gray.ravel()
+            shift = np.abs(gray.astype(np.int16) - prev_chars)
+            gray = np.where(shift <= char_threshold, prev_chars, gray).astype(np.uint8)
 
-    if use_dithering:
-        if dither_type == "ordered":
-            # Zastosuj dithering z matrycą Bayer'a
-            img_processed = apply_ordered_dither(img_resized, PALETTE_6BIT)
-        else:
-            # Zastosuj dithering Floyd-Steinberg
-            img_processed = apply_simple_dither(img_resized, PALETTE_6BIT)
-    else:
-        # Prosta kwantyzacja bez ditheringu
-        img_processed = img_resized.copy()
-        # Dla każdego piksela znajdź najbliższy kolor
-        for y in range(height):
-            for x in range(width):
-                r, g, b = img_processed[y, x]
-                color_idx = find_closest_color(r, g, b, PALETTE_6BIT)
-                palette_color = PALETTE_6BIT[color_idx]
-                new_r = ((palette_color >> 4) & 0x03) * 85
-                new_g = ((palette_color >> 2) & 0x03) * 85
-                new_b = (palette_color & 0x03) * 85
-                img_processed[y, x] = [new_r, new_g, new_b]
+        # Atrybut: kolor znaku w starszym nibble, kolor piksela jako tło
+        attrs = (TEXT_FG << 4) | indices.astype(np.uint8)
 
-    # Konwersja do skali szarości dla ASCII
-    gray = cv2.cvtColor(img_resized, cv2.COLOR_RGB2GRAY)
+        return bytearray(gray.tobytes()), bytearray(attrs.tobytes())
 
-    ascii_data = bytearray()
-    color_data = bytearray()
 
-    for y in range(height):
-        for x in range(width):
-            r, g, b = img_processed[y, x]
+def load_font_masks(font_file=DEFAULT_FONT):
+    """
+    Font 8x16 (4096 B) -> maski glifów (256, 128), piksele wierszami, bit 7 = lewy
+    """
+    with open(font_file, "rb") as f:
+        font = np.frombuffer(f.read(FONT_SIZE), dtype=np.uint8)
+    if len(font) != FONT_SIZE:
+        raise ValueError(f"Font musi mieć {FONT_SIZE} bajtów: {font_file}")
+    return np.unpackbits(font).reshape(256, FONT_HEIGHT * FONT_WIDTH)
 
-            # Znajdź najbliższy kolor w palecie
-            color_idx = find_closest_color(r, g, b, PALETTE_6BIT)
 
-            # Znak ASCII na podstawie jasności - użyj pełnego zakresu 0-255
-            ascii_char = gray[y, x]
-            ascii_data.append(ascii_char)
+def match_glyphs(cells, masks, palette_rgb, chunk=256):
+    """
+    Dla komórek (N, 128, 3) wybiera glif i kolory fg/bg o najmniejszym błędzie
+    kwadratowym; zwraca znaki i atrybuty (fg << 4 | bg) jako tablice uint8 (N,)
+
+    Błąd rozpada się na część pikseli zapalonych (zależną tylko od fg)
+    i zgaszonych (tylko od bg), więc dla każdego glifu fg i bg wybierane są osobno:
+      E = const - 2 fg·A + n|fg|^2 - 2 bg·(S - A) + (128 - n)|bg|^2,
+    gdzie A to suma kolorów pod zapalonymi pikselami glifu (iloczyn komórki x glify),
+    S - suma kolorów całej komórki, n - liczba zapalonych pikseli.
+    """
+    masks = np.asarray(masks, dtype=np.float32)
+    palette = np.asarray(palette_rgb, dtype=np.float32)
+    pixels = masks.shape[1]
+    lit = masks.sum(axis=1)
+    norms = (palette**2).sum(axis=1)
+    fg_const = lit[None, :] * norms[:, None]  # (K, 256)
+    bg_const = (pixels - lit)[None, :] * norms[:, None]
+
+    chars = np.empty(len(cells), dtype=np.uint8)
+    attrs = np.empty(len(cells), dtype=np.uint8)
+    for start in range(0, len(cells), chunk):
+        x = np.asarray(cells[start : start + chunk], dtype=np.float32)
+        count = len(x)
+        # Jeden iloczyn (c*3, 128) @ (128, 256) -> sumy kolorów pod glifami (c, 3, 256)
+        lit_sum = x.transpose(0, 2, 1).reshape(-1, pixels) @ masks.T
+        lit_sum = lit_sum.reshape(count, 3, -1)
+        unlit_sum = x.sum(axis=1)[:, :, None] - lit_sum
+        fg_err, fg = _best_color(lit_sum, fg_const, palette)
+        bg_err, bg = _best_color(unlit_sum, bg_const, palette)
+        best = (fg_err + bg_err).argmin(axis=1)
+        rows = np.arange(count)
+        chars[start : start + count] = best
+        attrs[start : start + count] = (fg[rows, best] << 4) | bg[rows, best]
+    return chars, attrs
+
+
+def _best_color(sums, const, palette):
+    """
+    Najmniejszy błąd -2 p·sums + const[p] po kolorach palety p dla każdej
+    komórki i glifu; przy remisie wygrywa niższy indeks (jak argmin)
+    """
+    best = None
+    for k, (r, g, b) in enumerate(palette):
+        err = const[k] - 2 * (r * sums[:, 0] + g * sums[:, 1] + b * sums[:, 2])
+        if best is None:
+            best = err
+            index = np.zeros(err.shape, dtype=np.uint8)
+        else:
+            better = err < best
+            np.minimum(best, err, out=best)
+            index[better] = k
+    return best, index
 
-            # Kolor
-            color_data.append(color_idx)
 
-    return ascii_data, color_data
+def image_to_glyph_art(image_path, width=180, height=56, font_file=DEFAULT_FONT):
+    """
+    ASCII art dopasowany do kształtów glifów fontu - obraz w rozdzielczości ekranu,
+    błąd liczony w kolorach, które pokaże monitor (tabela z text_mode.v)
+    """
+    img = load_image(image_path, width * FONT_WIDTH, height * FONT_HEIGHT)
+    cells = img.reshape(height, FONT_HEIGHT, width, FONT_WIDTH, 3)
+    cells = cells.transpose(0, 2, 1, 3, 4).reshape(-1, FONT_HEIGHT * FONT_WIDTH, 3)
+    with profiling.span("asciiart.match"):
+        chars, attrs = match_glyphs(cells, load_font_masks(font_file), TEXT_MODE_RGB)
+    return bytearray(chars.tobytes()), bytearray(attrs.tobytes())
 
 
 def send_uart_data(ascii_data, color_data, port="/dev/ttyUSB0", baudrate=115200):
@@ -243,11 +313,13 @@ def send_uart_data(ascii_data, color_data, port="/dev/ttyUSB0", baudrate=115200)
 
             print(f"Wysyłanie {len(combined_data)} bajtów przez {port}...")
 
-            for i in range(0, len(combined_data), chunk_size):
-                chunk = combined_data[i : i + chunk_size]
-                sent = ser.write(chunk)
-                total_sent += sent
-                print(f"Wysłano {total_sent}/{len(combined_data)} bajtów")
+            with profiling.span("asciiart.tx"):
+                for i in range(0, len(combined_data), chunk_size):
+                    chunk = combined_data[i : i + chunk_size]
+                    sent = ser.write(chunk)
+                    total_sent += sent
+                    print(f"Wysłano {total_sent}/{len(combined_data)} bajtów")
+            profiling.count(profiling.TX_BYTES, total_sent)
 
             print(f"Wysłano łącznie {total_sent} bajtów")
 
@@ -258,10 +330,31 @@ def send_uart_data(ascii_data, color_data, port="/dev/ttyUSB0", baudrate=115200)
     return True
 
 
-def preview_ascii_art(ascii_data, color_data, width=180, height=56):
+def render_ascii_art(ascii_data, color_data, font_file=DEFAULT_FONT):
+    """
+    Pełna klatka RGB 1440x900 - to, co pokaże monitor w trybie tekstowym
+    """
+    with open(font_file, "rb") as f:
+        font = f.read(FONT_SIZE)
+    return render_text(bytes(ascii_data) + bytes(color_data) + font, "1440x900")
+
+
+def save_ascii_art_image(ascii_data, color_data, image_path, font_file=DEFAULT_FONT):
+    frame = render_ascii_art(ascii_data, color_data, font_file)
+    cv2.imwrite(image_path, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    print(f"Zapisano podgląd klatki do {image_path}")
+
+
+def preview_ascii_art(
+    ascii_data, color_data, width=180, height=56, image_path=None, font_file=DEFAULT_FONT
+):
     """
-    Podgląd ASCII art w konsoli z kolorami ANSI
+    Podgląd ASCII art w konsoli z kolorami ANSI; image_path - dodatkowo zapis
+    klatki wyrenderowanej jak na monitorze do pliku PNG
     """
+    if image_path:
+        save_ascii_art_image(ascii_data, color_data, image_path, font_file)
+
     # Mapowanie kolorów 6-bit na kody ANSI
     color_to_ansi = {
         0: 0,  # czarny
@@ -288,11 +381,12 @@ def preview_ascii_art(ascii_data, color_data, width=180, height=56):
         for x in range(min(80, width)):
             idx = y * width + x
             ascii_char = chr(ascii_data[idx] if 32 <= ascii_data[idx] <= 126 else 46)
-            color_idx = color_data[idx]
-            ansi_code = color_to_ansi[color_idx]
+            # Starszy nibble atrybutu to kolor znaku, młodszy - tło (jak w text_mode.v)
+            fg = color_to_ansi[color_data[idx] >> 4]
+            bg = color_to_ansi[color_data[idx] & 0x0F]
 
-            # Kod ANSI dla koloru tekstu
-            line += f"\033[38;5;{ansi_code}m{ascii_char}\033[0m"
+            # Kod ANSI dla koloru tekstu i tła
+            line += f"\033[38;5;{fg};48;5;{bg}m{ascii_char}\033[0m"
         print(line)
     print("-------------------------\n")
 
@@ -307,31 +401,78 @@ def main():
         "--baudrate", "-b", type=int, default=115200, help="Prędkość UART"
     )
     parser.add_argument("--no-dither", action="store_true", help="Wyłącz dithering")
+    parser.add_argument(
+        "--glyphs",
+        action="store_true",
+        help="Dobieraj znaki i kolory fg/bg po kształcie glifów z --font (bez ditheringu)",
+    )
     parser.add_argument(
         "--dither-type",
         choices=["floyd", "ordered"],
         default="ordered",
         help="Typ ditheringu",
     )
+    parser.add_argument(
+        "--bayer-size",
+        type=int,
+        choices=BAYER_SIZES,
+        default=4,
+        help="Rozmiar matrycy Bayer'a dla ditheringu ordered",
+    )
+    parser.add_argument(
+        "--serpentine",
+        action="store_true",
+        help="Dithering Floyd-Steinberg co drugi wiersz od prawej",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=METRICS,
+        default="rgb",
+        help="Odległość przy wyborze koloru: rgb albo lab (percepcyjna, CIELAB)",
+    )
     parser.add_argument(
         "--preview", "-p", action="store_true", help="Pokaż podgląd w konsoli"
     )
+    parser.add_argument(
+        "--preview-image",
+        metavar="PNG",
+        help="Zapisz klatkę 1440x900 wyrenderowaną jak na monitorze",
+    )
+    parser.add_argument(
+        "--font",
+        default=DEFAULT_FONT,
+        help="Font 8x16 (4096 B) załadowany w VRAM - do --glyphs i --preview-image",
+    )
 
+    profiling.add_profile_argument(parser)
     args = parser.parse_args()
+    profiling.setup(args)
 
     try:
         print(f"Konwertowanie {args.image} na ASCII art 180x56...")
 
-        ascii_data, color_data = image_to_ascii_art(
-            args.image, use_dithering=not args.no_dither, dither_type=args.dither_type
-        )
+        if args.glyphs:
+            ascii_data, color_data = image_to_glyph_art(args.image, font_file=args.font)
+        else:
+            ascii_data, color_data = image_to_ascii_art(
+                args.image,
+                use_dithering=not args.no_dither,
+                dither_type=args.dither_type,
+                serpentine=args.serpentine,
+                bayer_size=args.bayer_size,
+                metric=args.metric,
+            )
 
         print(f"Rozmiar danych ASCII: {len(ascii_data)} bajtów")
         print(f"Rozmiar danych kolorów: {len(color_data)} bajtów")
         print(f"Razem: {len(ascii_data) + len(color_data)} bajtów")
 
         if args.preview:
-            preview_ascii_art(ascii_data, color_data)
+            preview_ascii_art(
+                ascii_data, color_data, image_path=args.preview_image, font_file=args.font
+            )
+        elif args.preview_image:
+            save_ascii_art_image(ascii_data, color_data, args.preview_image, args.font)
 
         print(f"Wysyłanie przez UART {args.port}...")
         success = send_uart_data(ascii_data, color_data, args.port, args.baudrate)
@@ -344,6 +485,8 @@ def main():
     except Exception as e:
         print(f"Błąd: {e}")
         sys.exit(1)
+    finally:
+        profiling.finish(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Wsadowa konwersja katalogu obrazów do ramek gotowych do wysłania
+
+  graphic - spakowana ramka 200x150 (22500 bajtów, jak push.py)
+  text    - znaki i atrybuty 180x56 (20160 bajtów, jak asciiart.py)
+
+Obrazy konwertowane są równolegle w ProcessPoolExecutor (domyślnie na wszystkich
+rdzeniach). W katalogu wyjściowym trzymany jest manifest (.batch_manifest.json)
+z hashami wejść, parametrami i hashem wyniku - ponowne uruchomienie pomija
+obrazy, które się nie zmieniły.
+
+Użycie:
+  python batch_convert.py ../test_images -o ramki --mode graphic
+  python batch_convert.py ../test_images -o ascii --mode text --glyphs -j 4
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from asciiart import (
+    DEFAULT_FONT,
+    TEXT_KEEP_THRESHOLD,
+    image_to_ascii_art,
+    image_to_glyph_art,
+)
+from dither import BAYER_SIZES, DEFAULT_KEEP_THRESHOLD
+from generate_textmode_mem import file_digest, load_manifest, save_manifest
+from palette_lut import METRICS
+from pixel_pack import GRAPHIC_HEIGHT, GRAPHIC_WIDTH, pack_pixels, unpack_pixels
+from push import convert_image
+
+MODES = ("graphic", "text")
+TEXT_DITHER_TYPES = ("none", "floyd", "ordered")
+IMAGE_EXTENSIONS = (".bmp", ".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff")
+MANIFEST_NAME = ".batch_manifest.json"
+
+
+def find_images(paths):
+    """
+    Pliki obrazów z podanych plików i katalogów (katalogi bez podkatalogów), posortowane
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            found.append(path)
+    return found
+
+
+def convert_frame(src, mode, params, previous=None, keep_threshold=None):
+    """
+    Obraz -> bajty ramki gotowej do wysłania (jak push.py albo asciiart.py);
+    previous - bajty ramki wyświetlanej teraz: dithering stabilny w czasie
+    względem niej (bez --glyphs), keep_threshold None - domyślny próg trybu
+    """
+    if mode == "graphic":
+        prev_indices = None
+        if previous is not None:
+            count = GRAPHIC_WIDTH * GRAPHIC_HEIGHT
+            prev_indices = unpack_pixels(previous, count)
+            prev_indices = prev_indices.reshape(GRAPHIC_HEIGHT, GRAPHIC_WIDTH)
+        if keep_threshold is None:
+            keep_threshold = DEFAULT_KEEP_THRESHOLD
+        indices = convert_image(
+            src, params["serpentine"], params["metric"], prev_indices, keep_threshold
+        )
+        return pack_pixels(indices)
+    if params["glyphs"]:
+        chars, attrs = image_to_glyph_art(src, font_file=params["font"])
+    else:
+        if previous is not None:
+            half = len(previous) // 2
+            previous = (previous[:half], previous[half:])
+        if keep_threshold is None:
+            keep_threshold = TEXT_KEEP_THRESHOLD
+        chars, attrs = image_to_ascii_art(
+            src,
+            use_dithering=params["dither"] != "none",
+            dither_type=params["dither"],
+            serpentine=params["serpentine"],
+            bayer_size=params["bayer_size"],
+            metric=params["metric"],
+            previous=previous,
+            keep_threshold=keep_threshold,
+        )
+    return bytes(chars + attrs)
+
+
+def convert_file(src, dst, mode, params):
+    """
+    Konwertuje jeden obraz i zapisuje ramkę (w procesie roboczym);
+    zwraca (sha256 wyniku, rozmiar, czas konwersji)
+    """
+    start = time.perf_counter()
+    data = convert_frame(src, mode, params)
+    with open(dst, "wb") as f:
+        f.write(data)
+    return hashlib.sha256(data).hexdigest(), len(data), time.perf_counter() - start
+
+
+def batch_convert(
+    sources, out_dir, mode="graphic", params=None, workers=None, force=False
+):
+    """
+    Konwertuje obrazy do out_dir/<nazwa>.bin; zwraca słownik ze statystykami
+    """
+    params = dict(params or {})
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_file = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_file)
+
+    # Font wpływa na wynik --glyphs, więc jego hash jest częścią parametrów
+    if mode == "text" and params.get("glyphs"):
+        params["font_digest"] = file_digest(params["font"])
+
+    jobs = []
+    names = {}
+    skipped = 0
+    for src in sources:
+        name = os.path.splitext(os.path.basename(src))[0] + ".bin"
+        if name in names:
+            raise ValueError(
+                f"{src} i {names[name]} dają ten sam plik wyjściowy {name}"
+            )
+        names[name] = src
+        dst = os.path.join(out_dir, name)
+        entry = {"mode": mode, "params": params, "input": file_digest(src)}
+        previous = manifest.get(name)
+        if (
+            not force
+            and previous is not None
+            and all(previous.get(key) == value for key, value in entry.items())
+            and previous.get("output") == file_digest(dst)
+        ):
+            skipped += 1
+            continue
+        jobs.append((src, dst, name, entry))
+
+    converted = failed = out_bytes = 0
+    cpu_time = 0.0
+    start = time.perf_counter()
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(convert_file, src, dst, mode, params): (src, name, entry)
+                for src, dst, name, entry in jobs
+            }
+            for future in as_completed(futures):
+                src, name, entry = futures[future]
+                try:
+                    digest, size, seconds = future.result()
+                except Exception as e:
+                    print(f"Błąd konwersji {src}: {e}")
+                    manifest.pop(name, None)
+                    failed += 1
+                    continue
+                entry["output"] = digest
+                manifest[name] = entry
+                converted += 1
+                out_bytes += size
+                cpu_time += seconds
+    elapsed = time.perf_counter() - start
+    save_manifest(manifest_file, manifest)
+
+    return {
+        "converted": converted,
+        "skipped": skipped,
+        "failed": failed,
+        "output_bytes": out_bytes,
+        "elapsed": elapsed,
+        "cpu_time": cpu_time,
+        "workers": workers or os.cpu_count(),
+    }
+
+
+def print_report(stats):
+    elapsed = max(stats["elapsed"], 1e-9)
+    print(
+        f"Skonwertowano: {stats['converted']}, "
+        f"pominięto (bez zmian): {stats['skipped']}, błędy: {stats['failed']}"
+    )
+    if stats["converted"]:
+        print(
+            f"Czas: {elapsed:.2f} s na {stats['workers']} procesach - "
+            f"{stats['converted'] / elapsed:.1f} obrazów/s, "
+            f"{stats['output_bytes'] / elapsed / 1e6:.2f} MB/s wyjścia"
+        )
+        print(
+            f"Średnio {stats['cpu_time'] / stats['converted'] * 1000:.1f} ms na obraz, "
+            f"przyspieszenie {stats['cpu_time'] / elapsed:.1f}x"
+        )
+
+
+def add_conversion_args(parser):
+    """
+    Opcje konwersji wspólne dla batch_convert.py i slideshow.py
+    """
+    parser.add_argument(
+        "--mode",
+        choices=MODES,
+        default="graphic",
+        help="graphic - ramka 200x150 (22500 B), text - ASCII art 180x56 (20160 B)",
+    )
+    parser.add_argument(
+        "--serpentine",
+        action="store_true",
+        help="Dithering Floyd-Steinberg co drugi wiersz od prawej",
+    )
+    parser.add_argument(
+        "--dither-type",
+        choices=TEXT_DITHER_TYPES,
+        default="ordered",
+        help="Dithering w trybie text",
+    )
+    parser.add_argument(
+        "--bayer-size",
+        type=int,
+        choices=BAYER_SIZES,
+        default=4,
+        help="Rozmiar matrycy Bayer'a dla ditheringu ordered",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=METRICS,
+        default="rgb",
+        help="Odległość przy wyborze koloru: rgb albo lab (CIELAB); bez --glyphs",
+    )
+    parser.add_argument(
+        "--glyphs",
+        action="store_true",
+        help="Tryb text: dobór znaków po kształcie glifów z --font",
+    )
+    parser.add_argument(
+        "--font", default=DEFAULT_FONT, help="Font 8x16 (4096 B) do --glyphs"
+    )
+
+
+def conversion_params(args):
+    """
+    Parametry convert_frame() z opcji dodanych przez add_conversion_args()
+    """
+    if args.mode == "graphic":
+        return {"serpentine": args.serpentine, "metric": args.metric}
+    if args.glyphs:
+        return {"glyphs": True, "font": os.path.abspath(args.font)}
+    return {
+        "glyphs": False,
+        "dither": args.dither_type,
+        "serpentine": args.serpentine,
+        "bayer_size": args.bayer_size,
+        "metric": args.metric,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Równoległa konwersja katalogu obrazów do ramek do wysłania"
+    )
+    parser.add_argument("inputs", nargs="+", help="Katalogi lub pliki obrazów")
+    parser.add_argument("--output", "-o", required=True, help="Katalog wyjściowy")
+    parser.add_argument(
+        "--workers",
+        "-j",
+        type=int,
+        default=None,
+        help="Liczba procesów (domyślnie: liczba rdzeni)",
+    )
+    parser.add_argument(
+        "--force", "-f", action="store_true", help="Konwertuj także obrazy bez zmian"
+    )
+    add_conversion_args(parser)
+    args = parser.parse_args()
+    params = conversion_params(args)
+
+    sources = find_images(args.inputs)
+    if not sources:
+        print("Brak obrazów do konwersji")
+        sys.exit(1)
+
+    print(f"Konwersja {len(sources)} obrazów ({args.mode}) do {args.output}...")
+    stats = batch_convert(
+        sources, args.output, args.mode, params, args.workers, args.force
+    )
+    print_report(stats)
+    if stats["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
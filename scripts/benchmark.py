@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Benchmark ścieżek hosta bez płytki - do wyłapywania regresji wydajności
+
+Korpus to test_images/*.bmp, a port szeregowy zastępuje atrapa (NullSerial),
+która tylko liczy bajty. Każdy etap jest mierzony osobno:
+  push.*             - konwersja + dithering, pakowanie 4->3, wysyłka, całość
+  asciiart.*         - image_to_ascii_art dla każdego typu ditheringu
+  generate_hex_file.* - plik .hex dla każdej rozdzielczości
+  text_editor.save_files
+Wynik (opóźnienie na klatkę, piksele/s, bajty/s) zapisywany jest jako JSON;
+dwa takie pliki można porównać i oznaczyć spowolnienia.
+
+Przykłady:
+  python benchmark.py -o wynik.json
+  python benchmark.py --stages push asciiart --repeat 5 --baseline stary.json
+  python benchmark.py --compare stary.json nowy.json --threshold 0.05
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import asciiart
+import generate_textmode_mem
+import push
+import text_editor
+from pixel_pack import GRAPHIC_HEIGHT, GRAPHIC_WIDTH, pack_pixels
+from vram_render import FONT_HEIGHT, FONT_WIDTH
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_IMAGES = os.path.join(ROOT_DIR, "test_images", "*.bmp")
+STAGE_GROUPS = ["push", "asciiart", "hex", "editor"]
+ASCII_DITHER_TYPES = ["none", "floyd", "ordered"]
+DEFAULT_THRESHOLD = 0.10  # spowolnienie o więcej niż 10% mediany jest oznaczane
+CELL_PIXELS = FONT_WIDTH * FONT_HEIGHT  # etapy tekstowe liczą piksele ekranu
+
+
+class NullSerial:
+    """
+    Atrapa portu szeregowego: przyjmuje wszystko i tylko liczy bajty
+    """
+
+    is_open = True
+
+    def __init__(self):
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _NullScreen:
+    def getmaxyx(self):
+        return (0, 0)  # save_files nie wypisuje wtedy komunikatu
+
+
+class _BenchEditor(text_editor.TextEditor):
+    def init_colors(self):
+        pass
+
+
+class Stage:
+    """
+    Próbki jednego etapu: czas, przetworzone piksele i bajty na klatkę
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.times = []
+        self.pixels = 0
+        self.bytes = 0
+
+    def add(self, seconds, pixels=0, nbytes=0):
+        self.times.append(seconds)
+        self.pixels += pixels
+        self.bytes += nbytes
+
+    def summary(self):
+        times = np.array(self.times) * 1000
+        total = max(sum(self.times), 1e-12)
+        return {
+            "frames": len(times),
+            "total_s": round(total, 6),
+            "mean_ms": round(float(times.mean()), 4),
+            "median_ms": round(float(np.median(times)), 4),
+            "p95_ms": round(float(np.percentile(times, 95)), 4),
+            "min_ms": round(float(times.min()), 4),
+            "max_ms": round(float(times.max()), 4),
+            "pixels_per_s": round(self.pixels / total, 1),
+            "bytes_per_s": round(self.bytes / total, 1),
+        }
+
+
+def timed(func, *args, **kwargs):
+    """
+    Wywołuje funkcję z wyciszonym stdout; zwraca (wynik, sekundy)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return result, elapsed
+
+
+def image_pixels(path):
+    return int(np.prod(cv2.imread(path).shape[:2]))
+
+
+def bench_push(images, repeat, warmup):
+    stages = {n: Stage(f"push.{n}") for n in ("convert", "pack", "send", "total")}
+    # push.py przyjmuje tylko obrazy 200x150
+    frames = [p for p in images if image_pixels(p) == GRAPHIC_WIDTH * GRAPHIC_HEIGHT]
+    # Rozgrzewka na całym korpusie, żeby tablica LUT była już wypełniona
+    for _ in range(warmup):
+        for path in frames:
+            timed(push.send_pixels_over_serial, path, NullSerial(), quiet=True)
+
+    for path in frames:
+        for _ in range(repeat):
+            indices, t_convert = timed(push.convert_image, path)
+            frame, t_pack = timed(pack_pixels, indices)
+            sent, t_send = timed(push.send_frame, NullSerial(), frame, quiet=True)
+            pixels = indices.size
+            stages["convert"].add(t_convert, pixels, len(frame))
+            stages["pack"].add(t_pack, pixels, len(frame))
+            stages["send"].add(t_send, pixels, sent)
+
+            sink = NullSerial()
+            _, t_total = timed(push.send_pixels_over_serial, path, sink, quiet=True)
+            stages["total"].add(t_total, pixels, sink.bytes_written)
+    return list(stages.values())
+
+
+def bench_asciiart(images, repeat, warmup):
+    result = []
+    for dither_type in ASCII_DITHER_TYPES:
+        stage = Stage(f"asciiart.{dither_type}")
+        kwargs = {
+            "use_dithering": dither_type != "none",
+            "dither_type": dither_type if dither_type != "none" else "ordered",
+        }
+        for _ in range(warmup):
+            for path in images:
+                timed(asciiart.image_to_ascii_art, path, **kwargs)
+        for path in images:
+            pixels = image_pixels(path)
+            for _ in range(repeat):
+                (chars, colors), t = timed(asciiart.image_to_ascii_art, path, **kwargs)
+                stage.add(t, pixels, len(chars) + len(colors))
+        result.append(stage)
+
+    stage = Stage("asciiart.glyphs")
+    for _ in range(warmup):
+        for path in images:
+            timed(asciiart.image_to_glyph_art, path)
+    for path in images:
+        pixels = image_pixels(path)
+        for _ in range(repeat):
+            (chars, colors), t = timed(asciiart.image_to_glyph_art, path)
+            stage.add(t, pixels, len(chars) + len(colors))
+    result.append(stage)
+    return result
+
+
+def bench_hex(repeat, warmup, workdir):
+    result = []
+    rng = random.Random(0)
+    font = os.path.join(os.path.dirname(os.path.abspath(__file__)), "terminus.raw")
+    for resolution, (_, _, cols, rows) in generate_textmode_mem.RESOLUTIONS.items():
+        stage = Stage(f"generate_hex_file.{resolution}")
+        text = os.path.join(workdir, f"text_{resolution}.bin")
+        colors = os.path.join(workdir, f"colors_{resolution}.bin")
+        palette = os.path.join(workdir, "palette.bin")
+        output = os.path.join(workdir, f"output_{resolution}.hex")
+        with open(text, "wb") as f:
+            f.write(bytes(rng.randrange(32, 127) for _ in range(cols * rows)))
+        with open(colors, "wb") as f:
+            f.write(bytes(rng.randrange(256) for _ in range(cols * rows)))
+        with open(palette, "wb") as f:
+            f.write(bytes(range(16)))
+
+        # Bez manifestu i z force - mierzymy pełne generowanie, a nie pomijanie
+        args = (output, text, colors, font, palette, resolution)
+        kwargs = {"use_manifest": False, "force": True}
+        for _ in range(warmup):
+            timed(generate_textmode_mem.generate_hex_file, *args, **kwargs)
+        for _ in range(repeat):
+            _, t = timed(generate_textmode_mem.generate_hex_file, *args, **kwargs)
+            stage.add(t, cols * rows * CELL_PIXELS, os.path.getsize(output))
+        result.append(stage)
+    return result
+
+
+def bench_editor(repeat, warmup, workdir):
+    stage = Stage("text_editor.save_files")
+    editor = _BenchEditor(_NullScreen())
+    rng = random.Random(0)
+    cells = editor.width * editor.height
+    editor.chars[:] = bytes(rng.randrange(32, 127) for _ in range(cells))
+    editor.attrs[:] = bytes(rng.randrange(256) for _ in range(cells))
+    old_cwd = os.getcwd()
+    os.chdir(workdir)  # save_files zapisuje do bieżącego katalogu
+    try:
+        for _ in range(warmup):
+            timed(editor.save_files)
+        for _ in range(repeat):
+            ok, t = timed(editor.save_files)
+            if not ok:
+                raise RuntimeError("save_files zwróciło błąd")
+            written = sum(os.path.getsize(name) for name in os.listdir("."))
+            stage.add(t, cells * CELL_PIXELS, written)
+    finally:
+        os.chdir(old_cwd)
+    return [stage]
+
+
+def git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(images, groups, repeat=3, warmup=1):
+    """
+    Uruchamia wybrane grupy etapów; zwraca słownik gotowy do zapisu jako JSON
+    """
+    stages = []
+    with tempfile.TemporaryDirectory() as workdir:
+        if "push" in groups:
+            stages += bench_push(images, repeat, warmup)
+        if "asciiart" in groups:
+            stages += bench_asciiart(images, repeat, warmup)
+        if "hex" in groups:
+            stages += bench_hex(repeat, warmup, workdir)
+        if "editor" in groups:
+            editor_dir = os.path.join(workdir, "editor")
+            os.mkdir(editor_dir)
+            stages += bench_editor(repeat, warmup, editor_dir)
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "images": len(images),
+            "repeat": repeat,
+        },
+        "stages": {s.name: s.summary() for s in stages if s.times},
+    }
+
+
+def compare(base, new, threshold=DEFAULT_THRESHOLD):
+    """
+    Porównuje mediany czasów etapów; zwraca (wiersze tabeli, spowolnione etapy)
+    """
+    rows = []
+    slow = []
+    for name, stats in new["stages"].items():
+        old = base["stages"].get(name)
+        if old is None:
+            rows.append((name, None, stats["median_ms"], None, "nowy"))
+            continue
+        ratio = stats["median_ms"] / max(old["median_ms"], 1e-9)
+        if ratio > 1 + threshold:
+            flag = "WOLNIEJ"
+            slow.append(name)
+        elif ratio < 1 - threshold:
+            flag = "szybciej"
+        else:
+            flag = ""
+        rows.append((name, old["median_ms"], stats["median_ms"], ratio, flag))
+    for name in base["stages"]:
+        if name not in new["stages"]:
+            rows.append((name, base["stages"][name]["median_ms"], None, None, "brak"))
+    return rows, slow
+
+
+def print_summary(result, out=sys.stderr):
+    header = f"{'etap':32s} {'klatek':>6s} {'mediana ms':>11s} {'p95 ms':>9s}"
+    print(f"{header} {'Mpx/s':>8s} {'MB/s':>8s}", file=out)
+    for name, s in result["stages"].items():
+        print(
+            f"{name:32s} {s['frames']:6d} {s['median_ms']:11.3f} {s['p95_ms']:9.3f} "
+            f"{s['pixels_per_s'] / 1e6:8.2f} {s['bytes_per_s'] / 1e6:8.2f}",
+            file=out,
+        )
+
+
+def print_comparison(rows, out=sys.stderr):
+    print(f"{'etap':32s} {'przed ms':>10s} {'po ms':>10s} {'zmiana':>8s}", file=out)
+    for name, old, new, ratio, flag in rows:
+        old_s = f"{old:10.3f}" if old is not None else f"{'-':>10s}"
+        new_s = f"{new:10.3f}" if new is not None else f"{'-':>10s}"
+        ratio_s = f"{(ratio - 1) * 100:+7.1f}%" if ratio is not None else f"{'-':>8s}"
+        print(f"{name:32s} {old_s} {new_s} {ratio_s} {flag}", file=out)
+
+
+def load_result(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark ścieżek hosta na test_images bez urządzenia",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Przykłady:
+  %(prog)s -o wynik.json
+  %(prog)s --stages push asciiart --repeat 5 --baseline stary.json
+  %(prog)s --compare stary.json nowy.json
+Kod wyjścia 1 oznacza wykryte spowolnienie.
+""",
+    )
+    parser.add_argument(
+        "--images",
+        default=DEFAULT_IMAGES,
+        help="Wzorzec obrazów (domyślnie: test_images/*.bmp)",
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=STAGE_GROUPS,
+        default=STAGE_GROUPS,
+        help="Grupy etapów do zmierzenia",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Powtórzeń na klatkę")
+    parser.add_argument("--warmup", type=int, default=1, help="Przebiegi rozgrzewkowe")
+    parser.add_argument("--output", "-o", help="Plik JSON (domyślnie: stdout)")
+    parser.add_argument("--baseline", help="Porównaj z wcześniejszym plikiem JSON")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("PRZED", "PO"),
+        help="Tylko porównaj dwa pliki JSON, bez uruchamiania",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Próg spowolnienia mediany (domyślnie: {DEFAULT_THRESHOLD})",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        base, new = (load_result(path) for path in args.compare)
+    else:
+        images = sorted(glob.glob(args.images))
+        if not images:
+            print(f"Brak obrazów: {args.images}", file=sys.stderr)
+            sys.exit(2)
+        new = run(images, args.stages, args.repeat, args.warmup)
+        print_summary(new)
+        text = json.dumps(new, indent=2, ensure_ascii=False)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text + "\n")
+            print(f"Zapisano {args.output}", file=sys.stderr)
+        else:
+            print(text)
+        base = load_result(args.baseline) if args.baseline else None
+
+    if base is not None:
+        rows, slow = compare(base, new, args.threshold)
+        print_comparison(rows)
+        if slow:
+            names = ", ".join(slow)
+            print(f"Spowolnienie w {len(slow)} etapach: {names}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Wspólny silnik ditheringu (Floyd-Steinberg i Bayer) dla push.py i asciiart.py
+
+Obraz trzymany jest jako płaska tablica float32 (H*W*3). Zwykły przebieg
+(wiersz po wierszu, od lewej) liczony jest falą po przekątnych: wszystkie piksele
+z tym samym x + 2*y zależą tylko od pikseli z wcześniejszych przekątnych, więc
+każda przekątna to kilka operacji na tablicach zamiast pętli po pikselach.
+Kolejność dodawania błędów do sąsiadów jest taka sama jak w pętli sekwencyjnej.
+
+Przebieg serpentynowy (co drugi wiersz od prawej) jest z natury sekwencyjny,
+więc liczony jest wiersz po wierszu: poziomo skalarnie, w dół wektorowo.
+
+Dithering uporządkowany (Bayer) nie ma zależności między pikselami, więc to
+kilka operacji na całym obrazie i jedna kwantyzacja przez tablicę LUT.
+
+Tryb czasowy (previous = indeksy poprzedniej klatki): piksel zostaje przy
+poprzednim indeksie, dopóki jego kolor jest w odległości keep_threshold od
+wartości piksela (z dodanym błędem). W Floydzie-Steinbergu rozpraszany jest błąd
+koloru faktycznie wybranego, więc średni kolor obszaru się zgadza, a wzór
+ditheringu nie "pływa" między podobnymi klatkami - zmienia się mało bajtów.
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from palette_lut import get_lut
+
+# Wagi Floyda-Steinberga
+FS_RIGHT = 7 / 16
+FS_DOWN_LEFT = 3 / 16
+FS_DOWN = 5 / 16
+FS_DOWN_RIGHT = 1 / 16
+
+BAYER_SIZES = (2, 4, 8)
+
+# Odległość RGB, do której piksel zostaje przy poprzednim indeksie (tryb czasowy):
+# jeden krok palety 6-bit na jednej składowej. Mniejszy próg niewiele daje, bo
+# przy rozpraszaniu błędu najbliższy kolor i tak rzadko jest dalej niż pół kroku.
+DEFAULT_KEEP_THRESHOLD = 85
+
+
+@lru_cache(maxsize=8)
+def _diagonals(width, height):
+    """
+    Dla każdej przekątnej t = x + 2*y: indeksy składowych pikseli w płaskim
+    buforze oraz pary (źródło, cel) dla każdego sąsiada w kolejności dodawania błędu
+    """
+    channels = np.arange(3)
+    steps = []
+    for t in range(width + 2 * (height - 1)):
+        ys = np.arange(max(0, (t - width + 2) // 2), min(height - 1, t // 2) + 1)
+        xs = t - 2 * ys
+        idx = ys * width + xs
+        has_below = ys < height - 1
+        neighbours = []
+        # (y+1, x-1) musi dostać błąd przed (y, x-1) -> kolejność jak w pętli
+        for sel, offset, factor in (
+            (has_below & (xs > 0), width - 1, FS_DOWN_LEFT),
+            (xs < width - 1, 1, FS_RIGHT),
+            (has_below, width, FS_DOWN),
+            (has_below & (xs < width - 1), width + 1, FS_DOWN_RIGHT),
+        ):
+            src = np.flatnonzero(sel)
+            if len(src):
+                src3 = (src[:, None] * 3 + channels).ravel()
+                dst3 = ((idx[src] + offset)[:, None] * 3 + channels).ravel()
+                neighbours.append((src3, dst3, np.float32(factor)))
+        idx3 = (idx[:, None] * 3 + channels).ravel()
+        steps.append((idx, idx3, neighbours))
+    return steps
+
+
+def floyd_steinberg(
+    img,
+    palette_rgb,
+    threshold=0,
+    serpentine=False,
+    clip=False,
+    rounding="nearest",
+    integer_error=False,
+    metric="rgb",
+    previous=None,
+    keep_threshold=DEFAULT_KEEP_THRESHOLD,
+):
+    """
+    Dithering Floyda-Steinberga obrazu (H, W, 3) do podanej palety RGB.
+    Zwraca tablicę indeksów palety (H, W) uint8.
+
+    threshold     - błąd jest rozpraszany tylko gdy max(|err|) >= threshold (jak w push.py)
+    serpentine    - co drugi wiersz przetwarzany od prawej do lewej
+    clip          - przycinanie sąsiadów do 0-255 po każdym dodaniu błędu (jak w asciiart.py)
+    rounding      - "nearest" (round() jak w push.py) lub "floor" (int() jak w asciiart.py)
+    integer_error - błąd liczony od zaokrąglonej wartości, a nie od float (jak w push.py)
+    metric        - odległość przy wyborze koloru: "rgb" albo "lab" (CIELAB)
+    previous      - indeksy (H, W) poprzedniej klatki (tryb czasowy) albo None
+    keep_threshold - odległość RGB, do której zostaje poprzedni indeks
+    """
+    height, width = img.shape[:2]
+    lut = get_lut(palette_rgb, metric)
+    palette = lut.palette.astype(np.float32)
+    buf = np.asarray(img, dtype=np.float32).ravel().copy()
+    out = np.empty(height * width, dtype=np.uint8)
+    keep = None
+    if previous is not None:
+        keep = _check_previous(previous, height, width)
+    keep_sq = np.float32(keep_threshold) ** 2
+
+    if serpentine:
+        _serpentine(
+            buf,
+            out,
+            width,
+            height,
+            lut,
+            palette,
+            threshold,
+            clip,
+            rounding,
+            integer_error,
+            keep,
+            float(keep_sq),
+        )
+        return out.reshape(height, width)
+
+    for idx, idx3, neighbours in _diagonals(width, height):
+        values = buf[idx3].reshape(-1, 3)
+        base = np.floor(values) if rounding == "floor" else np.rint(values)
+        q = lut.quantize(base)
+        if keep is not None:
+            prev = keep[idx]
+            dist = ((base - palette[prev]) ** 2).sum(axis=1)
+            q = np.where(dist <= keep_sq, prev, q)
+        out[idx] = q
+        err = (base if integer_error else values) - palette[q]
+        if threshold > 0:
+            err[np.abs(err).max(axis=1) < threshold] = 0
+        err = err.ravel()
+        for src, dst, factor in neighbours:
+            if clip:
+                buf[dst] = np.clip(buf[dst] + err[src] * factor, 0, 255)
+            else:
+                buf[dst] += err[src] * factor
+
+    return out.reshape(height, width)
+
+
+def _check_previous(previous, height, width):
+    previous = np.asarray(previous, dtype=np.uint8)
+    if previous.size != height * width:
+        raise ValueError(
+            f"Poprzednia klatka ma {previous.size} pikseli, oczekiwano {height * width}"
+        )
+    return previous.ravel()
+
+
+def _serpentine(
+    buf,
+    out,
+    width,
+    height,
+    lut,
+    palette,
+    threshold,
+    clip,
+    rounding,
+    integer_error,
+    keep=None,
+    keep_sq=0.0,
+):
+    rows = buf.reshape(height, width, 3)
+    pal = palette.tolist()
+    to_int = math.floor if rounding == "floor" else round
+    for y in range(height):
+        step = 1 if y % 2 == 0 else -1
+        xs = range(width) if step == 1 else range(width - 1, -1, -1)
+        row = rows[y].tolist()
+        errs = np.zeros((width, 3), dtype=np.float32)
+        row_out = out[y * width : (y + 1) * width]
+        row_keep = None
+        if keep is not None:
+            row_keep = keep[y * width : (y + 1) * width].tolist()
+
+        for x in xs:
+            r, g, b = row[x]
+            ri, gi, bi = to_int(r), to_int(g), to_int(b)
+            i = lut.index(ri, gi, bi)
+            if row_keep is not None:
+                k = row_keep[x]
+                kr, kg, kb = pal[k]
+                if (ri - kr) ** 2 + (gi - kg) ** 2 + (bi - kb) ** 2 <= keep_sq:
+                    i = k
+            row_out[x] = i
+            if integer_error:
+                r, g, b = ri, gi, bi
+            pr, pg, pb = pal[i]
+            er, eg, eb = r - pr, g - pg, b - pb
+            if max(abs(er), abs(eg), abs(eb)) < threshold:
+                continue
+            errs[x] = (er, eg, eb)
+            nx = x + step
+            if 0 <= nx < width:
+                n = row[nx]
+                n[0] += er * FS_RIGHT
+                n[1] += eg * FS_RIGHT
+                n[2] += eb * FS_RIGHT
+                if clip:
+                    row[nx] = [min(max(v, 0.0), 255.0) for v in n]
+
+        if y + 1 == height:
+            break
+        # Błędy całego wiersza do wiersza poniżej naraz, w kolejności skanowania
+        below = rows[y + 1]
+        from_left = (below[1:], errs[:-1], FS_DOWN_RIGHT if step == 1 else FS_DOWN_LEFT)
+        from_above = (below, errs, FS_DOWN)
+        from_right = (below[:-1], errs[1:], FS_DOWN_LEFT if step == 1 else FS_DOWN_RIGHT)
+        order = (from_left, from_above, from_right)
+        for dst, src, factor in order if step == 1 else order[::-1]:
+            dst += src * np.float32(factor)
+            if clip:
+                np.clip(dst, 0, 255, out=dst)
+
+
+@lru_cache(maxsize=None)
+def bayer_matrix(size):
+    """
+    Matryca Bayera size x size (2, 4, 8) z wartościami 0 .. size*size-1
+    """
+    if size not in BAYER_SIZES:
+        raise ValueError(f"Nieobsługiwany rozmiar matrycy Bayera: {size}")
+    matrix = np.array([[0, 2], [3, 1]])
+    while len(matrix) < size:
+        matrix = np.block(
+            [[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]]
+        )
+    matrix.setflags(write=False)
+    return matrix
+
+
+def ordered_dither(
+    img,
+    palette_rgb,
+    size=4,
+    strength=64,
+    metric="rgb",
+    previous=None,
+    keep_threshold=DEFAULT_KEEP_THRESHOLD,
+):
+    """
+    Dithering uporządkowany obrazu (H, W, 3): do każdego piksela dodawany jest próg
+    z matrycy Bayera (od -strength/2 do +strength/2), potem kwantyzacja przez LUT
+    (metric "rgb" albo "lab"). Zwraca tablicę indeksów palety (H, W) uint8.
+    previous / keep_threshold - tryb czasowy jak w floyd_steinberg
+    """
+    height, width = img.shape[:2]
+    matrix = bayer_matrix(size) / float(size * size)
+    reps = (-(-height // size), -(-width // size))
+    threshold = np.tile(matrix, reps)[:height, :width] * strength - strength / 2
+
+    dithered = np.clip(img + threshold[:, :, None], 0, 255)
+    # Obcięcie do liczb całkowitych jak int() w pierwotnej pętli
+    lut = get_lut(palette_rgb, metric)
+    base = np.floor(dithered)
+    out = lut.quantize(base)
+    if previous is None:
+        return out
+    return keep_previous(base, lut.palette, out, previous, keep_threshold)
+
+
+def keep_previous(
+    img, palette, indices, previous, keep_threshold=DEFAULT_KEEP_THRESHOLD
+):
+    """
+    Tryb czasowy dla kwantyzacji bez zależności między pikselami (Bayer, bez
+    ditheringu): tam, gdzie kolor poprzedniego indeksu jest w odległości RGB
+    keep_threshold od img (H, W, 3), zwraca poprzedni indeks zamiast indices
+    """
+    height, width = indices.shape
+    prev = _check_previous(previous, height, width).reshape(height, width)
+    colors = np.asarray(palette, dtype=np.float32)[prev]
+    dist = ((np.asarray(img, dtype=np.float32) - colors) ** 2).sum(axis=2)
+    keep = dist <= np.float32(keep_threshold) ** 2
+    return np.where(keep, prev, indices).astype(np.uint8)
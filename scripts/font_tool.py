@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Przygotowanie fontu 8x16 dla trybu tekstowego: PSF1 / PSF2 / BDF -> 256 glifów
+po 16 bajtów (4096 B, bit 7 = lewy piksel), czyli obszar fontu w VRAM od adresu
+2 * kolumny * wiersze (20160 dla 1440x900).
+
+Z jednego źródła powstają:
+  .raw           - surowe 4096 bajtów (jak terminus.raw)
+  nagłówek C     - tablica dla pipico_controller (jak default8x16.h)
+  --vram         - font wstawiony w obraz VRAM (.hex/.bin/.coe/.mem), bez zmian reszty
+  --stream       - komendy SPI (0x02 adres + 0xH1 zapis) ładujące font na żywo
+
+Wynik konwersji trafia do katalogu FONT_CACHE_DIR pod hashem źródła i opcji,
+więc ponowne uruchomienie dla tego samego pliku nie parsuje go od nowa.
+
+Glify 0-255 to kolejne glify fontu (PSF) albo znaki o kodach 0-255 (BDF).
+Z --codepage (np. cp437) kod bajtu tłumaczony jest na znak Unicode i szukany
+w tablicy Unicode fontu; brakujące kody biorą glif o tym samym numerze.
+
+Podgląd całego zestawu (jedno np.unpackbits na cały font):
+  python font_tool.py ter-216n.psf --show
+  python font_tool.py ter-216n.psf --png glify.png --scale 3
+
+Użycie:
+  python font_tool.py ter-216n.psf -o terminus.raw
+  python font_tool.py default8x16.psfu --header ../pipico_controller/default8x16.h
+  python font_tool.py font.bdf --codepage cp437 -o font.raw --vram ../vram_init.hex
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import struct
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from spi_protocol import VRAM_SIZE, CommandStream
+from vga_timing import load_timing
+from vram_image import read_vram, write_vram
+from vram_render import FONT_HEIGHT, FONT_SIZE, FONT_WIDTH
+
+GLYPHS = 256
+SHEET_COLS = 16  # glifów w wierszu podglądu
+HEADER_BYTES_PER_LINE = 12  # jak xxd -i
+FONT_CACHE_DIR = os.environ.get(
+    "FPGA_FONT_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".font_cache"),
+)
+_CACHE_VERSION = b"font_tool 1"
+
+PSF1_MAGIC = b"\x36\x04"
+PSF1_MODE_512 = 0x01
+PSF1_MODE_HASTAB = 0x02
+PSF1_SEPARATOR = 0xFFFF
+PSF1_STARTSEQ = 0xFFFE
+PSF2_MAGIC = b"\x72\xb5\x4a\x86"
+PSF2_HAS_UNICODE_TABLE = 0x01
+PSF2_SEPARATOR = 0xFF
+PSF2_STARTSEQ = 0xFE
+
+# Połówki bloku dla podglądu w terminalu: (górny piksel, dolny piksel)
+_HALF_BLOCKS = np.array([" ", "▄", "▀", "█"])
+
+
+def font_area_offset(timing=None):
+    """
+    Adres fontu w VRAM: za znakami i atrybutami (2 * kolumny * wiersze)
+    """
+    if timing is None or isinstance(timing, str):
+        timing = load_timing(timing)
+    return 2 * timing.text_cols * timing.text_rows
+
+
+# --- parsowanie źródeł ---
+
+
+def _fit_cells(glyphs):
+    """
+    Glify (N, h, w) bool -> komórki (N, 16, 8); niższe fonty wyśrodkowane w pionie
+    """
+    count, height, width = glyphs.shape
+    if width > FONT_WIDTH or height > FONT_HEIGHT:
+        raise ValueError(
+            f"Font {width}x{height} nie mieści się w komórce {FONT_WIDTH}x{FONT_HEIGHT}"
+        )
+    cells = np.zeros((count, FONT_HEIGHT, FONT_WIDTH), dtype=bool)
+    top = (FONT_HEIGHT - height) // 2
+    cells[:, top : top + height, :width] = glyphs
+    return cells
+
+
+def _psf1_unicode(table, count):
+    mapping = {}
+    codes = np.frombuffer(table[: len(table) // 2 * 2], dtype="<u2").tolist()
+    glyph = 0
+    in_sequence = False
+    for code in codes:
+        if glyph >= count:
+            break
+        if code == PSF1_SEPARATOR:
+            glyph += 1
+            in_sequence = False
+        elif code == PSF1_STARTSEQ:
+            in_sequence = True  # sekwencje (znaki złożone) są pomijane
+        elif not in_sequence:
+            mapping.setdefault(code, glyph)
+    return mapping
+
+
+def _psf2_unicode(table, count):
+    mapping = {}
+    for glyph, entry in enumerate(table.split(bytes([PSF2_SEPARATOR]))[:count]):
+        singles = entry.split(bytes([PSF2_STARTSEQ]))[0]
+        for char in singles.decode("utf-8", "replace"):
+            mapping.setdefault(ord(char), glyph)
+    return mapping
+
+
+def parse_psf(data):
+    """
+    Font PSF1 albo PSF2 -> (komórki (N, 16, 8) bool, słownik kod Unicode -> glif
+    albo None, jeśli font nie ma tablicy Unicode)
+    """
+    if data[:2] == PSF1_MAGIC:
+        mode, height = data[2], data[3]
+        count = 512 if mode & PSF1_MODE_512 else 256
+        width, row_bytes, start = 8, 1, 4
+        has_table = mode & PSF1_MODE_HASTAB
+    elif data[:4] == PSF2_MAGIC:
+        _, header_size, flags, count, charsize, height, width = struct.unpack(
+            "<7I", data[4:32]
+        )
+        row_bytes = (width + 7) // 8
+        if charsize != height * row_bytes:
+            raise ValueError(f"Niespójny nagłówek PSF2: {charsize} B na glif")
+        start = header_size
+        has_table = flags & PSF2_HAS_UNICODE_TABLE
+    else:
+        raise ValueError("To nie jest font PSF (zły nagłówek)")
+
+    end = start + count * height * row_bytes
+    if len(data) < end:
+        raise ValueError(f"Font PSF jest ucięty: {len(data)} z {end} bajtów")
+    rows = np.frombuffer(data[start:end], dtype=np.uint8)
+    bits = np.unpackbits(rows.reshape(count, height, row_bytes), axis=2)
+    cells = _fit_cells(bits[:, :, :width].astype(bool))
+
+    mapping = None
+    if has_table:
+        table = data[end:]
+        if data[:2] == PSF1_MAGIC:
+            mapping = _psf1_unicode(table, count)
+        else:
+            mapping = _psf2_unicode(table, count)
+    return cells, mapping
+
+
+def parse_bdf(text):
+    """
+    Font BDF -> słownik ENCODING -> komórka (16, 8) bool; linia bazowa na
+    wysokości FONT_ASCENT (font niższy niż 16 wyśrodkowany w pionie)
+    """
+    props = {}
+    glyphs = {}
+    lines = iter(text.splitlines())
+    for line in lines:
+        key, _, value = line.strip().partition(" ")
+        if key in ("FONTBOUNDINGBOX", "FONT_ASCENT", "FONT_DESCENT"):
+            props[key] = [int(v) for v in value.split()]
+        elif key == "STARTCHAR":
+            encoding, bbx, rows = -1, None, []
+            for line in lines:
+                key, _, value = line.strip().partition(" ")
+                if key == "ENCODING":
+                    encoding = int(value.split()[0])
+                elif key == "BBX":
+                    bbx = [int(v) for v in value.split()]
+                elif key == "BITMAP":
+                    for line in lines:
+                        line = line.strip()
+                        if line == "ENDCHAR":
+                            break
+                        rows.append(line)
+                    break
+            if encoding >= 0 and bbx is not None:
+                glyphs[encoding] = (bbx, rows)
+
+    if "FONTBOUNDINGBOX" not in props:
+        raise ValueError("Plik BDF bez FONTBOUNDINGBOX")
+    font_w, font_h, font_x, font_y = props["FONTBOUNDINGBOX"]
+    ascent = props.get("FONT_ASCENT", [font_h + font_y])[0]
+    descent = props.get("FONT_DESCENT", [-font_y])[0]
+    if font_w > FONT_WIDTH or ascent + descent > FONT_HEIGHT:
+        raise ValueError(
+            f"Font {font_w}x{ascent + descent} nie mieści się w komórce "
+            f"{FONT_WIDTH}x{FONT_HEIGHT}"
+        )
+    baseline = (FONT_HEIGHT - ascent - descent) // 2 + ascent
+
+    cells = {}
+    for encoding, ((width, height, x, y), rows) in glyphs.items():
+        cell = np.zeros((FONT_HEIGHT, FONT_WIDTH), dtype=bool)
+        if height and width:
+            row_bytes = (width + 7) // 8
+            raw = bytes.fromhex("".join(r[: row_bytes * 2] for r in rows[:height]))
+            bitmap = np.frombuffer(raw, dtype=np.uint8).reshape(-1, row_bytes)
+            bits = np.unpackbits(bitmap, axis=1)[:, :width].astype(bool)
+            # Górny lewy róg glifu w komórce; to, co wystaje poza komórkę, jest obcinane
+            top = baseline - (y + height)
+            left = x - font_x
+            y0, x0 = max(top, 0), max(left, 0)
+            y1 = min(top + len(bits), FONT_HEIGHT)
+            x1 = min(left + width, FONT_WIDTH)
+            if y0 < y1 and x0 < x1:
+                cell[y0:y1, x0:x1] = bits[y0 - top : y1 - top, x0 - left : x1 - left]
+        cells[encoding] = cell
+    return cells
+
+
+def _select(lookup, fallback, codepage):
+    """
+    256 komórek: kod bajtu -> znak (codepage) -> glif z lookup; brak -> fallback
+    """
+    cells = np.zeros((GLYPHS, FONT_HEIGHT, FONT_WIDTH), dtype=bool)
+    for code in range(GLYPHS):
+        cell = None
+        if codepage is not None:
+            char = bytes([code]).decode(codepage, "replace")
+            cell = lookup(ord(char))
+        if cell is None:
+            cell = fallback(code)
+        if cell is not None:
+            cells[code] = cell
+    return cells
+
+
+def font_from_source(data, name="", codepage=None):
+    """
+    Zawartość pliku fontu (PSF1/PSF2, także .gz, BDF albo gotowy .raw) -> 4096 bajtów
+    """
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+
+    if data[:2] == PSF1_MAGIC or data[:4] == PSF2_MAGIC:
+        glyphs, mapping = parse_psf(data)
+        count = len(glyphs)
+        cells = _select(
+            lambda cp: glyphs[mapping[cp]] if mapping and cp in mapping else None,
+            lambda code: glyphs[code] if code < count else None,
+            codepage,
+        )
+    elif data.lstrip().startswith(b"STARTFONT"):
+        glyphs = parse_bdf(data.decode("latin-1"))
+        cells = _select(glyphs.get, glyphs.get, codepage)
+    elif len(data) == FONT_SIZE:
+        return bytes(data)  # już w formacie VRAM
+    else:
+        raise ValueError(f"Nieznany format fontu: {name or 'dane'} ({len(data)} B)")
+
+    return np.packbits(cells, axis=2).tobytes()
+
+
+def convert_font(path, codepage=None, cache_dir=FONT_CACHE_DIR, use_cache=True):
+    """
+    Font z pliku jako 4096 bajtów; wynik zapamiętywany pod hashem źródła i opcji
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    key = hashlib.sha256(
+        _CACHE_VERSION + b"\0" + (codepage or "").encode() + b"\0" + data
+    ).hexdigest()
+    cache_file = os.path.join(cache_dir, f"{key[:32]}.raw")
+
+    if use_cache:
+        try:
+            with open(cache_file, "rb") as f:
+                font = f.read()
+            if len(font) == FONT_SIZE:
+                return font
+        except OSError:
+            pass
+
+    font = font_from_source(data, path, codepage)
+    if use_cache:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(font)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass  # bez pamięci podręcznej
+    return font
+
+
+# --- zapis wyników ---
+
+
+def header_text(font, name):
+    """
+    Nagłówek C z tablicą fontu w układzie xxd -i (jak default8x16.h)
+    """
+    data = np.frombuffer(font, dtype=np.uint8)
+    lines = []
+    for start in range(0, len(data), HEADER_BYTES_PER_LINE):
+        chunk = data[start : start + HEADER_BYTES_PER_LINE]
+        lines.append("  " + ", ".join(f"0x{b:02x}" for b in chunk.tolist()))
+    return (
+        f"unsigned char {name}[] = {{\n"
+        + ",\n".join(lines)
+        + f"\n}};\nconst unsigned int {name}_len = {len(data)};\n"
+    )
+
+
+def header_name(path):
+    """
+    Nazwa tablicy z nazwy pliku nagłówka: default8x16.h -> default8x16_raw
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = re.sub(r"\W", "_", stem) + "_raw"
+    return "_" + name if name[0].isdigit() else name
+
+
+def write_header(path, font, name=None):
+    with open(path, "w") as f:
+        f.write(header_text(font, name or header_name(path)))
+
+
+def patch_vram(path, font, offset):
+    """
+    Wstawia font w obraz VRAM pod offset (plik nie istnieje - nowy obraz z zerami)
+    """
+    if os.path.exists(path):
+        vram = bytearray(read_vram(path))
+    else:
+        vram = bytearray(VRAM_SIZE)
+    if len(vram) < offset + len(font):
+        vram.extend(bytes(offset + len(font) - len(vram)))
+    vram[offset : offset + len(font)] = font
+    return write_vram(path, vram)
+
+
+def font_stream(font, offset):
+    """
+    Komendy SPI ładujące font pod offset
+    """
+    return CommandStream().set_addr(offset).write(font).to_bytes()
+
+
+# --- podgląd ---
+
+
+def glyph_bits(font):
+    """
+    Cały font naraz: 4096 bajtów -> (256, 16, 8) bool
+    """
+    rows = np.frombuffer(font, dtype=np.uint8).reshape(GLYPHS, FONT_HEIGHT, 1)
+    return np.unpackbits(rows, axis=2).astype(bool)
+
+
+def glyph_sheet(font, cols=SHEET_COLS, gap=1):
+    """
+    Wszystkie glify w siatce cols x (256 / cols) z odstępem gap pikseli -> 2D bool
+    """
+    bits = glyph_bits(font)
+    rows = GLYPHS // cols
+    padded = np.zeros((GLYPHS, FONT_HEIGHT + gap, FONT_WIDTH + gap), dtype=bool)
+    padded[:, :FONT_HEIGHT, :FONT_WIDTH] = bits
+    sheet = padded.reshape(rows, cols, FONT_HEIGHT + gap, FONT_WIDTH + gap)
+    return sheet.transpose(0, 2, 1, 3).reshape(
+        rows * (FONT_HEIGHT + gap), cols * (FONT_WIDTH + gap)
+    )
+
+
+def sheet_text(sheet, on="█", off=" ", half=False):
+    """
+    Bitmapa 2D -> linie tekstu; half=True - dwa wiersze pikseli na linię (▀ ▄ █)
+    """
+    if half:
+        if len(sheet) % 2:
+            sheet = np.vstack([sheet, np.zeros((1, sheet.shape[1]), dtype=bool)])
+        cells = _HALF_BLOCKS[sheet[0::2] * 2 + sheet[1::2]]
+    else:
+        cells = np.where(sheet, on, off)
+    return ["".join(row) for row in cells]
+
+
+def glyph_text(font, code, on="#", off="."):
+    """
+    Jeden glif jako 16 linii tekstu
+    """
+    return sheet_text(glyph_bits(font)[code], on, off)
+
+
+def save_sheet_png(font, path, scale=2, cols=SHEET_COLS):
+    """
+    Zapisuje podgląd wszystkich glifów (biały na czarnym, siatka co glif)
+    """
+    sheet = glyph_sheet(font, cols)
+    image = np.where(sheet, 255, 0).astype(np.uint8)
+    # Linie siatki w odstępach między glifami
+    image[FONT_HEIGHT :: FONT_HEIGHT + 1, :] = 64
+    image[:, FONT_WIDTH :: FONT_WIDTH + 1] = 64
+    image = np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
+    Image.fromarray(image, mode="L").save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Konwersja fontu PSF/BDF do formatu VRAM (256 x 8x16) i podgląd",
+        epilog="Przykład: python font_tool.py ter-216n.psf -o terminus.raw --show",
+    )
+    parser.add_argument("font", help="Font .psf / .psfu / .psf.gz / .bdf albo .raw")
+    parser.add_argument("--output", "-o", help="Zapisz surowy font (4096 B)")
+    parser.add_argument("--header", help="Zapisz nagłówek C (jak default8x16.h)")
+    parser.add_argument("--name", help="Nazwa tablicy w nagłówku (domyślnie z pliku)")
+    parser.add_argument(
+        "--vram", help="Wstaw font w obraz VRAM (.hex/.bin/.coe/.mem; brak - nowy)"
+    )
+    parser.add_argument(
+        "--stream", help="Zapisz komendy SPI ładujące font (np. dla fpga_emulator.py)"
+    )
+    parser.add_argument(
+        "-r",
+        "--resolution",
+        help="Rozdzielczość z timings/ wyznaczająca adres fontu (domyślnie wybrana)",
+    )
+    parser.add_argument(
+        "--codepage", help="Kody 0-255 jako znaki tej strony kodowej (np. cp437)"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Nie używaj pamięci podręcznej"
+    )
+    parser.add_argument("--show", action="store_true", help="Pokaż wszystkie glify")
+    parser.add_argument("--char", help="Pokaż jeden znak (np. A albo 0x41)")
+    parser.add_argument("--png", help="Zapisz podgląd wszystkich glifów jako PNG")
+    parser.add_argument(
+        "--scale", type=int, default=2, help="Powiększenie podglądu PNG (domyślnie 2)"
+    )
+    args = parser.parse_args()
+
+    try:
+        font = convert_font(args.font, args.codepage, use_cache=not args.no_cache)
+        offset = font_area_offset(args.resolution)
+    except (OSError, ValueError, LookupError) as e:
+        print(f"Błąd: {e}")
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(font)
+        print(f"Font zapisany do {args.output} ({len(font)} bajtów)")
+    if args.header:
+        write_header(args.header, font, args.name)
+        print(f"Nagłówek C zapisany do {args.header}")
+    if args.vram:
+        patch_vram(args.vram, font, offset)
+        print(f"Font wstawiony w {args.vram} od adresu {offset} (0x{offset:04X})")
+    if args.stream:
+        stream = font_stream(font, offset)
+        with open(args.stream, "wb") as f:
+            f.write(stream)
+        print(f"Komendy SPI zapisane do {args.stream} ({len(stream)} bajtów)")
+
+    if args.show:
+        print("\n".join(sheet_text(glyph_sheet(font), half=True)))
+    if args.char:
+        text = args.char
+        code = int(text, 0) if len(text) > 1 else ord(text)
+        if not 0 <= code < GLYPHS:
+            print(f"Błąd: kod znaku spoza 0-255: {text}")
+            sys.exit(1)
+        print("\n".join(glyph_text(font, code)))
+    if args.png:
+        save_sheet_png(font, args.png, args.scale)
+        print(f"Podgląd zapisany do {args.png}")
+
+
+if __name__ == "__main__":
+    main()
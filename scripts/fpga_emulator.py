@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Programowy emulator maszyny stanów SPI z main_switchable.v (bez płytki)
+
+Odtwarza stany IDLE / WRITE_AMOUNT / WRITE / SET_ADDR_H / SET_ADDR_L /
+READ_VCOUNTER1 / FILL_AMOUNT / FILL_VALUE / FILL razem z dziwactwami sprzętu:
+  - 0x02 zapisuje adres - 1 (rejestr 15-bit), a zapis najpierw zwiększa adres,
+  - długość 0 w komendzie zapisu i wypełnienia oznacza 4096 bajtów (licznik 12-bit
+    się zawija),
+  - wypełnienie trwa jeden takt clk160m na bajt, a bajty SPI odebrane w tym czasie
+    są gubione - te różne od 0x00 liczone są jako fill_collisions,
+  - zapisy pod adresy >= 24576 są gubione (VRAM ma 24 KB),
+  - vcounter stoi na 0, gdy tryb nie jest tekstowy ani graficzny (vga_timing_en = 0).
+
+Dane zapisu są kopiowane do VRAM całymi wycinkami, więc emulator przyjmuje
+miliony bajtów na sekundę. vcounter jest liczony z czasu wirtualnego: każdy bajt
+trwa 8 taktów SPI, a okres linii i ramki pochodzą z timings/*.vh.
+
+Emulator ma write()/flush()/close(), więc może zastąpić port szeregowy jako
+odbiornik strumienia komend (np. VramShadow.send).
+
+Użycie jako skrypt - odtworzenie strumienia i zapis VRAM (.bin, .hex, .coe, .mem):
+  python fpga_emulator.py strumien.bin vram.hex
+"""
+
+import sys
+import time
+
+from spi_protocol import (
+    ADDR_MASK,
+    CMD_FILL,
+    CMD_NOP,
+    CMD_READ_VCOUNTER,
+    CMD_SET_ADDR,
+    CMD_SET_MODE,
+    CMD_WRITE,
+    MODE_GRAPHICS,
+    MODE_TEXT,
+    VRAM_SIZE,
+)
+from vga_timing import load_timing
+from vram_image import write_vram
+
+SPI_CLOCK_HZ = 20_000_000  # spi_init() w pipico_controller.c
+VRAM_CLOCK_HZ = 160_000_000  # clk160m - zegar maszyny stanów i zapisów VRAM
+RESET_MODE = MODE_TEXT  # current_mode = 3'd1
+RESET_TX_BYTE = 0x23  # spi_tx_byte = 8'h23
+
+STATE_IDLE = 0
+STATE_WRITE_AMOUNT = 1
+STATE_WRITE = 2
+STATE_SET_ADDR_L = 3
+STATE_SET_ADDR_H = 4
+STATE_READ_VCOUNTER1 = 5
+STATE_FILL_AMOUNT = 6
+STATE_FILL_VALUE = 7
+STATE_FILL = 8
+
+
+class FpgaEmulator:
+    def __init__(
+        self,
+        timing=None,
+        spi_clock_hz=SPI_CLOCK_HZ,
+        vram=None,
+        vram_clock_hz=VRAM_CLOCK_HZ,
+    ):
+        if timing is None or isinstance(timing, str):
+            timing = load_timing(timing)
+        self.timing = timing
+        self.spi_clock_hz = spi_clock_hz
+        self.vram_clock_hz = vram_clock_hz
+        self.vram = bytearray(VRAM_SIZE)
+        if vram is not None:
+            self.vram[: len(vram)] = vram
+        self.reset()
+
+    def reset(self):
+        """
+        Stan po konfiguracji FPGA (VRAM zostaje bez zmian)
+        """
+        self.state = STATE_IDLE
+        self.addr = 0
+        self.remaining = 0
+        self.mode = RESET_MODE
+        self.tx_byte = RESET_TX_BYTE
+        self.vcounter_latch = 0
+        self.time = 0.0  # czas wirtualny w sekundach
+        self._timing_start = 0.0  # od kiedy liczniki VGA chodzą
+        self._fill_end = 0.0  # do kiedy trwa wypełnianie
+
+        self.bytes_in = 0
+        self.bytes_written = 0
+        self.bytes_dropped = 0
+        self.commands = {
+            "write": 0,
+            "set_addr": 0,
+            "set_mode": 0,
+            "read_vcounter": 0,
+            "fill": 0,
+        }
+        self.unknown_commands = 0
+        self.fill_collisions = 0
+        self.vcounter_reads = []
+
+    # --- model czasu i vcounter ---
+
+    def _timing_enabled(self):
+        return self.mode in (MODE_TEXT, MODE_GRAPHICS)
+
+    def advance(self, seconds):
+        """
+        Przesuwa czas wirtualny (np. przerwa między transferami)
+        """
+        self.time += seconds
+
+    @property
+    def vcounter(self):
+        if not self._timing_enabled():
+            return 0
+        lines = int((self.time - self._timing_start) / self.timing.line_time)
+        return lines % self.timing.whole_frame
+
+    # --- strumień SPI ---
+
+    def feed(self, data):
+        """
+        Przetwarza bajty z MOSI; zwraca liczbę przyjętych bajtów
+        """
+        self._run(memoryview(data).cast("B"), None)
+        return len(data)
+
+    def transfer(self, data):
+        """
+        Jak feed(), ale zwraca też bajty, które FPGA wystawia w tym czasie na MISO
+        """
+        miso = bytearray()
+        self._run(memoryview(data).cast("B"), miso)
+        return bytes(miso)
+
+    def _run(self, data, miso):
+        n = len(data)
+        self.bytes_in += n
+        byte_time = 8 / self.spi_clock_hz
+        commands = self.commands
+        state = self.state
+        addr = self.addr
+        i = 0
+        while i < n:
+            if state == STATE_WRITE:
+                count = min(self.remaining or 4096, n - i)
+                if miso is not None:
+                    miso += bytes([self.tx_byte]) * count
+                self.addr = addr
+                self._write(data[i : i + count])
+                addr = self.addr
+                self.remaining = (self.remaining - count) & 0xFFF
+                if self.remaining == 0:
+                    state = STATE_IDLE
+                i += count
+                continue
+
+            byte = data[i]
+            if miso is not None:
+                miso.append(self.tx_byte)
+            i += 1
+
+            if state == STATE_FILL:
+                # Bajt odebrany przed końcem wypełniania przepada
+                if self.time + i * byte_time < self._fill_end:
+                    if byte != CMD_NOP:
+                        self.fill_collisions += 1
+                    continue
+                state = STATE_IDLE
+
+            if state == STATE_IDLE:
+                code = byte & 0x0F
+                if code == CMD_WRITE:
+                    commands["write"] += 1
+                    self.remaining = (byte >> 4) << 8
+                    state = STATE_WRITE_AMOUNT
+                elif code == CMD_SET_ADDR:
+                    commands["set_addr"] += 1
+                    state = STATE_SET_ADDR_H
+                elif code == CMD_SET_MODE:
+                    commands["set_mode"] += 1
+                    self.time += i * byte_time
+                    self.set_mode((byte >> 4) & 0x07)
+                    self.time -= i * byte_time
+                elif code == CMD_READ_VCOUNTER:
+                    commands["read_vcounter"] += 1
+                    # vcounter w chwili odebrania tego bajtu
+                    self.time += i * byte_time
+                    self.vcounter_latch = self.vcounter
+                    self.time -= i * byte_time
+                    self.vcounter_reads.append(self.vcounter_latch)
+                    self.tx_byte = (self.vcounter_latch >> 8) & 0x0F
+                    state = STATE_READ_VCOUNTER1
+                elif code == CMD_FILL:
+                    commands["fill"] += 1
+                    self.remaining = (byte >> 4) << 8
+                    state = STATE_FILL_AMOUNT
+                elif byte != CMD_NOP:
+                    self.unknown_commands += 1
+            elif state == STATE_WRITE_AMOUNT:
+                self.remaining |= byte
+                state = STATE_WRITE
+            elif state == STATE_SET_ADDR_H:
+                addr = ((byte & 0x7F) << 8) | (addr & 0xFF)
+                state = STATE_SET_ADDR_L
+            elif state == STATE_SET_ADDR_L:
+                # Sprzęt zapisuje adres - 1, bo zapis najpierw go zwiększa
+                addr = (((addr & 0x7F00) | byte) - 1) & ADDR_MASK
+                state = STATE_IDLE
+            elif state == STATE_READ_VCOUNTER1:
+                self.tx_byte = self.vcounter_latch & 0xFF
+                state = STATE_IDLE
+            elif state == STATE_FILL_AMOUNT:
+                self.remaining |= byte
+                state = STATE_FILL_VALUE
+            elif state == STATE_FILL_VALUE:
+                count = self.remaining or 4096
+                self.addr = addr
+                self._write(bytes([byte]) * count)
+                addr = self.addr
+                self.remaining = 0
+                self._fill_end = self.time + i * byte_time + count / self.vram_clock_hz
+                state = STATE_FILL
+
+        self.state = state
+        self.addr = addr
+        self.time += n * byte_time
+
+    def _write(self, chunk):
+        """
+        Zapis kolejnych bajtów pod addr+1, addr+2, ... z zawijaniem 15-bit
+        """
+        count = len(chunk)
+        start = (self.addr + 1) & ADDR_MASK
+        self.addr = (self.addr + count) & ADDR_MASK
+        done = 0
+        while done < count:
+            part = min(count - done, ADDR_MASK + 1 - start)
+            end = min(start + part, VRAM_SIZE)
+            if start < end:
+                self.vram[start:end] = chunk[done : done + end - start]
+            self.bytes_written += max(end - start, 0)
+            self.bytes_dropped += part - max(end - start, 0)
+            done += part
+            start = 0
+
+    def set_mode(self, mode):
+        was_enabled = self._timing_enabled()
+        self.mode = mode
+        if self._timing_enabled() and not was_enabled:
+            self._timing_start = self.time
+
+    # --- interfejs portu szeregowego ---
+
+    def write(self, data):
+        return self.feed(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def next_write_addr(self):
+        """
+        Adres VRAM, pod który trafi następny zapisany bajt
+        """
+        return (self.addr + 1) & ADDR_MASK
+
+    def stats(self):
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_written": self.bytes_written,
+            "bytes_dropped": self.bytes_dropped,
+            "commands": dict(self.commands),
+            "unknown_commands": self.unknown_commands,
+            "fill_collisions": self.fill_collisions,
+            "mode": self.mode,
+            "virtual_time": self.time,
+        }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Użycie: python fpga_emulator.py strumien.bin [vram.bin]")
+        sys.exit(1)
+
+    with open(sys.argv[1], "rb") as f:
+        stream = f.read()
+
+    emu = FpgaEmulator()
+    start = time.perf_counter()
+    emu.feed(stream)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    rate = len(stream) / elapsed / 1e6
+    print(f"Strumień: {len(stream)} bajtów w {elapsed * 1000:.1f} ms ({rate:.1f} MB/s)")
+    for key, value in emu.stats().items():
+        print(f"  {key}: {value}")
+    if len(sys.argv) > 2:
+        write_vram(sys.argv[2], emu.vram)
+        print(f"VRAM zapisany do {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 # 180000
 #
+import numpy as np
+
+from pixel_pack import pack_pixels
+from vram_image import write_vram
+
 color_pallette = [
     # Czerwone
     0b000000,  # 00 - czarny
@@ -17,45 +22,19 @@ color_pallette = [
 ]
 
 
-#
-def push_colors(color1, color2, color3, color4, file):
-    byte1 = color1 << 2 | color2 >> 4
-    byte2 = color2 << 4 | color3 >> 2
-    byte3 = color3 << 6 | color4
-    byte1 = byte1 & 255
-    byte2 = byte2 & 255
-    byte3 = byte3 & 255
-
-    file.write(f"{byte1:02X}\n")
-    file.write(f"{byte2:02X}\n")
-    file.write(f"{byte3:02X}\n")
-
-    # Pełna sekwencja kolorów RRGGBB (6-bit)
-
-
-buf = []
-
-
-def push_color(color, file):
-    buf.append(color)
-    if len(buf) == 4:
-        push_colors(buf[0], buf[1], buf[2], buf[3], file)
-        buf.clear()
-
+# Pełna sekwencja kolorów RRGGBB (6-bit)
+address = np.arange(32768)
+v_pos = address // 200
+h_pos = address % 200
 
-with open("vram_init.hex", "w") as f:
-    for address in range(32768):
-        v_pos = address // 200
-        h_pos = address % 200
+# Wybierz kolor z sekwencji 10 kolorów
+color_values = np.array(color_pallette, dtype=np.uint8)[h_pos % 10]
 
-        # Wybierz kolor z sekwencji 10 kolorów
-        color_index = h_pos % 10
-        color_value = color_pallette[color_index]
+# Neguj co 10 linię (linie 9, 19, 29, ...)
+# color_values[v_pos % 10 == 9] ^= 0b111111  # Negacja bitów
 
-        # Neguj co 10 linię (linie 9, 19, 29, ...)
-        if v_pos % 10 == 9:
-            # color_value = 0b111111 ^ color_value  # Negacja bitów
-        push_color(color_value, f)
+# Cały obraz pakowany naraz 4 piksele -> 3 bajty (jak w push.py)
+packed = pack_pixels(color_values)
 
-    f.close()
-    print("Wygenerowano plik vram_init.hex")
+write_vram("vram_init.hex", packed)
+print("Wygenerowano plik vram_init.hex")
@@ -3,11 +3,20 @@
 Skrypt do generowania pliku z bajtami hex (jeden bajt na linie) z plików binarnych
 dla projektu VGA: tekst, kolory, font i paleta
 Obsługiwane rozdzielczości: 1440x900, 1024x768, 800x600
+
+Obok pliku wyjściowego trzymany jest manifest (.vram_manifest.json) z hashami
+wejść i parametrami. Jeśli nic się nie zmieniło, generowanie jest pomijane, a plik
+identyczny bajt w bajt nie jest nadpisywany - ISE nie przebudowuje wtedy bitstreamu.
 """
 
 import sys
 import os
 import argparse
+import hashlib
+import json
+
+import profiling
+from vram_image import FORMATS, encode_vram
 
 # Definicje rozdzielczości (szerokość_px, wysokość_px, szerokość_znaków, wysokość_znaków)
 # Znaki mają rozmiar 8x16 pikseli
@@ -22,6 +31,39 @@ FONT_SIZE = 4096      # 256 znaków * 16 bajtów
 PALETTE_SIZE = 16     # 16 kolorów * 1 bajt
 DEFAULT_TOTAL_SIZE = 24576  # Domyślny rozmiar z paddingiem
 
+MANIFEST_NAME = ".vram_manifest.json"
+
+
+def file_digest(filename):
+    """
+    sha256 zawartości pliku albo None, jeśli plik nie istnieje
+    """
+    if not os.path.exists(filename):
+        return None
+    with open(filename, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def manifest_path(output_filename):
+    return os.path.join(os.path.dirname(os.path.abspath(output_filename)), MANIFEST_NAME)
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"OSTRZEŻENIE: Nie można odczytać manifestu {path}, generuję od nowa")
+        return {}
+
+
+def save_manifest(path, manifest):
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
 
 def read_binary_file(filename, default_size=None, default_value=0):
     """
@@ -40,32 +82,62 @@ def read_binary_file(filename, default_size=None, default_value=0):
             return bytearray()
 
 
-def generate_hex_file(output_filename, text_file, color_file, font_file, palette_file, resolution="1440x900", total_size=None):
+def generate_hex_file(output_filename, text_file, color_file, font_file, palette_file, resolution="1440x900", total_size=None, use_manifest=True, force=False):
     """
-    Generuje kompletny plik z bajtami hex (jeden bajt na linie) z podanych plików binarnych
+    Generuje kompletny plik z bajtami hex (jeden bajt na linie) z podanych plików binarnych.
+    Zwraca True, jeśli plik został zapisany, False - jeśli był aktualny.
     """
     
     # Pobierz parametry rozdzielczości
     if resolution not in RESOLUTIONS:
         print(f"Nieznana rozdzielczość: {resolution}, używam 1440x900")
         resolution = "1440x900"
+
+    # Format z rozszerzenia, domyślnie hex (jeden bajt na linie)
+    ext = os.path.splitext(output_filename)[1].lower().lstrip(".")
+    output_format = ext if ext in FORMATS else "hex"
+
+    # Manifest: hashe wejść i parametry poprzedniego generowania
+    entry = {
+        "params": {"resolution": resolution, "total_size": total_size or DEFAULT_TOTAL_SIZE, "format": output_format},
+        "inputs": {
+            "text": file_digest(text_file),
+            "colors": file_digest(color_file),
+            "font": file_digest(font_file),
+            "palette": file_digest(palette_file),
+        },
+    }
+    manifest_file = manifest_path(output_filename)
+    manifest = load_manifest(manifest_file) if use_manifest else {}
+    manifest_key = os.path.basename(output_filename)
+    previous = manifest.get(manifest_key)
+    if (
+        not force
+        and previous is not None
+        and previous.get("params") == entry["params"]
+        and previous.get("inputs") == entry["inputs"]
+        and previous.get("output") == file_digest(output_filename)
+    ):
+        print(f"{output_filename}: wejścia bez zmian, pomijam")
+        return False
     
     px_w, px_h, text_cols, text_rows = RESOLUTIONS[resolution]
     text_area_size = text_cols * text_rows
     
     print(f"Rozdzielczość: {resolution} ({text_cols}x{text_rows} znaków = {text_area_size} bajtów tekstu/kolorów)")
 
-    # 1. Tekst (text_area_size bajtów)
-    text_data = read_binary_file(text_file, text_area_size, 0x20)  # Domyślnie spacje
+    with profiling.span("hex.read"):
+        # 1. Tekst (text_area_size bajtów)
+        text_data = read_binary_file(text_file, text_area_size, 0x20)  # Domyślnie spacje
 
-    # 2. Kolory (text_area_size bajtów)
-    color_data = read_binary_file(color_file, text_area_size, 0xF0)
+        # 2. Kolory (text_area_size bajtów)
+        color_data = read_binary_file(color_file, text_area_size, 0xF0)
 
-    # 3. Font (4096 bajtów)
-    font_data = read_binary_file(font_file, FONT_SIZE, 0x00)
+        # 3. Font (4096 bajtów)
+        font_data = read_binary_file(font_file, FONT_SIZE, 0x00)
 
-    # 4. Paleta kolorów (16 bajtów)
-    palette_data = read_binary_file(palette_file, PALETTE_SIZE, 0x00)
+        # 4. Paleta kolorów (16 bajtów)
+        palette_data = read_binary_file(palette_file, PALETTE_SIZE, 0x00)
 
     # Oblicz całkowity rozmiar bez paddingu
     data_size = text_area_size * 2 + FONT_SIZE + PALETTE_SIZE
@@ -119,12 +191,25 @@ def generate_hex_file(output_filename, text_file, color_file, font_file, palette
         print(f"Dodano {padding_size} bajtów wypełnienia zerami")
 
     # Połącz wszystkie dane w kolejności jak w specyfikacji
-    complete_data = text_data + color_data + font_data + palette_data + padding_data
+    complete_data = b"".join([text_data, color_data, font_data, palette_data, padding_data])
+
+    # Zapisz całość jednym write(), ale nie ruszaj pliku identycznego bajt w bajt
+    with profiling.span("hex.encode"):
+        content = encode_vram(complete_data, output_format)
+        digest = hashlib.sha256(content).hexdigest()
+    written = force or file_digest(output_filename) != digest
+    if written:
+        with profiling.span("hex.write"), open(output_filename, "wb") as f:
+            f.write(content)
+        profiling.count("bytes_written", len(content))
+
+    if use_manifest:
+        manifest[manifest_key] = dict(entry, output=digest)
+        save_manifest(manifest_file, manifest)
 
-    # Zapisz jako plik z jednym bajtem hex na linie
-    with open(output_filename, "w") as f:
-        for byte in complete_data:
-            f.write(f"{byte:02X}\n")
+    if not written:
+        print(f"\n{output_filename}: zawartość identyczna, plik nie został nadpisany")
+        return False
 
     print(f"\nWygenerowano plik: {output_filename}")
     print(f"Rozmiar danych: {len(complete_data)} bajtów")
@@ -134,6 +219,36 @@ def generate_hex_file(output_filename, text_file, color_file, font_file, palette
     print(f" - Paleta: {len(palette_data)} bajtów (offset 0x{text_area_size*2 + FONT_SIZE:04X})")
     if padding_size > 0:
         print(f" - Wypełnienie: {padding_size} bajtów")
+    return True
+
+
+def generate_all(output_pattern, text_pattern, color_pattern, font_pattern, palette_pattern, total_size=None, use_manifest=True, force=False):
+    """
+    Generuje pliki dla wszystkich rozdzielczości z RESOLUTIONS naraz.
+    W nazwach można użyć {res} (np. 1440x900) oraz {width} i {height} (np. text_{width}_{height}.bin
+    jak zapisuje text_editor.py). Przebudowywane są tylko pliki ze zmienionymi wejściami.
+    """
+    rebuilt = []
+    for resolution, (px_w, px_h, _, _) in RESOLUTIONS.items():
+        names = {"res": resolution, "width": px_w, "height": px_h}
+        output = output_pattern.format(**names)
+        if output == output_pattern:
+            raise ValueError("Nazwa wyjścia musi zawierać {res} albo {width}/{height}")
+        print(f"=== {resolution} ===")
+        if generate_hex_file(
+            output,
+            text_pattern.format(**names),
+            color_pattern.format(**names),
+            font_pattern.format(**names),
+            palette_pattern.format(**names),
+            resolution,
+            total_size,
+            use_manifest,
+            force,
+        ):
+            rebuilt.append(output)
+    print(f"\nPrzebudowano {len(rebuilt)} z {len(RESOLUTIONS)} plików")
+    return rebuilt
 
 
 def main():
@@ -149,14 +264,17 @@ Dostępne rozdzielczości:
 Struktura pliku wyjściowego:
   [tekst] [kolory] [font 4096B] [paleta 16B] [padding opcjonalny]
 
+Format wyjścia wynika z rozszerzenia: .hex ($readmemh), .bin, .coe, .mem
+
 Przykłady:
   %(prog)s output.hex text.bin colors.bin font.bin palette.bin
   %(prog)s -r 1024x768 output.hex text.bin colors.bin font.bin palette.bin
   %(prog)s -r 800x600 --total-size 16384 output.hex text.bin colors.bin font.bin palette.bin
+  %(prog)s --all output_{res}.hex text_{width}_{height}.bin colors_{width}_{height}.bin font.bin palette.bin
 """
     )
     
-    parser.add_argument("output", help="Plik wyjściowy .hex")
+    parser.add_argument("output", help="Plik wyjściowy (.hex, .bin, .coe, .mem)")
     parser.add_argument("text", help="Plik binarny z tekstem")
     parser.add_argument("colors", help="Plik binarny z kolorami")
     parser.add_argument("font", help="Plik binarny z fontem (4096 bajtów)")
@@ -174,13 +292,30 @@ Przykłady:
         default=DEFAULT_TOTAL_SIZE,
         help=f"Całkowity rozmiar pliku wyjściowego z paddingiem (domyślnie: {DEFAULT_TOTAL_SIZE})"
     )
+    parser.add_argument(
+        "-a", "--all",
+        action="store_true",
+        help="Generuj dla wszystkich rozdzielczości (nazwy plików z {res} / {width} / {height})"
+    )
+    parser.add_argument(
+        "-f", "--force",
+        action="store_true",
+        help="Generuj i zapisz nawet, jeśli wejścia się nie zmieniły"
+    )
+    parser.add_argument(
+        "--no-manifest",
+        action="store_true",
+        help=f"Nie używaj manifestu {MANIFEST_NAME}"
+    )
     parser.add_argument(
         "-l", "--list",
         action="store_true",
         help="Wyświetl dostępne rozdzielczości i wyjdź"
     )
+    profiling.add_profile_argument(parser)
     
     args = parser.parse_args()
+    profiling.setup(args)
     
     if args.list:
         print("Dostępne rozdzielczości:")
@@ -194,15 +329,33 @@ Przykłady:
             print()
         sys.exit(0)
 
-    generate_hex_file(
-        args.output, 
-        args.text, 
-        args.colors, 
-        args.font, 
-        args.palette, 
-        args.resolution,
-        args.total_size
-    )
+    try:
+        if args.all:
+            generate_all(
+                args.output,
+                args.text,
+                args.colors,
+                args.font,
+                args.palette,
+                args.total_size,
+                use_manifest=not args.no_manifest,
+                force=args.force,
+            )
+            return
+
+        generate_hex_file(
+            args.output, 
+            args.text, 
+            args.colors, 
+            args.font, 
+            args.palette, 
+            args.resolution,
+            args.total_size,
+            use_manifest=not args.no_manifest,
+            force=args.force,
+        )
+    finally:
+        profiling.finish(args)
 
 
 if __name__ == "__main__":
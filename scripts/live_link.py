@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Podgląd na żywo: wysyłanie zmian ekranu tekstowego do FPGA w trakcie edycji
+
+LiveLink trzyma referencje do buforów znaków i atrybutów (układ jak w VRAM:
+znaki od adresu 0, atrybuty od cols*rows) i na sygnał notify() wysyła tylko
+zmienione komórki jako pary 0x02 ustaw adres + 0xH1 zapis (VramShadow).
+
+Wysyłka działa w osobnym wątku, więc interfejs nigdy nie czeka na port.
+Zmiany z jednej klatki obrazu (np. wklejanie, czyszczenie ekranu) są łączone
+w jeden zapis - najwyżej jeden flush na okres odświeżania monitora.
+"""
+
+import threading
+import time
+
+import serial
+
+import profiling
+from spi_protocol import MODE_TEXT, set_mode_cmd
+from vga_timing import load_timing
+from vram_shadow import VramShadow
+
+DEFAULT_FRAME_TIME = 1 / 60
+
+
+class LiveLink:
+    """
+    port - nazwa portu albo już otwarty obiekt z write(); przekazany obiekt nie jest zamykany
+    """
+
+    def __init__(self, port, chars, attrs, baudrate=1000000, frame_time=None):
+        self.own_port = isinstance(port, str)
+        self.ser = serial.Serial(port, baudrate, timeout=1) if self.own_port else port
+        self.chars = chars
+        self.attrs = attrs
+        self.frame_time = frame_time or DEFAULT_FRAME_TIME
+        # Zawartość VRAM nieznana - pierwszy flush wysyła cały ekran
+        self.shadow = VramShadow()
+        self.mode_sent = False
+
+        self.flushes = 0
+        self.error = None
+        self._last_flush = 0.0
+        self._stop = False
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="live-link", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_resolution(cls, port, chars, attrs, resolution, baudrate=1000000):
+        """
+        LiveLink z okresem klatki z timings/<resolution>.vh
+        """
+        try:
+            frame_time = load_timing(resolution).frame_time
+        except (OSError, ValueError):
+            frame_time = DEFAULT_FRAME_TIME
+        return cls(port, chars, attrs, baudrate, frame_time)
+
+    def notify(self):
+        """
+        Bufory się zmieniły - wyślij różnice przy najbliższej klatce (nie blokuje)
+        """
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop:
+            self._wake.wait()
+            # Zmiany, które przyjdą przed końcem klatki, trafią do tego samego flusha
+            delay = self._last_flush + self.frame_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.error = e
+                break
+
+    def flush(self):
+        """
+        Wysyła zmiany od ostatniego flusha; zwraca liczbę wysłanych bajtów
+        """
+        stream = self.shadow.update(bytes(self.chars) + bytes(self.attrs))
+        if not self.mode_sent:
+            stream = set_mode_cmd(MODE_TEXT) + stream
+            self.mode_sent = True
+        if stream:
+            with profiling.span("editor.live.tx"):
+                self.ser.write(stream)
+            profiling.count(profiling.TX_BYTES, len(stream))
+            self.flushes += 1
+        self._last_flush = time.monotonic()
+        return len(stream)
+
+    def close(self):
+        """
+        Zatrzymuje wątek, wysyła ostatnie zmiany i zamyka własny port
+        """
+        self._stop = True
+        self._wake.set()
+        self._thread.join()
+        try:
+            if self.error is None:
+                self.flush()
+        finally:
+            if self.own_port:
+                self.ser.close()
+
+    def stats(self):
+        stats = self.shadow.stats()
+        stats["flushes"] = self.flushes
+        stats["error"] = str(self.error) if self.error else None
+        return stats
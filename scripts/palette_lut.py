@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Wspólny kwantyzator palety oparty na tablicy LUT (RGB -> indeks palety)
+
+Tablica ma 2^24 wpisów (po jednym na każdy kolor 24-bit) i jest budowana raz
+dla danej palety, a potem współdzielona przez wszystkie wywołania. Wpisy są
+liczone leniwie: przy każdej kwantyzacji brakujące kolory obrazu wyznaczane są
+jednym wektorowym przebiegiem, więc kolejne klatki trafiają już w gotową tablicę.
+
+Wynik jest identyczny z pętlami w push.py i asciiart.py: kwadrat odległości RGB,
+a przy remisie wygrywa kolor o najniższym indeksie.
+
+Metryka "lab" (LabLUT) wybiera kolor najbliższy percepcyjnie - odległość
+w przestrzeni CIELAB. Tablica ma 64^3 komórek (6 bitów na kanał), jest budowana
+raz na paletę, zapisywana w katalogu LUT_CACHE_DIR i wczytywana przez mmap,
+więc kwantyzacja kosztuje tyle samo co dla "rgb".
+"""
+
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+LUT_SIZE = 1 << 24
+LUT_EMPTY = 0xFF  # znacznik niepoliczonego wpisu (palety mają < 255 kolorów)
+KEY_WEIGHTS = np.array([1 << 16, 1 << 8, 1], dtype=np.int64)  # RGB -> klucz 24-bit
+
+METRICS = ("rgb", "lab")
+LAB_BITS = 6  # bitów na kanał w tablicy CIELAB (64^3 = 256 KB)
+LUT_CACHE_DIR = os.environ.get(
+    "FPGA_LUT_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".lut_cache"),
+)
+_LAB_CHUNK = 1 << 16  # komórek na jedno mnożenie macierzy przy budowie
+
+# sRGB (D65) -> XYZ i biel odniesienia
+_SRGB_TO_XYZ = np.array(
+    [
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ]
+)
+_WHITE_D65 = np.array([0.95047, 1.0, 1.08883])
+
+
+def palette_6bit_to_rgb(palette):
+    """
+    Zamienia listę kolorów 6-bit (RRGGBB) na krotki RGB 8-bit (0, 85, 170, 255)
+    """
+    return [
+        (((c >> 4) & 0x03) * 85, ((c >> 2) & 0x03) * 85, (c & 0x03) * 85)
+        for c in palette
+    ]
+
+
+class PaletteLUT:
+    """
+    Tablica RGB -> indeks dla jednej palety. Nie tworzyć bezpośrednio,
+    tylko przez get_lut(), żeby tablica była współdzielona.
+    """
+
+    def __init__(self, palette_rgb):
+        self.palette = np.array(palette_rgb, dtype=np.int64).reshape(-1, 3)
+        if len(self.palette) >= LUT_EMPTY:
+            raise ValueError(f"Paleta ma za dużo kolorów: {len(self.palette)}")
+        self.palette_u8 = self.palette.astype(np.uint8)
+        # |p|^2 - stała część odległości, reszta to -2 * p·x
+        self._norms = (self.palette**2).sum(axis=1)
+        self.table = np.full(LUT_SIZE, LUT_EMPTY, dtype=np.uint8)
+
+    def nearest(self, rgb):
+        """
+        Dokładne wyszukiwanie najbliższego koloru dla tablicy (N, 3) liczb całkowitych,
+        także spoza zakresu 0-255 (np. po rozpraszaniu błędu bez przycinania)
+        """
+        rgb = np.asarray(rgb, dtype=np.int64).reshape(-1, 3)
+        # |x - p|^2 = |x|^2 + |p|^2 - 2 x·p, a |x|^2 nie zmienia argmin
+        dist = self._norms[None, :] - 2 * (rgb @ self.palette.T)
+        return dist.argmin(axis=1).astype(np.uint8)
+
+    def quantize(self, img):
+        """
+        Kwantyzuje obraz (..., 3) do indeksów palety (...,) jednym przebiegiem.
+        Wartości zmiennoprzecinkowe są zaokrąglane jak round() w Pythonie.
+        """
+        img = np.asarray(img)
+        if img.dtype.kind == "f":
+            img = np.rint(img)
+        shape = img.shape[:-1]
+        rgb = img.reshape(-1, 3)
+
+        if rgb.dtype != np.uint8 and len(rgb) and (rgb.min() < 0 or rgb.max() > 255):
+            rgb = rgb.astype(np.int64)
+            in_range = ((rgb >= 0) & (rgb <= 255)).all(axis=1)
+            out = np.empty(len(rgb), dtype=np.uint8)
+            out[in_range] = self._lookup(rgb[in_range])
+            out[~in_range] = self.nearest(rgb[~in_range])
+            return out.reshape(shape)
+
+        return self._lookup(rgb).reshape(shape)
+
+    def index(self, r, g, b):
+        """
+        Kwantyzacja pojedynczego piksela (liczby całkowite) - dla pętli sekwencyjnych
+        """
+        if 0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255:
+            key = (r << 16) | (g << 8) | b
+            idx = self.table[key]
+            if idx == LUT_EMPTY:
+                idx = self.table[key] = self.nearest([(r, g, b)])[0]
+            return int(idx)
+        return int(self.nearest([(r, g, b)])[0])
+
+    def _lookup(self, rgb):
+        keys = rgb.astype(np.int64) @ KEY_WEIGHTS
+        idx = self.table[keys]
+        missing = idx == LUT_EMPTY
+        if missing.any():
+            new_keys = np.unique(keys[missing])
+            new_rgb = np.stack(
+                [(new_keys >> 16) & 0xFF, (new_keys >> 8) & 0xFF, new_keys & 0xFF],
+                axis=1,
+            )
+            self.table[new_keys] = self.nearest(new_rgb)
+            idx = self.table[keys]
+        return idx
+
+    def to_rgb(self, indices):
+        """
+        Zamienia tablicę indeksów z powrotem na kolory RGB (uint8)
+        """
+        return self.palette_u8[np.asarray(indices)]
+
+
+def rgb_to_lab(rgb):
+    """
+    Kolory sRGB 8-bit (..., 3) -> CIELAB (..., 3), biel D65
+    """
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ _SRGB_TO_XYZ.T / _WHITE_D65
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack(
+        [
+            116 * f[..., 1] - 16,
+            500 * (f[..., 0] - f[..., 1]),
+            200 * (f[..., 1] - f[..., 2]),
+        ],
+        axis=-1,
+    )
+
+
+class LabLUT:
+    """
+    Tablica RGB -> indeks palety według odległości w CIELAB, o tym samym
+    interfejsie co PaletteLUT. Kolor wyznacza środek komórki 2^LAB_BITS na kanał,
+    a wartości spoza 0-255 są przycinane. Tworzyć przez get_lut(..., "lab").
+    """
+
+    def __init__(self, palette_rgb, bits=LAB_BITS, cache_dir=LUT_CACHE_DIR):
+        self.palette = np.array(palette_rgb, dtype=np.int64).reshape(-1, 3)
+        if len(self.palette) > 256:
+            raise ValueError(f"Paleta ma za dużo kolorów: {len(self.palette)}")
+        self.palette_u8 = self.palette.astype(np.uint8)
+        self.palette_lab = rgb_to_lab(self.palette)
+        self._norms = (self.palette_lab**2).sum(axis=1)
+        self.bits = bits
+        self.shift = 8 - bits
+        self.table = self._load(cache_dir)
+        self._cells = memoryview(self.table)  # szybki odczyt pojedynczych wpisów
+
+    def _cache_path(self, cache_dir):
+        digest = hashlib.sha256(self.palette_u8.tobytes()).hexdigest()[:16]
+        return os.path.join(cache_dir, f"lab{self.bits}_{digest}.lut")
+
+    def _load(self, cache_dir):
+        """
+        Tablica z pliku (mmap), a jeśli go nie ma - zbudowana i zapisana
+        """
+        size = 1 << (3 * self.bits)
+        path = self._cache_path(cache_dir)
+        try:
+            if os.path.getsize(path) == size:
+                return np.memmap(path, dtype=np.uint8, mode="r").view(np.ndarray)
+        except OSError:
+            pass
+
+        table = self._build()
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Zapis pod tymczasową nazwą, żeby równoległe procesy nie czytały połowy
+            fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(table.tobytes())
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # brak zapisu do katalogu - tablica zostaje tylko w pamięci
+        return table
+
+    def _build(self):
+        levels = np.arange(1 << self.bits)
+        centers = (levels << self.shift) + ((1 << self.shift) - 1) / 2
+        grid = np.stack(np.meshgrid(centers, centers, centers, indexing="ij"), axis=-1)
+        grid = grid.reshape(-1, 3)
+        table = np.empty(len(grid), dtype=np.uint8)
+        for start in range(0, len(grid), _LAB_CHUNK):
+            table[start : start + _LAB_CHUNK] = self._nearest_lab(
+                rgb_to_lab(grid[start : start + _LAB_CHUNK])
+            )
+        return table
+
+    def _nearest_lab(self, lab):
+        dist = self._norms[None, :] - 2 * (lab @ self.palette_lab.T)
+        return dist.argmin(axis=1).astype(np.uint8)
+
+    def nearest(self, rgb):
+        """
+        Dokładne wyszukiwanie (bez komórek tablicy) dla tablicy (N, 3)
+        """
+        rgb = np.clip(np.asarray(rgb, dtype=np.float64).reshape(-1, 3), 0, 255)
+        return self._nearest_lab(rgb_to_lab(rgb))
+
+    def quantize(self, img):
+        """
+        Kwantyzuje obraz (..., 3) do indeksów palety (...,) jednym przebiegiem
+        """
+        img = np.asarray(img)
+        if img.dtype.kind == "f":
+            img = np.rint(img)
+        if img.dtype != np.uint8:
+            img = np.clip(img, 0, 255).astype(np.int64)
+        cells = img >> self.shift if self.shift else img
+        keys = (
+            (cells[..., 0].astype(np.int64) << (2 * self.bits))
+            | (cells[..., 1].astype(np.int64) << self.bits)
+            | cells[..., 2]
+        )
+        return self.table[keys]
+
+    def index(self, r, g, b):
+        """
+        Kwantyzacja pojedynczego piksela (liczby całkowite) - dla pętli sekwencyjnych
+        """
+        if not (0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255):
+            r, g, b = (min(max(v, 0), 255) for v in (r, g, b))
+        shift, bits = self.shift, self.bits
+        key = ((r >> shift) << (2 * bits)) | ((g >> shift) << bits) | (b >> shift)
+        return self._cells[key]
+
+    def to_rgb(self, indices):
+        """
+        Zamienia tablicę indeksów z powrotem na kolory RGB (uint8)
+        """
+        return self.palette_u8[np.asarray(indices)]
+
+
+@lru_cache(maxsize=None)
+def _lut_for(palette_key, metric):
+    if metric == "rgb":
+        return PaletteLUT(palette_key)
+    if metric == "lab":
+        return LabLUT(palette_key)
+    raise ValueError(f"Nieznana metryka: {metric} (dostępne: {', '.join(METRICS)})")
+
+
+def get_lut(palette_rgb, metric="rgb"):
+    """
+    Zwraca współdzieloną tablicę LUT dla palety (lista krotek RGB);
+    metric - "rgb" (kwadrat odległości RGB) albo "lab" (CIELAB)
+    """
+    return _lut_for(tuple(tuple(int(v) for v in c) for c in palette_rgb), metric)
+
+
+@lru_cache(maxsize=None)
+def _lut_for_6bit(palette_key, metric):
+    return get_lut(palette_6bit_to_rgb(palette_key), metric)
+
+
+def get_lut_6bit(palette, metric="rgb"):
+    """
+    Jak get_lut(), ale dla palety zapisanej jako kolory 6-bit (PALETTE_6BIT)
+    """
+    return _lut_for_6bit(tuple(palette), metric)
+
+
+def quantize(img, palette_rgb, metric="rgb"):
+    """
+    Skrót: kwantyzuje obraz (..., 3) do indeksów podanej palety RGB
+    """
+    return get_lut(palette_rgb, metric).quantize(img)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Pakowanie pikseli 6-bit trybu graficznego: 4 piksele -> 3 bajty
+
+Układ bitów taki sam jak rozpakowuje graphic_mode_6bitcolor.v:
+  bajt 0 = p0[5:0] p1[5:4]
+  bajt 1 = p1[3:0] p2[5:2]
+  bajt 2 = p2[1:0] p3[5:0]
+"""
+
+import numpy as np
+
+GRAPHIC_WIDTH = 200
+GRAPHIC_HEIGHT = 150
+FRAME_BYTES = GRAPHIC_WIDTH * GRAPHIC_HEIGHT * 3 // 4  # 22500
+
+
+def pack_pixels(indices):
+    """
+    Pakuje tablicę indeksów 6-bit (dowolny kształt, np. (H, W)) do bajtów.
+    Jeśli liczba pikseli nie dzieli się przez 4, ostatnia grupa jest dopełniana zerami.
+    """
+    pixels = np.asarray(indices, dtype=np.uint8).ravel()
+    if len(pixels) % 4:
+        pixels = np.concatenate([pixels, np.zeros(4 - len(pixels) % 4, np.uint8)])
+    p0, p1, p2, p3 = (pixels.reshape(-1, 4) & 0x3F).T
+
+    packed = np.empty((len(p0), 3), dtype=np.uint8)
+    packed[:, 0] = (p0 << 2) | (p1 >> 4)
+    packed[:, 1] = (p1 << 4) | (p2 >> 2)
+    packed[:, 2] = (p2 << 6) | p3
+    return packed.tobytes()
+
+
+def unpack_pixels(data, count=None):
+    """
+    Odwrotność pack_pixels: bajty -> tablica indeksów 6-bit (uint8)
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    raw = raw[: len(raw) - len(raw) % 3]
+    b0, b1, b2 = raw.reshape(-1, 3).T
+
+    pixels = np.empty((len(b0), 4), dtype=np.uint8)
+    pixels[:, 0] = b0 >> 2
+    pixels[:, 1] = ((b0 & 0x03) << 4) | (b1 >> 4)
+    pixels[:, 2] = ((b1 & 0x0F) << 2) | (b2 >> 6)
+    pixels[:, 3] = b2 & 0x3F
+    pixels = pixels.ravel()
+    return pixels if count is None else pixels[:count]
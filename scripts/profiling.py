@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Lekkie pomiary etapów skryptów hosta (--profile, --profile-json PLIK)
+
+  with span("push.dither"):    # czas etapu (sumowany przy wielu wywołaniach)
+      ...
+  count("tx_bytes", len(data))  # liczniki
+
+Bajty wysłane do urządzenia liczone są w liczniku TX_BYTES, a czas wysyłki
+w etapach z przyrostkiem ".tx" - z nich liczona jest efektywna prędkość łącza.
+Szczyt pamięci pochodzi z tracemalloc (włączany razem z profilowaniem).
+
+Dopóki enable() nie zostało wywołane, span() zwraca wspólny pusty obiekt,
+a count() kończy się na jednym sprawdzeniu flagi - narzut jest pomijalny.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+TX_BYTES = "tx_bytes"
+TX_SUFFIX = ".tx"
+
+_enabled = False
+_started = 0.0
+_stages = {}  # nazwa -> [liczba wywołań, suma s, maks. s]
+_counters = {}
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stage = _stages.get(self.name)
+        if stage is None:
+            _stages[self.name] = [1, elapsed, elapsed]
+        else:
+            stage[0] += 1
+            stage[1] += elapsed
+            if elapsed > stage[2]:
+                stage[2] = elapsed
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(trace_memory=True):
+    global _enabled, _started
+    _enabled = True
+    _started = time.perf_counter()
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def span(name):
+    """
+    Context manager mierzący czas etapu name
+    """
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def count(name, value=1):
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def report():
+    """
+    Wyniki jako słownik (ten sam układ trafia do JSON)
+    """
+    stages = {
+        name: {
+            "count": n,
+            "total_ms": total * 1000,
+            "mean_ms": total / n * 1000,
+            "max_ms": worst * 1000,
+        }
+        for name, (n, total, worst) in _stages.items()
+    }
+    tx_time = sum(
+        total for name, (_, total, _) in _stages.items() if name.endswith(TX_SUFFIX)
+    )
+    tx_bytes = _counters.get(TX_BYTES, 0)
+    result = {
+        "wall_ms": (time.perf_counter() - _started) * 1000 if _enabled else 0.0,
+        "stages": stages,
+        "counters": dict(_counters),
+        "tx_bytes": tx_bytes,
+        "tx_rate": tx_bytes / tx_time if tx_time > 0 else None,
+        "peak_memory": None,
+    }
+    if tracemalloc.is_tracing():
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+    return result
+
+
+def format_report(result):
+    lines = [
+        f"{'etap':32s} {'wywołań':>8s} {'suma ms':>10s} "
+        f"{'śr. ms':>9s} {'maks. ms':>9s}"
+    ]
+    for name, s in result["stages"].items():
+        lines.append(
+            f"{name:32s} {s['count']:8d} {s['total_ms']:10.2f} "
+            f"{s['mean_ms']:9.3f} {s['max_ms']:9.3f}"
+        )
+    for name, value in result["counters"].items():
+        lines.append(f"{name}: {value}")
+    if result["tx_rate"] is not None:
+        lines.append(
+            f"Wysłano {result['tx_bytes']} bajtów, "
+            f"efektywnie {result['tx_rate'] / 1000:.1f} kB/s"
+        )
+    if result["peak_memory"] is not None:
+        peak = result["peak_memory"] / 1e6
+        lines.append(f"Szczyt pamięci (tracemalloc): {peak:.2f} MB")
+    lines.append(f"Całkowity czas: {result['wall_ms']:.1f} ms")
+    return "\n".join(lines)
+
+
+def add_profile_argument(parser, help_text=None, json_help=None, metavar="PLIK"):
+    """
+    --profile (raport na stderr) i --profile-json PLIK; flaga bez wartości,
+    więc nie zabiera argumentów pozycyjnych, które po niej następują
+    """
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=help_text or "Zmierz etapy i pokaż raport na stderr",
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar=metavar,
+        default=None,
+        help=json_help or "Zmierz etapy i zapisz raport do pliku JSON",
+    )
+
+
+def setup(args):
+    """
+    Włącza pomiary, jeśli podano --profile albo --profile-json
+    """
+    if args.profile or args.profile_json:
+        enable()
+
+
+def finish(args):
+    """
+    Wypisuje raport (--profile) i/lub zapisuje go jako JSON (--profile-json)
+    """
+    if not _enabled:
+        return
+    result = report()
+    if args.profile:
+        print(format_report(result), file=sys.stderr)
+    if args.profile_json:
+        with open(args.profile_json, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
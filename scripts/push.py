@@ -4,6 +4,16 @@ import time
 import numpy as np
 import matplotlib.pyplot as plt
 
+import profiling
+from dither import DEFAULT_KEEP_THRESHOLD, floyd_steinberg
+from palette_lut import METRICS, get_lut
+from pixel_pack import GRAPHIC_HEIGHT, GRAPHIC_WIDTH, pack_pixels
+from serial_link import positive_int
+from vram_render import render_graphic
+
+# Domyślny rozmiar jednego zapisu do portu - cała ramka (22500 B) w kilku wywołaniach
+DEFAULT_CHUNK_SIZE = 4096
+
 color_pallette = [
     (0, 0, 0),
     (0, 0, 85),
@@ -72,45 +82,115 @@ color_pallette = [
 ]
 
 
-def rgb_to_6bit(r, g, b):
-    distances = [0] * 64
-    for i, (r2, g2, b2) in enumerate(color_pallette):
-        distances[i] = (r - r2) ** 2 + (g - g2) ** 2 + (b - b2) ** 2
-    return distances.index(min(distances))
-
-
-def push_colors(color1, color2, color3, color4, ser):
-    """Dokładnie taka sama funkcja jak w generatorze patternu"""
-    byte1 = color1 << 2 | color2 >> 4
-    byte2 = color2 << 4 | color3 >> 2
-    byte3 = color3 << 6 | color4
-    byte1 = byte1 & 255
-    byte2 = byte2 & 255
-    byte3 = byte3 & 255
+# Tablica RGB -> indeks palety, liczona raz i współdzielona
+palette_lut = get_lut(color_pallette)
 
-    # Wysyłaj bajty bezpośrednio do portu szeregowego
-    ser.write(bytes([byte1, byte2, byte3]))
 
+def rgb_to_6bit(r, g, b):
+    return palette_lut.index(r, g, b)
 
-def show_preview(output_indices, width, height):
-    preview_pixels = []
-    for idx in output_indices:
-        r, g, b = color_pallette[idx]
-        preview_pixels.append([r, g, b])
 
-    preview_array = np.array(preview_pixels, dtype=np.uint8)
-    preview_image = preview_array.reshape((height, width, 3))
+def show_preview(output_indices, width, height, full_frame=False):
+    """
+    Podgląd po ditheringu; full_frame=True - cała klatka monitora (skala i ramki
+    jak w graphic_mode_6bitcolor.v) zamiast samego obrazu 200x150
+    """
+    if full_frame:
+        preview_image = render_graphic(pack_pixels(output_indices))
+        title = f"Podgląd klatki {preview_image.shape[1]}x{preview_image.shape[0]}"
+    else:
+        preview_image = palette_lut.to_rgb(output_indices).reshape((height, width, 3))
+        title = f"Podgląd obrazu {width}x{height} z paletą 6-bit"
 
     plt.figure(figsize=(8, 6))
     plt.imshow(preview_image)
-    plt.title(f"Podgląd obrazu {width}x{height} z paletą 6-bit")
+    plt.title(title)
     plt.axis("off")
     plt.show()
 
 
-def send_pixels_over_serial(infile, port, baudrate=1000000, delay=0.01):
+def dither_frame(
+    rgb,
+    serpentine=False,
+    metric="rgb",
+    previous=None,
+    keep_threshold=DEFAULT_KEEP_THRESHOLD,
+):
+    """
+    Dithering Floyda-Steinberga obrazu RGB (150, 200, 3) do indeksów palety (150, 200);
+    metric - wybór koloru według odległości "rgb" albo "lab" (CIELAB);
+    previous - indeksy poprzedniej klatki: piksele bliżej niż keep_threshold
+    zostają przy starym kolorze (mniej zmienionych bajtów przy wysyłce różnic)
+    """
+    # Płaska tablica float32 (wspólny silnik z asciiart.py)
+    return floyd_steinberg(
+        rgb,
+        color_pallette,
+        threshold=10,
+        serpentine=serpentine,
+        integer_error=True,
+        metric=metric,
+        previous=previous,
+        keep_threshold=keep_threshold,
+    )
+
+
+def convert_image(
+    infile,
+    serpentine=False,
+    metric="rgb",
+    previous=None,
+    keep_threshold=DEFAULT_KEEP_THRESHOLD,
+):
+    """
+    Wczytuje obraz 200x150 i zwraca tablicę indeksów palety (150, 200) po ditheringu;
+    previous / keep_threshold - tryb czasowy jak w dither_frame
+    """
+    with profiling.span("push.open"):
+        im = Image.open(infile)
+        if im.size != (GRAPHIC_WIDTH, GRAPHIC_HEIGHT):
+            raise ValueError("Obraz musi mieć rozmiar 200x150")
+        rgb = np.asarray(im.convert("RGB"))
+    with profiling.span("push.dither"):
+        return dither_frame(rgb, serpentine, metric, previous, keep_threshold)
+
+
+def send_frame(ser, frame, chunk_size=DEFAULT_CHUNK_SIZE, quiet=False):
+    """
+    Wysyła spakowaną ramkę dużymi kawałkami (chunk_size bajtów na jedno ser.write)
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size musi być większe od zera: {chunk_size}")
+    total = len(frame)
+    view = memoryview(frame)
+    sent = 0
+    with profiling.span("push.tx"):
+        for offset in range(0, total, chunk_size):
+            sent += ser.write(view[offset : offset + chunk_size])
+            if not quiet:
+                print(f"Postęp: {sent / total * 100:.1f}% ({sent}/{total} bajtów)")
+    profiling.count(profiling.TX_BYTES, sent)
+    return sent
+
+
+def send_pixels_over_serial(
+    infile,
+    port,
+    baudrate=1000000,
+    delay=0.01,
+    serpentine=False,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    quiet=False,
+    preview=False,
+    metric="rgb",
+):
+    """
+    port - nazwa portu albo już otwarty obiekt z write() (np. atrapa w benchmarku);
+    przekazany obiekt nie jest zamykany
+    """
+    own_port = isinstance(port, str)
     try:
-        ser = serial.Serial(port, baudrate, timeout=1)
+        ser = serial.Serial(port, baudrate, timeout=1) if own_port else port
     except Exception as e:
         print("Błąd otwarcia portu: ", e)
         return
@@ -118,92 +198,81 @@ def send_pixels_over_serial(infile, port, baudrate=1000000, delay=0.01):
         print("Port nie został otwarty.")
         return
 
-    im = Image.open(infile)
-    if im.size != (200, 150):
-        raise ValueError("Obraz musi mieć rozmiar 200x150")
-    im = im.convert("RGB")
-    width, height = im.size
-
-    pixels = list(im.getdata())
-    matrix = [
-        [list(pixels[y * width + x]) for x in range(width)] for y in range(height)
-    ]
-    output_indices = []
-    threshold = 10
-
-    for y in range(height):
-        for x in range(width):
-            oldpixel = matrix[y][x]
-            r = int(round(oldpixel[0]))
-            g = int(round(oldpixel[1]))
-            b = int(round(oldpixel[2]))
-            idx = rgb_to_6bit(r, g, b)
-            quant = color_pallette[idx]
-            output_indices.append(idx)
-
-            err_r = r - quant[0]
-            err_g = g - quant[1]
-            err_b = b - quant[2]
-
-            if max(abs(err_r), abs(err_g), abs(err_b)) >= threshold:
-
-                def distribute(nx, ny, factor):
-                    if 0 <= nx < width and 0 <= ny < height:
-                        matrix[ny][nx][0] += err_r * factor
-                        matrix[ny][nx][1] += err_g * factor
-                        matrix[ny][nx][2] += err_b * factor
-
-                distribute(x + 1, y, 7 / 16)
-                distribute(x - 1, y + 1, 3 / 16)
-                distribute(x, y + 1, 5 / 16)
-                distribute(x + 1, y + 1, 1 / 16)
-
-    #print("Wyświetlanie podglądu obrazu...")
-    #show_preview(output_indices, width, height)
-
-    # Używamy DOKŁADNIE tej samej logiki buforowania co w generatorze patternu
-    buf = []
-
-    def push_color(color, serial_port):
-        buf.append(color)
-        if len(buf) == 4:
-            push_colors(buf[0], buf[1], buf[2], buf[3], serial_port)
-            buf.clear()
-
-    print(f"Wysyłanie {len(output_indices)} pikseli w pakietach 4→3 bajty...")
-
-    total_pixels = len(output_indices)
-    bytes_sent = 0
-    pixels_sent = 0
-
-    for color_value in output_indices:
-        push_color(color_value, ser)
-        pixels_sent += 1
-        bytes_sent += 0.75  # 3 bajty na 4 piksele = 0.75 bajta na piksel
-
-        if pixels_sent % 400 == 0:  # Co 400 pikseli wypisz postęp
-            progress = (pixels_sent / total_pixels) * 100
-            print(f"Postęp: {progress:.1f}%")
-
-    # Jeśli zostały jakieś piksele w buforze, wyślij je z dopełnieniem
-    if buf:
-        while len(buf) < 4:
-            buf.append(0)
-        push_colors(buf[0], buf[1], buf[2], buf[3], ser)
-        bytes_sent += 3
-
-    ser.close()
-    print(f"Obraz został wysłany! Wysłano {int(bytes_sent)} bajtów.")
+    indices = convert_image(infile, serpentine, metric)
+    height, width = indices.shape
+
+    if preview:
+        print("Wyświetlanie podglądu obrazu...")
+        show_preview(indices.ravel(), width, height, full_frame=True)
+
+    # Cała ramka pakowana naraz 4 piksele -> 3 bajty (jak w generate_mem.py)
+    with profiling.span("push.pack"):
+        frame = pack_pixels(indices)
+    total_pixels = indices.size
+
+    print(f"Wysyłanie {total_pixels} pikseli w pakietach 4→3 bajty...")
+    bytes_sent = send_frame(ser, frame, chunk_size, quiet)
+
+    if own_port:
+        ser.close()
+    print(f"Obraz został wysłany! Wysłano {bytes_sent} bajtów.")
     print(f"Oryginalnie: {total_pixels} pikseli = {total_pixels} bajtów")
-    print(f"Po kompresji: {int(bytes_sent)} bajtów")
+    print(f"Po kompresji: {bytes_sent} bajtów")
     print(f"Kompresja: {total_pixels / bytes_sent:.2f}:1")
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
 
-    if len(sys.argv) < 3:
-        print("Użycie: python push.py input.bmp port")
-        print("Przykład: python push.py obraz.bmp COM3")
-    else:
-        send_pixels_over_serial(sys.argv[1], sys.argv[2])
+    parser = argparse.ArgumentParser(
+        description="Wysyła obraz 200x150 w trybie graficznym 6-bit przez port szeregowy",
+        epilog="Przykład: python push.py obraz.bmp COM3",
+    )
+    parser.add_argument("image", help="Obraz 200x150 (np. BMP)")
+    parser.add_argument("port", help="Port szeregowy (np. /dev/ttyUSB1)")
+    parser.add_argument(
+        "--baudrate", "-b", type=int, default=1000000, help="Prędkość portu"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=positive_int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Bajtów na jedno ser.write (domyślnie: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "--serpentine",
+        action="store_true",
+        help="Dithering co drugi wiersz od prawej",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=METRICS,
+        default="rgb",
+        help="Odległość przy wyborze koloru: rgb albo lab (percepcyjna, CIELAB)",
+    )
+    parser.add_argument(
+        "--quiet", "-q", action="store_true", help="Bez logowania postępu wysyłki"
+    )
+    parser.add_argument(
+        "--preview",
+        "-p",
+        action="store_true",
+        help="Pokaż przed wysłaniem klatkę tak, jak wyświetli ją monitor",
+    )
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    profiling.setup(args)
+
+    try:
+        send_pixels_over_serial(
+            args.image,
+            args.port,
+            args.baudrate,
+            serpentine=args.serpentine,
+            chunk_size=args.chunk_size,
+            quiet=args.quiet,
+            preview=args.preview,
+            metric=args.metric,
+        )
+    finally:
+        profiling.finish(args)
@@ -1,39 +1,22 @@
 #!/usr/bin/env python3
+"""
+Podgląd wszystkich 256 znaków fontu w siatce 16×16 (silnik z font_tool.py)
+
+  python render_font.py [font.raw | font.psf | font.bdf]
+"""
+
+import sys
+
+from font_tool import convert_font, glyph_sheet, sheet_text
 
 FONT_FILE = "default8x16.raw"   # plik czcionki raw
-CHAR_WIDTH = 8
-CHAR_HEIGHT = 16
-COLS = 16   # 16 znaków w wierszu
-ROWS = 16   # 16 wierszy = 256 znaków
-
-def load_font(path):
-    with open(path, "rb") as f:
-        data = f.read()
-    if len(data) != 256 * CHAR_HEIGHT:
-        raise ValueError(f"Zły rozmiar pliku: {len(data)} bajtów (oczekiwane {256*CHAR_HEIGHT})")
-    return data
-
-def get_glyph(font_data, char_code):
-    """Zwraca tablicę 16 bajtów dla danego kodu ASCII"""
-    start = char_code * CHAR_HEIGHT
-    end = start + CHAR_HEIGHT
-    return font_data[start:end]
+
 
 def render_font(font_data):
     """Rysuje wszystkie 256 znaków w siatce 16×16"""
-    for row in range(ROWS):
-        # każdy wiersz czcionki to 16 wierszy pikseli
-        for y in range(CHAR_HEIGHT):
-            line = ""
-            for col in range(COLS):
-                code = row * COLS + col
-                glyph = get_glyph(font_data, code)
-                bits = f"{glyph[y]:08b}"
-                line += "".join("█" if b == "1" else " " for b in bits) + "  "
-            print(line)
-        print()  # pusty wiersz po każdym bloku 16 znaków
+    print("\n".join(sheet_text(glyph_sheet(font_data, gap=2))))
+
 
 if __name__ == "__main__":
-    font = load_font(FONT_FILE)
+    font = convert_font(sys.argv[1] if len(sys.argv) > 1 else FONT_FILE)
     render_font(font)
-
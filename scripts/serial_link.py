@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Transport asyncio nad portem szeregowym: kolejka z ograniczeniem, paczki
+o zadanym rozmiarze i metryki łącza
+
+Każde send() to jedna wiadomość (np. komplet komend SPI albo cała ramka), która
+trafia na port w całości - kilku producentów (konwerter, nakładka, edytor) może
+dzielić jeden port bez przeplatania połówek komend. Pełna kolejka wstrzymuje
+producentów (backpressure), zamiast gromadzić dane w pamięci.
+
+Zapis do portu wykonuje osobny wątek, paczkami po chunk_size bajtów (mniejsze
+paczki to krótsze opóźnienie FTDI, większe - mniej wywołań). Czas spędzony
+w write() to czas czekania na bufor systemu operacyjnego.
+
+Użycie jako skrypt - wysyłka plików i pomiar łącza:
+  python serial_link.py /dev/ttyUSB1 ramki/*.bin --chunk-size 4096 --producers 2
+"""
+
+import argparse
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+
+DEFAULT_QUEUE_SIZE = 8  # wiadomości
+DEFAULT_CHUNK_SIZE = 4096
+RATE_WINDOW = 1.0  # sekundy, z których liczone jest bieżące bytes/s
+BITS_PER_BYTE = 10  # UART 8N1: start + 8 bitów + stop
+
+
+def positive_int(text):
+    """
+    Typ argparse dla rozmiarów (np. --chunk-size): liczba całkowita > 0
+    """
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"musi być większe od zera: {text}")
+    return value
+
+
+class SerialLink:
+    """
+    ser - otwarty port (albo obiekt z write(), np. FpgaEmulator);
+    own_port - czy close() ma go zamknąć
+    """
+
+    def __init__(
+        self,
+        ser,
+        baudrate=None,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        own_port=False,
+    ):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size musi być większe od zera: {chunk_size}")
+        self.ser = ser
+        self.baudrate = baudrate or getattr(ser, "baudrate", None)
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.own_port = own_port
+        self.error = None
+
+        self.bytes_sent = 0
+        self.messages = 0
+        self.queued_bytes = 0
+        self.blocked_time = 0.0
+        self._window = deque()  # (czas, bajty) z ostatnich RATE_WINDOW sekund
+        self._started = None
+        self._queue = None
+        self._task = None
+        self._executor = None
+
+    @classmethod
+    async def open(cls, port, baudrate=1000000, **kwargs):
+        ser = serial.Serial(port, baudrate, timeout=1)
+        link = cls(ser, baudrate, own_port=True, **kwargs)
+        await link.start()
+        return link
+
+    async def start(self):
+        self._queue = asyncio.Queue(self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="serial")
+        self._started = time.perf_counter()
+        self._task = asyncio.create_task(self._writer())
+        return self
+
+    async def send(self, data):
+        """
+        Kolejkuje wiadomość; czeka, gdy kolejka jest pełna
+        """
+        if self.error is not None:
+            raise self.error
+        data = bytes(data)
+        self.queued_bytes += len(data)
+        await self._queue.put(data)
+
+    async def drain(self):
+        """
+        Czeka, aż wszystko z kolejki trafi do portu
+        """
+        await self._queue.join()
+        if self.error is not None:
+            raise self.error
+
+    async def close(self):
+        try:
+            await self.drain()
+        finally:
+            self._task.cancel()
+            self._executor.shutdown(wait=True)
+            if self.own_port:
+                self.ser.close()
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            data = await self._queue.get()
+            try:
+                if self.error is None:
+                    view = memoryview(data)
+                    for offset in range(0, len(view), self.chunk_size):
+                        chunk = view[offset : offset + self.chunk_size]
+                        start = time.perf_counter()
+                        await loop.run_in_executor(
+                            self._executor, self.ser.write, chunk
+                        )
+                        now = time.perf_counter()
+                        self.blocked_time += now - start
+                        self.bytes_sent += len(chunk)
+                        self._window.append((now, len(chunk)))
+                    self.messages += 1
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queued_bytes -= len(data)
+                self._queue.task_done()
+
+    def rate(self):
+        """
+        Bieżąca przepustowość w bajtach na sekundę (ostatnie RATE_WINDOW s)
+        """
+        now = time.perf_counter()
+        while self._window and self._window[0][0] < now - RATE_WINDOW:
+            self._window.popleft()
+        return sum(n for _, n in self._window) / RATE_WINDOW
+
+    def metrics(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        link_rate = self.baudrate / BITS_PER_BYTE if self.baudrate else None
+        average = self.bytes_sent / elapsed if elapsed > 0 else 0.0
+        return {
+            "bytes_sent": self.bytes_sent,
+            "messages": self.messages,
+            "rate": self.rate(),
+            "average_rate": average,
+            "link_rate": link_rate,
+            "utilization": average / link_rate if link_rate else None,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queued_bytes": self.queued_bytes,
+            "blocked_time": self.blocked_time,
+            "elapsed": elapsed,
+            "error": str(self.error) if self.error else None,
+        }
+
+
+def format_metrics(m):
+    line = (
+        f"{m['bytes_sent']:9d} B  {m['rate'] / 1000:7.1f} kB/s  "
+        f"kolejka {m['queue_depth']} ({m['queued_bytes']} B)  "
+        f"w write() {m['blocked_time']:.2f} s"
+    )
+    if m["utilization"] is not None:
+        line += f"  wykorzystanie łącza {m['utilization'] * 100:.0f}%"
+    return line
+
+
+async def _send_files(args):
+    frames = []
+    for path in args.files:
+        with open(path, "rb") as f:
+            frames.append(f.read())
+
+    link = await SerialLink.open(
+        args.port,
+        args.baudrate,
+        queue_size=args.queue_size,
+        chunk_size=args.chunk_size,
+    )
+
+    async def producer(start):
+        for i in range(start, len(frames) * args.repeat, args.producers):
+            await link.send(frames[i % len(frames)])
+
+    async def monitor():
+        while True:
+            await asyncio.sleep(1)
+            print(format_metrics(link.metrics()))
+
+    monitor_task = asyncio.create_task(monitor())
+    try:
+        await asyncio.gather(*(producer(i) for i in range(args.producers)))
+        await link.drain()
+    finally:
+        monitor_task.cancel()
+        await link.close()
+
+    m = link.metrics()
+    print(format_metrics(m))
+    print(
+        f"Średnio {m['average_rate'] / 1000:.1f} kB/s z teoretycznych "
+        f"{m['link_rate'] / 1000:.1f} kB/s ({m['messages']} wiadomości)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Wysyła pliki przez port szeregowy i mierzy wykorzystanie łącza"
+    )
+    parser.add_argument("port", help="Port szeregowy (np. /dev/ttyUSB1)")
+    parser.add_argument("files", nargs="+", help="Pliki do wysłania (np. ramki .bin)")
+    parser.add_argument(
+        "--baudrate", "-b", type=int, default=1000000, help="Prędkość portu"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=positive_int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Bajtów na jedno write() (domyślnie: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=positive_int,
+        default=DEFAULT_QUEUE_SIZE,
+        help=f"Wiadomości w kolejce (domyślnie: {DEFAULT_QUEUE_SIZE})",
+    )
+    parser.add_argument(
+        "--producers", type=int, default=1, help="Ilu producentów wysyła naraz"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Ile razy wysłać każdy plik"
+    )
+    args = parser.parse_args()
+    asyncio.run(_send_files(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,29 @@
 #!/usr/bin/env python3
+"""
+Wyświetla jeden znak fontu 8x16 (# = 1, . = 0), silnik z font_tool.py
+
+  python show_char.py [font.raw | font.psf | font.bdf]
+"""
+
+import sys
+
+from font_tool import convert_font, glyph_text
 
 FONT_FILE = "terminus.raw"   # plik z czcionką
-CHAR_WIDTH = 8
-CHAR_HEIGHT = 16
-
-def load_font(path):
-    with open(path, "rb") as f:
-        data = f.read()
-    if len(data) != 256 * CHAR_HEIGHT:
-        raise ValueError(f"Zły rozmiar pliku: {len(data)} bajtów (oczekiwane {256*CHAR_HEIGHT})")
-    return data
-
-def get_glyph(font_data, char_code):
-    """Zwraca tablicę 16 bajtów dla danego kodu ASCII"""
-    start = char_code * CHAR_HEIGHT
-    end = start + CHAR_HEIGHT
-    return font_data[start:end]
-
-def print_glyph(glyph):
+
+
+def print_glyph(font_data, char_code):
     """Wyświetla 8x16 znak (# = 1, . = 0)"""
-    for row in glyph:
-        bits = f"{row:08b}"  # zamień na binarny string
-        line = "".join("#" if b == "1" else "." for b in bits)
-        print(line)
+    print("\n".join(glyph_text(font_data, char_code)))
+
 
 if __name__ == "__main__":
-    font = load_font(FONT_FILE)
+    font = convert_font(sys.argv[1] if len(sys.argv) > 1 else FONT_FILE)
     ch = input("Podaj znak do wyświetlenia: ")
     if not ch:
         exit(0)
     code = ord(ch[0])
-    glyph = get_glyph(font, code)
-    print_glyph(glyph)
-
+    if code > 255:
+        print(f"Znak spoza 0-255: {ch[0]}")
+        exit(1)
+    print_glyph(font, code)
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Pokaz slajdów jako długo działająca usługa (zamiast pętli push.py w demo.sh)
+
+Port szeregowy otwierany jest raz. Skonwertowane ramki trzymane są w pamięci
+(LRU o ograniczonym rozmiarze), a następny slajd konwertowany jest w tle,
+gdy bieżący jest wyświetlany - zmiana slajdu kosztuje tylko czas wysyłki.
+
+Sterowanie przez gniazdo uniksowe, jedna komenda na linię:
+  next, prev, pause, resume, reload, status, quit
+Odpowiedź to jedna linia zaczynająca się od "ok" albo "error".
+
+Przy każdej zmianie slajdu wypisywana jest liczba bajtów ramki, które różnią
+się od poprzednio wysłanej. Z --temporal slajd jest ditherowany względem ramki
+wyświetlanej w chwili konwersji (piksele bliskie poprzednim kolorom zostają),
+co przy podobnych slajdach zmniejsza tę liczbę.
+
+Użycie:
+  python slideshow.py /dev/ttyUSB1 ../test_images --interval 3
+  python slideshow.py /dev/ttyUSB1 klatki --interval 0.5 --temporal
+  python slideshow.py --send next
+"""
+
+import argparse
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+
+from asciiart import TEXT_KEEP_THRESHOLD
+from batch_convert import (
+    add_conversion_args,
+    conversion_params,
+    convert_frame,
+    find_images,
+)
+from dither import DEFAULT_KEEP_THRESHOLD
+from push import DEFAULT_CHUNK_SIZE, send_frame
+from vram_shadow import changed_bytes
+
+DEFAULT_SOCKET = "/tmp/fpga_slideshow.sock"
+DEFAULT_INTERVAL = 3.0
+DEFAULT_CACHE_SIZE = 32  # ramki mają ~22 KB, więc to niecały 1 MB
+COMMANDS = ("next", "prev", "pause", "resume", "reload", "status", "quit")
+REPLY_TIMEOUT = 5.0
+
+
+class FrameCache:
+    """
+    Ramki skonwertowane lub w trakcie konwersji (w tle); najdawniej używane
+    są usuwane po przekroczeniu max_frames. Z temporal=True ramka zależy też
+    od poprzedniej (previous), więc ta jest częścią klucza.
+    """
+
+    def __init__(
+        self,
+        mode,
+        params,
+        max_frames=DEFAULT_CACHE_SIZE,
+        temporal=False,
+        keep_threshold=None,
+    ):
+        self.mode = mode
+        self.params = params
+        self.max_frames = max_frames
+        self.temporal = temporal
+        self.keep_threshold = keep_threshold
+        self._frames = OrderedDict()  # klucz -> Future z bajtami ramki
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="convert")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path):
+        # Zmieniony plik (inny mtime lub rozmiar) to nowy wpis
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+
+    def _future(self, path, previous=None):
+        if not self.temporal:
+            previous = None
+        key = self._key(path) + (None if previous is None else hash(previous),)
+        with self._lock:
+            future = self._frames.get(key)
+            if future is None:
+                future = self._executor.submit(
+                    convert_frame,
+                    path,
+                    self.mode,
+                    self.params,
+                    previous,
+                    self.keep_threshold,
+                )
+                self._frames[key] = future
+                while len(self._frames) > self.max_frames:
+                    self._frames.popitem(last=False)
+            else:
+                self._frames.move_to_end(key)
+            return future, future.done()
+
+    def prefetch(self, path, previous=None):
+        """
+        Zleca konwersję w tle (nic nie robi, jeśli ramka już jest)
+        """
+        try:
+            self._future(path, previous)
+        except OSError:
+            pass
+
+    def get(self, path, previous=None):
+        """
+        Bajty ramki; czeka, jeśli konwersja w tle jeszcze trwa
+        """
+        future, ready = self._future(path, previous)
+        if ready:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return future.result()
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Slideshow:
+    def __init__(
+        self,
+        ser,
+        inputs,
+        mode="graphic",
+        params=None,
+        interval=DEFAULT_INTERVAL,
+        cache_size=DEFAULT_CACHE_SIZE,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        temporal=False,
+        keep_threshold=None,
+    ):
+        self.ser = ser
+        self.inputs = inputs
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.cache = FrameCache(
+            mode, params or {}, cache_size, temporal, keep_threshold
+        )
+        self.commands = queue.Queue()
+        self.slides = find_images(inputs)
+        self.index = 0
+        self.paused = False
+        self.running = False
+        self.shown = 0
+        self.last_send = 0.0
+        self.current = None  # bajty ramki wyświetlanej teraz
+        self.last_changed = 0
+
+    def request(self, command):
+        """
+        Przekazuje komendę do pętli pokazu i czeka na odpowiedź (z dowolnego wątku)
+        """
+        reply = queue.Queue(maxsize=1)
+        self.commands.put((command, reply))
+        try:
+            return reply.get(timeout=REPLY_TIMEOUT)
+        except queue.Empty:
+            return "error: brak odpowiedzi"
+
+    def status(self):
+        name = os.path.basename(self.slides[self.index]) if self.slides else "-"
+        state = "pause" if self.paused else "play"
+        return (
+            f"{state} {self.index + 1}/{len(self.slides)} {name} "
+            f"send={self.last_send * 1000:.0f}ms changed={self.last_changed} "
+            f"shown={self.shown} "
+            f"cache_hits={self.cache.hits} cache_misses={self.cache.misses}"
+        )
+
+    def show(self, index):
+        """
+        Wysyła slajd i zleca konwersję następnego w tle
+        """
+        if not self.slides:
+            return
+        self.index = index % len(self.slides)
+        path = self.slides[self.index]
+        following = self.slides[(self.index + 1) % len(self.slides)]
+        try:
+            frame = self.cache.get(path, self.current)
+        except Exception as e:
+            print(f"Pomijam {path}: {e}")
+            self.cache.prefetch(following, self.current)
+            return
+        start = time.perf_counter()
+        send_frame(self.ser, frame, self.chunk_size, quiet=True)
+        self.last_send = time.perf_counter() - start
+        self.last_changed = changed_bytes(self.current, frame)
+        self.current = frame
+        self.shown += 1
+        print(
+            f"Slajd {self.index + 1}/{len(self.slides)}: {os.path.basename(path)} "
+            f"({self.last_send * 1000:.0f} ms wysyłki, "
+            f"zmienione {self.last_changed}/{len(frame)} B)"
+        )
+        self.cache.prefetch(following, frame)
+
+    def handle(self, command):
+        """
+        Wykonuje komendę; zwraca linię odpowiedzi
+        """
+        if command == "next":
+            self.show(self.index + 1)
+        elif command == "prev":
+            self.show(self.index - 1)
+        elif command == "pause":
+            self.paused = True
+        elif command == "resume":
+            self.paused = False
+        elif command == "reload":
+            current = self.slides[self.index] if self.slides else None
+            self.slides = find_images(self.inputs)
+            self.cache.clear()
+            index = self.slides.index(current) if current in self.slides else 0
+            self.show(index)
+        elif command == "quit":
+            self.running = False
+        elif command != "status":
+            commands = " ".join(COMMANDS)
+            return f"error: nieznana komenda {command!r} (dostępne: {commands})"
+        return f"ok {self.status()}"
+
+    def run(self):
+        """
+        Pętla pokazu: kolejny slajd co interval sekund, komendy w dowolnej chwili
+        """
+        self.running = True
+        self.show(0)
+        next_switch = time.monotonic() + self.interval
+        while self.running:
+            timeout = None if self.paused else max(next_switch - time.monotonic(), 0)
+            try:
+                command, reply = self.commands.get(timeout=timeout)
+            except queue.Empty:
+                self.show(self.index + 1)
+                next_switch = time.monotonic() + self.interval
+                continue
+            answer = self.handle(command)
+            if reply is not None:
+                reply.put(answer)
+            # Po ręcznej zmianie slajdu odliczanie zaczyna się od nowa
+            if command in ("next", "prev", "reload", "resume"):
+                next_switch = time.monotonic() + self.interval
+        self.cache.close()
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            command = line.decode("utf-8", "replace").strip().lower()
+            if not command:
+                continue
+            answer = self.server.slideshow.request(command)
+            self.wfile.write(answer.encode("utf-8") + b"\n")
+            if command == "quit":
+                break
+
+
+def _remove_stale_socket(path):
+    """
+    Usuwa gniazdo pozostałe po poprzednim uruchomieniu; jeśli ktoś na nim
+    odpowiada (działa inny pokaz), zgłasza RuntimeError zamiast przejmować sterowanie
+    """
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise RuntimeError(f"Pokaz już działa i słucha na {path}")
+
+
+class ControlServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, slideshow):
+        _remove_stale_socket(path)
+        self.slideshow = slideshow
+        super().__init__(path, _ControlHandler)
+
+    def start(self):
+        thread = threading.Thread(
+            target=self.serve_forever, name="control", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def send_command(command, path=DEFAULT_SOCKET):
+    """
+    Wysyła komendę do działającego pokazu i zwraca odpowiedź
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(REPLY_TIMEOUT + 1)
+        sock.connect(path)
+        sock.sendall(command.encode("utf-8") + b"\n")
+        return sock.makefile("rb").readline().decode("utf-8").strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pokaz slajdów na FPGA z portem otwartym przez cały czas działania",
+        epilog="Przykład: python slideshow.py /dev/ttyUSB1 ../test_images --interval 3",
+    )
+    parser.add_argument("port", nargs="?", help="Port szeregowy (np. /dev/ttyUSB1)")
+    parser.add_argument("inputs", nargs="*", help="Katalogi lub pliki obrazów")
+    parser.add_argument(
+        "--baudrate", "-b", type=int, default=1000000, help="Prędkość portu"
+    )
+    parser.add_argument(
+        "--interval",
+        "-i",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"Sekund na slajd (domyślnie: {DEFAULT_INTERVAL})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"Ile ramek trzymać w pamięci (domyślnie: {DEFAULT_CACHE_SIZE})",
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help=f"Gniazdo sterujące (domyślnie: {DEFAULT_SOCKET})",
+    )
+    parser.add_argument(
+        "--send",
+        metavar="KOMENDA",
+        choices=COMMANDS,
+        help="Wyślij komendę do działającego pokazu i zakończ",
+    )
+    parser.add_argument(
+        "--temporal",
+        action="store_true",
+        help="Dithering względem wyświetlanego slajdu - mniej zmienionych bajtów "
+        "przy podobnych slajdach (bez --glyphs)",
+    )
+    parser.add_argument(
+        "--keep-threshold",
+        type=float,
+        default=None,
+        metavar="PRÓG",
+        help="Odległość RGB, do której piksel zostaje przy poprzednim kolorze "
+        f"(domyślnie: {DEFAULT_KEEP_THRESHOLD} graphic, {TEXT_KEEP_THRESHOLD} text)",
+    )
+    add_conversion_args(parser)
+    args = parser.parse_args()
+
+    if args.send:
+        try:
+            print(send_command(args.send, args.socket))
+        except OSError as e:
+            print(f"Brak połączenia z pokazem ({args.socket}): {e}")
+            sys.exit(1)
+        return
+
+    if args.port is None or not args.inputs:
+        parser.error("podaj port i katalogi / pliki obrazów")
+
+    try:
+        ser = serial.Serial(args.port, args.baudrate, timeout=1)
+    except Exception as e:
+        print("Błąd otwarcia portu: ", e)
+        sys.exit(1)
+
+    show = Slideshow(
+        ser,
+        args.inputs,
+        args.mode,
+        conversion_params(args),
+        args.interval,
+        args.cache_size,
+        temporal=args.temporal,
+        keep_threshold=args.keep_threshold,
+    )
+    if not show.slides:
+        print("Brak obrazów do pokazania")
+        sys.exit(1)
+
+    try:
+        server = ControlServer(args.socket, show)
+    except RuntimeError as e:
+        print(f"Błąd: {e}")
+        ser.close()
+        sys.exit(1)
+    server.start()
+    print(f"{len(show.slides)} slajdów, sterowanie: {args.socket}")
+    try:
+        show.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        ser.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Kodowanie komend protokołu SPI z main_switchable.v (to samo co w pipico_controller.c)
+
+Komendy:
+  0xH1 - zapis sekwencyjny do VRAM, potem młodszy bajt długości (H = bity 11:8),
+         potem dane (maks. 4095 bajtów na komendę)
+  0x02 - ustawienie adresu VRAM, potem starszy i młodszy bajt adresu
+  0xH3 - ustawienie trybu wyświetlania (H - tryb)
+  0x04 - odczyt vcounter (2 bajty)
+  0xH5 - wypełnienie: młodszy bajt liczby N (H = bity 11:8), potem wartość
+         zapisywana N razy od bieżącego adresu
+
+Po zapisie adres sam się zwiększa, więc kolejny zapis bez 0x02 trafia zaraz za poprzedni.
+
+Wypełnienie zapisuje jeden bajt na takt clk160m i w tym czasie ignoruje bajty z SPI,
+dlatego fill_cmd() dokłada po nim bajty 0x00 (nieznana komenda = nic nie rób) -
+jeden na FILL_WRITES_PER_BYTE wypełnionych bajtów.
+
+Pojedyncze komendy budują funkcje *_cmd(), a całe sekwencje - CommandStream.
+"""
+
+import re
+
+CMD_WRITE = 0x01
+CMD_SET_ADDR = 0x02
+CMD_SET_MODE = 0x03
+CMD_READ_VCOUNTER = 0x04
+CMD_FILL = 0x05
+CMD_NOP = 0x00
+
+MAX_WRITE_LEN = 4095  # 12-bitowa długość zapisu
+MAX_FILL_LEN = 4095  # 12-bitowa liczba bajtów wypełnienia
+SET_ADDR_LEN = 3  # komenda + 2 bajty adresu
+WRITE_HEADER_LEN = 2  # komenda + młodszy bajt długości
+FILL_HEADER_LEN = 3  # komenda + młodszy bajt liczby + wartość
+# Zapisy VRAM w czasie jednego bajtu SPI: clk160m / (20 MHz SPI / 8 bitów)
+FILL_WRITES_PER_BYTE = 64
+VRAM_SIZE = 24576
+ADDR_MASK = 0x7FFF  # 15-bitowy adres VRAM
+
+MODE_DISABLED = 0
+MODE_TEXT = 1
+MODE_GRAPHICS = 2
+
+
+def set_addr_cmd(addr):
+    """
+    Komenda 0x02 - ustawienie adresu VRAM
+    """
+    addr &= ADDR_MASK
+    return bytes([CMD_SET_ADDR, (addr >> 8) & 0xFF, addr & 0xFF])
+
+
+def write_cmd(data):
+    """
+    Komenda 0xH1 z danymi; dłuższe dane dzielone są na kolejne zapisy po 4095 bajtów
+    (adres zwiększa się sam, więc nie trzeba go ustawiać między nimi)
+    """
+    data = memoryview(data).cast("B")
+    out = bytearray()
+    for offset in range(0, len(data), MAX_WRITE_LEN):
+        chunk = data[offset : offset + MAX_WRITE_LEN]
+        out.append(CMD_WRITE | ((len(chunk) >> 8) << 4))
+        out.append(len(chunk) & 0xFF)
+        out += chunk
+    return bytes(out)
+
+
+def fill_cmd(value, count):
+    """
+    Komenda 0xH5 - count bajtów o wartości value, razem z bajtami 0x00 na czas
+    wypełniania; większe count dzielone jest na kolejne komendy po 4095 bajtów
+    """
+    out = bytearray()
+    for offset in range(0, count, MAX_FILL_LEN):
+        chunk = min(count - offset, MAX_FILL_LEN)
+        out += bytes([CMD_FILL | ((chunk >> 8) << 4), chunk & 0xFF, value & 0xFF])
+        out += bytes([CMD_NOP]) * -(-chunk // FILL_WRITES_PER_BYTE)
+    return bytes(out)
+
+
+def fill_len(count):
+    """
+    Długość fill_cmd(value, count) w bajtach
+    """
+    full, rest = divmod(count, MAX_FILL_LEN)
+    length = full * (FILL_HEADER_LEN + -(-MAX_FILL_LEN // FILL_WRITES_PER_BYTE))
+    if rest:
+        length += FILL_HEADER_LEN + -(-rest // FILL_WRITES_PER_BYTE)
+    return length
+
+
+# Najkrótszy ciąg równych bajtów, który opłaca się wysłać jako fill w środku
+# zapisu (po wypełnieniu trzeba otworzyć nowy zapis)
+MIN_FILL_RUN = next(
+    n for n in range(1, MAX_FILL_LEN) if fill_len(n) + WRITE_HEADER_LEN < n
+)
+_RUN_PATTERN = re.compile(rb"(.)\1{%d,}" % (MIN_FILL_RUN - 1), re.DOTALL)
+
+
+def _runs(data):
+    """
+    Fragmenty danych (start, end, czy_fill): zwykłe bajty i ciągi do wypełnienia
+    """
+    pos = 0
+    for match in _RUN_PATTERN.finditer(data):
+        start, end = match.span()
+        if start > pos:
+            yield pos, start, False
+        yield start, end, True
+        pos = end
+    if pos < len(data):
+        yield pos, len(data), False
+
+
+def write_runs_cmd(data):
+    """
+    Jak write_cmd(), ale ciągi co najmniej MIN_FILL_RUN równych bajtów idą jako fill
+    """
+    data = memoryview(data).cast("B")
+    out = bytearray()
+    for start, end, run in _runs(data):
+        if run:
+            out += fill_cmd(data[start], end - start)
+        else:
+            out += write_cmd(data[start:end])
+    return bytes(out)
+
+
+def set_mode_cmd(mode):
+    """
+    Komenda 0xH3 - ustawienie trybu wyświetlania
+    """
+    return bytes([CMD_SET_MODE | ((mode & 0x07) << 4)])
+
+
+def read_vcounter_cmd():
+    """
+    Komenda 0x04 i dwa bajty, przy których urządzenie odsyła vcounter
+    """
+    return bytes([CMD_READ_VCOUNTER, 0x00, 0x00])
+
+
+class CommandStream:
+    """
+    Budowanie strumienia komend SPI z łączeniem zapisów.
+
+    - sąsiednie zapisy są łączone w jeden (dzielony dopiero przy serializacji
+      na kawałki po 4095 bajtów),
+    - set_addr jest pomijane, gdy adres po auto-inkrementacji już się zgadza,
+    - z use_fill ciągi równych bajtów w zapisach i fill() wysyłane są komendą 0xH5
+      (bez niego fill() to zwykły zapis - dla FPGA bez tej komendy),
+    - wszystko serializowane jest do jednego ciągłego bufora (to_bytes).
+
+    addr - adres, pod który trafi następny zapis, jeśli jest znany (None - nieznany)
+    """
+
+    def __init__(self, addr=None, use_fill=False):
+        self.addr = addr
+        self.use_fill = use_fill
+        # ("addr", adres) | ("data", bytearray) | ("fill", [wartość, liczba])
+        # | ("raw", bytes)
+        self._ops = []
+        self.dropped_addr = 0
+
+    def set_addr(self, addr):
+        addr &= ADDR_MASK
+        if addr == self.addr:
+            self.dropped_addr += 1
+            return self
+        if self._ops and self._ops[-1][0] == "addr":
+            # Poprzedni adres nie został użyty przez żaden zapis
+            self._ops.pop()
+        self._ops.append(("addr", addr))
+        self.addr = addr
+        return self
+
+    def write(self, data):
+        if not len(data):
+            return self
+        if self._ops and self._ops[-1][0] == "data":
+            self._ops[-1][1].extend(data)
+        else:
+            self._ops.append(("data", bytearray(data)))
+        if self.addr is not None:
+            self.addr = (self.addr + len(data)) & ADDR_MASK
+        return self
+
+    def fill(self, value, count):
+        """
+        count bajtów o wartości value (bez use_fill wysyłane jako zwykły zapis)
+        """
+        value &= 0xFF
+        if not self.use_fill:
+            return self.write(bytes([value]) * count)
+        if count <= 0:
+            return self
+        last = self._ops[-1] if self._ops else None
+        if last is not None and last[0] == "fill" and last[1][0] == value:
+            last[1][1] += count
+        else:
+            self._ops.append(("fill", [value, count]))
+        if self.addr is not None:
+            self.addr = (self.addr + count) & ADDR_MASK
+        return self
+
+    def set_mode(self, mode):
+        self._ops.append(("raw", set_mode_cmd(mode)))
+        return self
+
+    def read_vcounter(self):
+        self._ops.append(("raw", read_vcounter_cmd()))
+        return self
+
+    def to_bytes(self):
+        out = bytearray()
+        for kind, value in self._ops:
+            if kind == "addr":
+                out += set_addr_cmd(value)
+            elif kind == "data":
+                out += write_runs_cmd(value) if self.use_fill else write_cmd(value)
+            elif kind == "fill":
+                out += fill_cmd(*value)
+            else:
+                out += value
+        return bytes(out)
+
+    def clear(self):
+        """
+        Czyści zebrane komendy (adres urządzenia zostaje zapamiętany)
+        """
+        self._ops = []
+        self.dropped_addr = 0
+        return self
+
+    def stats(self):
+        """
+        Ile bajtów to dane, a ile narzut komend - do strojenia wielkości paczek.
+        payload_bytes to bajty VRAM zapisane komendą 0xH1, filled_bytes - komendą 0xH5
+        """
+        payload = filled = commands = 0
+        for kind, value in self._ops:
+            if kind == "data":
+                runs = _runs(value) if self.use_fill else [(0, len(value), False)]
+                for start, end, run in runs:
+                    if run:
+                        filled += end - start
+                        commands += -(-(end - start) // MAX_FILL_LEN)
+                    else:
+                        payload += end - start
+                        commands += -(-(end - start) // MAX_WRITE_LEN)
+            elif kind == "fill":
+                filled += value[1]
+                commands += -(-value[1] // MAX_FILL_LEN)
+            else:
+                commands += 1
+        total = len(self.to_bytes())
+        return {
+            "commands": commands,
+            "payload_bytes": payload,
+            "filled_bytes": filled,
+            "overhead_bytes": total - payload,
+            "total_bytes": total,
+            "dropped_set_addr": self.dropped_addr,
+        }
@@ -11,6 +11,8 @@ import os
 import sys
 import argparse
 
+import profiling
+
 # Definicje rozdzielczości (szerokość_px, wysokość_px, szerokość_znaków, wysokość_znaków)
 # Znaki mają rozmiar 8x16 pikseli
 RESOLUTIONS = {
@@ -59,6 +61,9 @@ COLOR_256_MAP = {
     15: 15,  # biały
 }
 
+# Znaki sterujące nie mogą trafić do addstr (przesuwałyby kursor), na ekranie terminala są kropką
+DISPLAY_TABLE = {code: "." for code in list(range(32)) + list(range(127, 160))}
+
 
 class TextEditor:
     def __init__(self, stdscr, resolution="1440x900"):
@@ -70,10 +75,13 @@ class TextEditor:
         self.resolution = resolution
         px_w, px_h, self.width, self.height = RESOLUTIONS[resolution]
         
-        self.text = [[" " for _ in range(self.width)] for _ in range(self.height)]
-        self.colors = [
-            [0x0F for _ in range(self.width)] for _ in range(self.height)
-        ]  # domyślnie biały na czarnym
+        # Ekran w dwóch buforach o układzie jak w VRAM: znaki i atrybuty (fg << 4 | bg);
+        # text[y] i colors[y] to widoki wierszy (memoryview) na te bufory
+        cells = self.width * self.height
+        self.chars = bytearray(b" " * cells)
+        self.attrs = bytearray(b"\x0f" * cells)  # domyślnie biały na czarnym
+        self.text = self.row_views(self.chars)
+        self.colors = self.row_views(self.attrs)
 
         self.cursor_x = 0
         self.cursor_y = 0
@@ -81,7 +89,18 @@ class TextEditor:
         self.current_bg = 0  # czarny
         self.mode = "EDIT"  # EDIT lub COMMAND
 
+        # Śledzenie zmian: wiersz -> (pierwsza kolumna, kolumna za ostatnią) do przerysowania
+        self.damage = {}
+        self.full_redraw = True
+        self.last_status = None
+        self.message_shown = False
+        self.attr_cache = {}
+
+        # Podgląd na żywo na FPGA (LiveLink), ustawiany w main() przy --port
+        self.live = None
+
         # Inicjalizacja kolorów curses
+        self.use_colors = False
         self.init_colors()
 
     def init_colors(self):
@@ -90,6 +109,7 @@ class TextEditor:
 
         curses.start_color()
         curses.use_default_colors()
+        self.use_colors = True
 
         # Sprawdź czy terminal obsługuje 256 kolorów
         if curses.COLORS >= 256:
@@ -151,30 +171,100 @@ class TextEditor:
             pair_id, attr = self.color_pairs.get((fg, bg), (1, 0))
             return curses.color_pair(pair_id) | attr
 
+    def cell_attr(self, color_code):
+        """Atrybut curses dla bajtu koloru (zapamiętywany)"""
+        attr = self.attr_cache.get(color_code)
+        if attr is None:
+            attr = 0
+            if self.use_colors:
+                attr = self.get_color_attr((color_code >> 4) & 0x0F, color_code & 0x0F)
+            self.attr_cache[color_code] = attr
+        return attr
+
+    def mark_dirty(self, y, x0, x1):
+        """Oznacz komórki [x0, x1) w wierszu y do przerysowania"""
+        if y in self.damage:
+            start, end = self.damage[y]
+            x0, x1 = min(start, x0), max(end, x1)
+        self.damage[y] = (x0, x1)
+
+    def mark_all_dirty(self):
+        for y in range(self.height):
+            self.damage[y] = (0, self.width)
+
+    def row_views(self, buffer):
+        view = memoryview(buffer)
+        return [view[y * self.width : (y + 1) * self.width] for y in range(self.height)]
+
+    def set_cell(self, y, x, char, color=None):
+        self.text[y][x] = ord(char)
+        if color is not None:
+            self.colors[y][x] = color
+        self.mark_dirty(y, x, x + 1)
+
+    def draw_row(self, y, start, end):
+        """Rysuje komórki [start, end) wiersza - jedno addstr na ciąg komórek w tym samym kolorze"""
+        text_row = self.text[y]
+        color_row = self.colors[y]
+        x = start
+        while x < end:
+            color = color_row[x]
+            run_end = x + 1
+            while run_end < end and color_row[run_end] == color:
+                run_end += 1
+            try:
+                run = str(text_row[x:run_end], "latin-1").translate(DISPLAY_TABLE)
+                self.stdscr.addstr(y, x, run, self.cell_attr(color))
+            except curses.error:
+                pass
+            x = run_end
+
+    def live_status(self):
+        if self.live is None:
+            return None
+        return "LIVE" if self.live.error is None else "LIVE: port error"
+
     def draw_interface(self):
-        self.stdscr.clear()
         height, width = self.stdscr.getmaxyx()
 
-        # Rysuj tekst z kolorami
-        for y in range(min(self.height, height - 3)):
-            for x in range(min(self.width, width - 1)):
-                try:
-                    char = self.text[y][x]
-                    color_code = self.colors[y][x]
-                    fg = (color_code >> 4) & 0x0F
-                    bg = color_code & 0x0F
-
-                    if curses.has_colors():
-                        color_attr = self.get_color_attr(fg, bg)
-                        self.stdscr.addch(y, x, char, color_attr)
-                    else:
-                        self.stdscr.addch(y, x, char)
-                except curses.error:
-                    pass
-
-        # Rysuj pasek statusu
+        if self.full_redraw:
+            self.stdscr.erase()
+            self.mark_all_dirty()
+            self.last_status = None
+            self.full_redraw = False
+        elif self.message_shown and height - 3 >= 0:
+            # Usuń komunikat po zapisie / wczytaniu
+            self.stdscr.move(height - 3, 0)
+            self.stdscr.clrtoeol()
+            if height - 3 < self.height:
+                self.mark_dirty(height - 3, 0, self.width)
+        self.message_shown = False
+
+        # Rysuj tylko zmienione komórki tekstu
+        rows = min(self.height, height - 3)
+        cols = min(self.width, width - 1)
+        for y, (start, end) in self.damage.items():
+            if y < rows and start < cols:
+                self.draw_row(y, start, min(end, cols))
+        self.damage = {}
+
+        # Rysuj pasek statusu (tylko gdy się zmienił)
         status_line = height - 2
-        if status_line >= 0:
+        status = (
+            self.mode,
+            self.cursor_x,
+            self.cursor_y,
+            self.current_fg,
+            self.current_bg,
+            width,
+            self.live_status(),
+        )
+        if status_line >= 0 and status != self.last_status:
+            self.last_status = status
+            for line in (status_line, height - 1):
+                self.stdscr.move(line, 0)
+                self.stdscr.clrtoeol()
+
             mode_str = f"Mode: {self.mode}"
             res_str = f"Res: {self.resolution} ({self.width}x{self.height})"
             pos_str = f"Pos: {self.cursor_x:3d},{self.cursor_y:3d}"
@@ -202,6 +292,9 @@ class TextEditor:
                 # Demo kombinacji FG+BG
                 self.stdscr.addstr(status_line, 82, "Demo:", curses.A_REVERSE)
                 self.stdscr.addstr(status_line, 87, "Text", color_attr)
+
+                if self.live is not None:
+                    self.stdscr.addstr(status_line, 93, self.live_status(), curses.A_REVERSE)
             except curses.error:
                 pass
 
@@ -227,7 +320,8 @@ class TextEditor:
         except curses.error:
             pass
 
-        self.stdscr.refresh()
+        self.stdscr.noutrefresh()
+        curses.doupdate()
 
     def handle_edit_mode(self, key):
         if key == curses.KEY_F1:
@@ -243,20 +337,22 @@ class TextEditor:
         elif key == 127 or key == curses.KEY_BACKSPACE:  # Backspace
             if self.cursor_x > 0:
                 self.cursor_x -= 1
-                self.text[self.cursor_y][self.cursor_x] = " "
+                self.set_cell(self.cursor_y, self.cursor_x, " ")
             elif self.cursor_y > 0:
                 self.cursor_y -= 1
                 self.cursor_x = self.width - 1
-                self.text[self.cursor_y][self.cursor_x] = " "
+                self.set_cell(self.cursor_y, self.cursor_x, " ")
         elif key == ord("\n") or key == ord("\r"):  # Enter
             self.cursor_y = min(self.height - 1, self.cursor_y + 1)
             self.cursor_x = 0
         elif 32 <= key <= 126:  # Znaki drukowalne
-            self.text[self.cursor_y][self.cursor_x] = chr(key)
-            # Ustaw kolor dla tego znaku
-            self.colors[self.cursor_y][self.cursor_x] = (
-                self.current_fg << 4
-            ) | self.current_bg
+            # Znak razem z aktualnym kolorem
+            self.set_cell(
+                self.cursor_y,
+                self.cursor_x,
+                chr(key),
+                (self.current_fg << 4) | self.current_bg,
+            )
             self.cursor_x += 1
             if self.cursor_x >= self.width:
                 self.cursor_x = 0
@@ -280,10 +376,10 @@ class TextEditor:
 
     def clear_screen(self):
         """Wyczyść cały ekran"""
-        for y in range(self.height):
-            for x in range(self.width):
-                self.text[y][x] = " "
-                self.colors[y][x] = (self.current_fg << 4) | self.current_bg
+        cells = len(self.chars)
+        self.chars[:] = b" " * cells
+        self.attrs[:] = bytes([(self.current_fg << 4) | self.current_bg]) * cells
+        self.mark_all_dirty()
         self.cursor_x = 0
         self.cursor_y = 0
 
@@ -293,43 +389,17 @@ class TextEditor:
             # Nazwa pliku z rozdzielczością
             suffix = f"_{self.resolution.replace('x', '_')}"
             
-            # Zapisz tekst
-            with open(f"text{suffix}.bin", "wb") as f:
-                for y in range(self.height):
-                    for x in range(self.width):
-                        f.write(bytes([ord(self.text[y][x])]))
-
-            # Zapisz kolory
-            with open(f"colors{suffix}.bin", "wb") as f:
-                for y in range(self.height):
-                    for x in range(self.width):
-                        f.write(bytes([self.colors[y][x]]))
-
-            # Zapisz również jako jeden plik do wysłania
-            with open(f"output{suffix}.bin", "wb") as f:
-                for y in range(self.height):
-                    for x in range(self.width):
-                        f.write(bytes([ord(self.text[y][x])]))
-                for y in range(self.height):
-                    for x in range(self.width):
-                        f.write(bytes([self.colors[y][x]]))
-            
-            # Zapisz też pod standardową nazwą (bez suffixu) dla kompatybilności
-            with open("text.bin", "wb") as f:
-                for y in range(self.height):
-                    for x in range(self.width):
-                        f.write(bytes([ord(self.text[y][x])]))
-            with open("colors.bin", "wb") as f:
-                for y in range(self.height):
-                    for x in range(self.width):
-                        f.write(bytes([self.colors[y][x]]))
-            with open("output.bin", "wb") as f:
-                for y in range(self.height):
-                    for x in range(self.width):
-                        f.write(bytes([ord(self.text[y][x])]))
-                for y in range(self.height):
-                    for x in range(self.width):
-                        f.write(bytes([self.colors[y][x]]))
+            # Każdy plik jednym zapisem; output.bin to znaki, a po nich atrybuty
+            text = bytes(self.chars)
+            colors = bytes(self.attrs)
+            output = text + colors
+            files = {"text": text, "colors": colors, "output": output}
+            with profiling.span("editor.save"):
+                for name, data in files.items():
+                    for path in (f"{name}{suffix}.bin", f"{name}.bin"):
+                        with open(path, "wb") as f:
+                            f.write(data)
+                        profiling.count("bytes_written", len(data))
 
             # Pokazuj komunikat
             height, width = self.stdscr.getmaxyx()
@@ -338,6 +408,7 @@ class TextEditor:
                 msg = f"Files saved ({total_bytes} bytes for {self.resolution})! Press any key."
                 try:
                     self.stdscr.addstr(height - 3, 0, msg[: width - 1])
+                    self.message_shown = True
                     self.stdscr.refresh()
                     self.stdscr.getch()
                 except curses.error:
@@ -350,6 +421,7 @@ class TextEditor:
                 msg = f"Error saving files: {e} Press any key."
                 try:
                     self.stdscr.addstr(height - 3, 0, msg[: width - 1])
+                    self.message_shown = True
                     self.stdscr.refresh()
                     self.stdscr.getch()
                 except curses.error:
@@ -359,23 +431,13 @@ class TextEditor:
     def load_files(self):
         """Wczytaj istniejące pliki jeśli istnieją"""
         try:
-            if os.path.exists("text.bin"):
-                with open("text.bin", "rb") as f:
-                    data = f.read()
-                    for i, byte in enumerate(data):
-                        if i < self.width * self.height:
-                            y = i // self.width
-                            x = i % self.width
-                            self.text[y][x] = chr(byte)
-
-            if os.path.exists("colors.bin"):
-                with open("colors.bin", "rb") as f:
-                    data = f.read()
-                    for i, byte in enumerate(data):
-                        if i < self.width * self.height:
-                            y = i // self.width
-                            x = i % self.width
-                            self.colors[y][x] = byte
+            # Odczyt prosto do buforów (krótszy plik zmienia tylko początek ekranu)
+            with profiling.span("editor.load"):
+                for path, buffer in (("text.bin", self.chars), ("colors.bin", self.attrs)):
+                    if os.path.exists(path):
+                        with open(path, "rb") as f:
+                            f.readinto(buffer)
+            self.mark_all_dirty()
 
             # Pokazuj komunikat
             height, width = self.stdscr.getmaxyx()
@@ -383,6 +445,7 @@ class TextEditor:
                 msg = "Files loaded successfully! Press any key."
                 try:
                     self.stdscr.addstr(height - 3, 0, msg[: width - 1])
+                    self.message_shown = True
                     self.stdscr.refresh()
                     self.stdscr.getch()
                 except curses.error:
@@ -395,6 +458,7 @@ class TextEditor:
                 msg = "Error loading files or files don't exist. Press any key."
                 try:
                     self.stdscr.addstr(height - 3, 0, msg[: width - 1])
+                    self.message_shown = True
                     self.stdscr.refresh()
                     self.stdscr.getch()
                 except curses.error:
@@ -419,22 +483,34 @@ class TextEditor:
         self.load_files()
 
         while True:
-            self.draw_interface()
+            # Zmiany ekranu idą do FPGA w tle, najwyżej raz na klatkę
+            if self.live is not None and (self.damage or self.full_redraw):
+                self.live.notify()
+
+            with profiling.span("editor.draw"):
+                self.draw_interface()
             key = self.stdscr.getch()
 
+            # Po zmianie rozmiaru terminala rysuj wszystko od nowa
+            if key == curses.KEY_RESIZE:
+                self.full_redraw = True
+                continue
+
             # Obsługa myszy (działa w obu trybach)
             if self.handle_mouse(key):
                 continue
 
-            if self.mode == "EDIT":
-                self.handle_edit_mode(key)
-            elif self.mode == "COMMAND":
-                result = self.handle_command_mode(key)
-                if result == "QUIT":
-                    break
+            result = None
+            with profiling.span("editor.key"):
+                if self.mode == "EDIT":
+                    self.handle_edit_mode(key)
+                elif self.mode == "COMMAND":
+                    result = self.handle_command_mode(key)
+            if result == "QUIT":
+                break
 
 
-def main(stdscr, resolution):
+def main(stdscr, resolution, port=None, baudrate=1000000):
     curses.curs_set(1)  # Pokazuj kursor
     stdscr.keypad(True)  # Włącz obsługę klawiszy specjalnych
     curses.mousemask(curses.ALL_MOUSE_EVENTS | curses.REPORT_MOUSE_POSITION)  # Włącz obsługę myszy
@@ -457,7 +533,26 @@ def main(stdscr, resolution):
         return
 
     editor = TextEditor(stdscr, resolution)
-    editor.run()
+
+    if port:
+        # pyserial jest potrzebny tylko w trybie na żywo
+        from live_link import LiveLink
+
+        try:
+            editor.live = LiveLink.for_resolution(
+                port, editor.chars, editor.attrs, resolution, baudrate
+            )
+        except Exception as e:
+            stdscr.addstr(0, 0, f"Cannot open {port}: {e}"[: width - 1])
+            stdscr.addstr(1, 0, "Press any key to exit...")
+            stdscr.getch()
+            return
+
+    try:
+        editor.run()
+    finally:
+        if editor.live is not None:
+            editor.live.close()
 
     # Zapisz przy wyjściu
     editor.save_files()
@@ -477,6 +572,7 @@ Examples:
   %(prog)s                  # Use default 1440x900
   %(prog)s -r 1024x768      # Use 1024x768 resolution
   %(prog)s --resolution 800x600
+  %(prog)s --port /dev/ttyUSB1  # Show edits on the FPGA as you type
 """
     )
     parser.add_argument(
@@ -485,13 +581,31 @@ Examples:
         default="1440x900",
         help="Screen resolution (default: 1440x900)"
     )
+    parser.add_argument(
+        "-p", "--port",
+        default=None,
+        help="Serial port of the FPGA - send edits live as you type (e.g. /dev/ttyUSB1)"
+    )
+    parser.add_argument(
+        "-b", "--baudrate",
+        type=int,
+        default=1000000,
+        help="Serial port speed for --port (default: 1000000)"
+    )
     parser.add_argument(
         "-l", "--list",
         action="store_true",
         help="List available resolutions and exit"
     )
+    profiling.add_profile_argument(
+        parser,
+        "Time redraws, key handling and file I/O; print the report on exit",
+        "Time redraws, key handling and file I/O; write the report to a JSON file",
+        metavar="FILE",
+    )
     
     args = parser.parse_args()
+    profiling.setup(args)
     
     if args.list:
         print("Available resolutions:")
@@ -502,8 +616,11 @@ Examples:
         sys.exit(0)
     
     try:
-        curses.wrapper(lambda stdscr: main(stdscr, args.resolution))
+        curses.wrapper(
+            lambda stdscr: main(stdscr, args.resolution, args.port, args.baudrate)
+        )
     except KeyboardInterrupt:
         print("\nProgram interrupted by user")
     except Exception as e:
         print(f"Error: {e}")
+    profiling.finish(args)
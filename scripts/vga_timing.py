@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Odczyt parametrów trybów wideo z fpga_project/timings/*.vh
+
+Pliki .vh są jedynym źródłem prawdy o geometrii ramki (WHOLE_LINE, WHOLE_FRAME),
+zegarze piksela (10 MHz * CLK_DCM_MULTIPLY / CLK_DCM_DIVIDE), rozmiarze tekstu
+i skali trybu graficznego - skrypty czytają je zamiast przepisywać liczby.
+
+Użycie jako skrypt:
+  python vga_timing.py            # wybrany tryb (selected_timing.vh)
+  python vga_timing.py 1024x768
+"""
+
+import os
+import re
+import sys
+from functools import lru_cache
+
+TIMINGS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "fpga_project", "timings"
+)
+SELECTED_FILE = "selected_timing.vh"
+INPUT_CLOCK_HZ = 10_000_000  # clk10m
+
+_DEFINE_RE = re.compile(r"^\s*`define\s+(\w+)\s+([^/]+?)\s*(//.*)?$")
+_INCLUDE_RE = re.compile(r'^\s*`include\s+"[^"]*?([^"/]+)\.vh"')
+_EXPR_RE = re.compile(r"^[0-9+\-*/() ]+$")
+
+
+class VgaTiming:
+    """
+    Parametry jednego trybu; surowe wartości `define są w .defines
+    """
+
+    def __init__(self, name, defines):
+        self.name = name
+        self.defines = defines
+        self.whole_line = defines["WHOLE_LINE"]
+        self.whole_frame = defines["WHOLE_FRAME"]
+        self.visible_area = defines["VISIBLE_AREA"]
+        self.visible_lines = defines["VISIBLE_LINES"]
+        self.text_cols = defines["TEXT_COLS"]
+        self.text_rows = defines["TEXT_ROWS"]
+        self.pixel_scale = defines["SMALL_COUNT_TO"] + 1  # powiększenie trybu graficznego
+        self.pixel_clock_hz = (
+            INPUT_CLOCK_HZ * defines["CLK_DCM_MULTIPLY"] / defines["CLK_DCM_DIVIDE"]
+        )
+
+    @property
+    def line_time(self):
+        return self.whole_line / self.pixel_clock_hz
+
+    @property
+    def frame_time(self):
+        return self.whole_line * self.whole_frame / self.pixel_clock_hz
+
+    def __repr__(self):
+        return f"VgaTiming({self.name!r})"
+
+
+def parse_defines(text):
+    """
+    Zwraca słownik `define NAZWA -> liczba; wyrażenia z odwołaniami `NAZWA są liczone
+    """
+    defines = {}
+    for line in text.splitlines():
+        match = _DEFINE_RE.match(line)
+        if not match:
+            continue
+        name, expr = match.group(1), match.group(2)
+        expr = re.sub(r"`(\w+)", lambda m: str(defines[m.group(1)]), expr)
+        if _EXPR_RE.match(expr):
+            defines[name] = int(eval(expr, {"__builtins__": {}}))
+    return defines
+
+
+def selected_timing_name(timings_dir=TIMINGS_DIR):
+    """
+    Nazwa trybu włączonego (nie zakomentowanego) w selected_timing.vh
+    """
+    with open(os.path.join(timings_dir, SELECTED_FILE)) as f:
+        for line in f:
+            match = _INCLUDE_RE.match(line)
+            if match:
+                return match.group(1)
+    raise ValueError(f"Brak aktywnego `include w {SELECTED_FILE}")
+
+
+def available_timings(timings_dir=TIMINGS_DIR):
+    return sorted(
+        name[:-3]
+        for name in os.listdir(timings_dir)
+        if name.endswith(".vh") and name != SELECTED_FILE
+    )
+
+
+@lru_cache(maxsize=None)
+def load_timing(name=None, timings_dir=TIMINGS_DIR):
+    """
+    Wczytuje tryb po nazwie (np. "1440x900"); None - tryb wybrany w selected_timing.vh
+    """
+    if name is None:
+        name = selected_timing_name(timings_dir)
+    path = os.path.join(timings_dir, f"{name}.vh")
+    if not os.path.exists(path):
+        raise ValueError(
+            f"Nieznany tryb: {name} (dostępne: {', '.join(available_timings(timings_dir))})"
+        )
+    with open(path) as f:
+        return VgaTiming(name, parse_defines(f.read()))
+
+
+def main():
+    timing = load_timing(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"Tryb {timing.name}:")
+    print(f"  linia: {timing.whole_line} px, ramka: {timing.whole_frame} linii")
+    print(f"  zegar piksela: {timing.pixel_clock_hz / 1e6:.3f} MHz")
+    print(f"  odświeżanie: {1 / timing.frame_time:.2f} Hz")
+    print(f"  tekst: {timing.text_cols}x{timing.text_rows}")
+    print(f"  skala trybu graficznego: {timing.pixel_scale}")
+
+
+if __name__ == "__main__":
+    main()
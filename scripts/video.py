@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Odtwarzanie sekwencji obrazów i plików wideo w trybie graficznym 200x150
+
+Każdy etap (dekodowanie, skalowanie, dithering, pakowanie 4->3, wysyłka) działa
+we własnym wątku, a etapy łączą kolejki o ograniczonym rozmiarze. Dzięki temu
+konwersja klatki N+1 odbywa się w trakcie wysyłania klatki N. Wysyłka jest
+taktowana do zadanego fps; klatka spóźniona o więcej niż jeden okres jest
+pomijana, jeśli w kolejce czeka już następna.
+
+--temporal włącza dithering stabilny w czasie: piksel zostaje przy indeksie
+z poprzedniej klatki, dopóki ten kolor jest w zadanej odległości RGB od nowego.
+Przy podobnych klatkach zmienia się wtedy mała część bajtów; raport podaje
+liczbę zmienionych bajtów na klatkę, a --delta wysyła tylko zmiany (komendy
+SPI jak w live_link.py) zamiast całej ramki.
+
+Przykłady:
+  python video.py film.mp4 /dev/ttyUSB1 --fps 10
+  python video.py "klatki/*.bmp" /dev/ttyUSB1 --loop
+  python video.py film.mp4 /dev/ttyUSB1 --temporal --delta
+  ffmpeg -i film.mp4 -f rawvideo -pix_fmt rgb24 -s 200x150 - | \\
+      python video.py - /dev/ttyUSB1 --raw-size 200x150
+"""
+
+import argparse
+import glob
+import os
+import queue
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+import serial
+
+from dither import DEFAULT_KEEP_THRESHOLD, keep_previous, ordered_dither
+from pixel_pack import FRAME_BYTES, GRAPHIC_HEIGHT, GRAPHIC_WIDTH, pack_pixels
+from push import (
+    DEFAULT_CHUNK_SIZE,
+    color_pallette,
+    dither_frame,
+    palette_lut,
+    send_frame,
+)
+from serial_link import positive_int
+from vram_shadow import VramShadow, changed_bytes
+
+QUEUE_SIZE = 4
+QUEUE_TIMEOUT = 0.1  # s - co tyle czekający wątek sprawdza, czy potok nie stoi
+STOP = object()  # znacznik końca strumienia przekazywany przez wszystkie etapy
+
+
+class Frame:
+    __slots__ = ("index", "created", "data")
+
+    def __init__(self, index, data, created):
+        self.index = index
+        self.created = created
+        self.data = data
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.worst = max(self.worst, seconds)
+
+    def summary(self):
+        mean = self.total / self.count if self.count else 0.0
+        return (
+            f"{self.name:10s} {self.count:6d} klatek  "
+            f"śr. {mean * 1000:7.2f} ms  maks. {self.worst * 1000:7.2f} ms"
+        )
+
+
+def put_item(q, item, stop):
+    """
+    put() do ograniczonej kolejki, przerywany ustawieniem stop (błąd w innym
+    etapie - odbiorca mógł już skończyć); False - potok zatrzymany
+    """
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=QUEUE_TIMEOUT)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def get_item(q, stop):
+    """
+    get() z kolejki; po ustawieniu stop zwraca STOP i pomija resztę klatek
+    """
+    while not stop.is_set():
+        try:
+            return q.get(timeout=QUEUE_TIMEOUT)
+        except queue.Empty:
+            pass
+    return STOP
+
+
+class Stage(threading.Thread):
+    """
+    Wątek etapu: pobiera klatkę z kolejki wejściowej, przetwarza, oddaje dalej.
+    Funkcja może zwrócić None, żeby porzucić klatkę. Wyjątek ustawia wspólne
+    zdarzenie stop, po którym wszystkie etapy i dekoder kończą pracę.
+    """
+
+    def __init__(self, name, func, inq, outq, stop):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.inq = inq
+        self.outq = outq
+        self.stop = stop
+        self.stats = StageStats(name)
+        self.error = None
+
+    def run(self):
+        try:
+            while True:
+                frame = get_item(self.inq, self.stop)
+                if frame is STOP:
+                    break
+                start = time.perf_counter()
+                frame.data = self.func(frame.data)
+                self.stats.add(time.perf_counter() - start)
+                if frame.data is not None and self.outq is not None:
+                    if not put_item(self.outq, frame, self.stop):
+                        break
+        except Exception as e:
+            self.error = e
+            self.stop.set()
+        finally:
+            if self.outq is not None:
+                put_item(self.outq, STOP, self.stop)
+
+
+def iter_source(source, raw_size, loop):
+    """
+    Generator klatek RGB: surowe rgb24 ze stdin ("-"), lista obrazów (glob / katalog)
+    albo plik wideo obsługiwany przez OpenCV
+    """
+    if source == "-":
+        width, height = raw_size
+        frame_bytes = width * height * 3
+        stdin = sys.stdin.buffer
+        while True:
+            data = stdin.read(frame_bytes)
+            if len(data) < frame_bytes:
+                return
+            yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+
+    if os.path.isdir(source):
+        files = sorted(glob.glob(os.path.join(source, "*")))
+    else:
+        files = sorted(glob.glob(source))
+
+    # Przy --loop przebieg bez żadnej klatki kończy odtwarzanie (zamiast kręcić się
+    # w pustej pętli, gdy żaden plik nie daje się wczytać)
+    if len(files) > 1 or (files and cv2.haveImageReader(files[0])):
+        while True:
+            frames = 0
+            for path in files:
+                img = cv2.imread(path)
+                if img is not None:
+                    frames += 1
+                    yield cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            if not loop or frames == 0:
+                return
+
+    while True:
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise ValueError(f"Nie można otworzyć źródła: {source}")
+        frames = 0
+        while True:
+            ok, img = cap.read()
+            if not ok:
+                break
+            frames += 1
+            yield cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        cap.release()
+        if not loop or frames == 0:
+            return
+
+
+def resize_frame(rgb):
+    if rgb.shape[:2] == (GRAPHIC_HEIGHT, GRAPHIC_WIDTH):
+        return rgb
+    size = (GRAPHIC_WIDTH, GRAPHIC_HEIGHT)
+    return cv2.resize(rgb, size, interpolation=cv2.INTER_AREA)
+
+
+class TemporalQuantizer:
+    """
+    Kwantyzacja pamiętająca indeksy poprzedniej klatki (etap działa w jednym
+    wątku, więc klatki przychodzą po kolei). Klatka pominięta przy wysyłce
+    nadal jest punktem odniesienia - liczba zmian liczona jest w nadajniku.
+    """
+
+    def __init__(self, dither_type, serpentine, keep_threshold):
+        self.dither_type = dither_type
+        self.serpentine = serpentine
+        self.keep_threshold = keep_threshold
+        self.previous = None
+
+    def __call__(self, rgb):
+        if self.dither_type == "ordered":
+            indices = ordered_dither(
+                rgb,
+                color_pallette,
+                previous=self.previous,
+                keep_threshold=self.keep_threshold,
+            )
+        elif self.dither_type == "none":
+            indices = palette_lut.quantize(rgb)
+            if self.previous is not None:
+                indices = keep_previous(
+                    rgb,
+                    palette_lut.palette,
+                    indices,
+                    self.previous,
+                    self.keep_threshold,
+                )
+        else:
+            indices = dither_frame(
+                rgb,
+                self.serpentine,
+                previous=self.previous,
+                keep_threshold=self.keep_threshold,
+            )
+        self.previous = indices
+        return indices
+
+
+def make_quantizer(dither_type, serpentine, keep_threshold=None):
+    """
+    keep_threshold - próg trybu czasowego (--temporal); None - każda klatka osobno
+    """
+    if keep_threshold is not None:
+        return TemporalQuantizer(dither_type, serpentine, keep_threshold)
+    if dither_type == "ordered":
+        return lambda rgb: ordered_dither(rgb, color_pallette)
+    if dither_type == "none":
+        return palette_lut.quantize
+    return lambda rgb: dither_frame(rgb, serpentine)
+
+
+class Transmitter:
+    """
+    Ostatni etap: taktowanie do fps i wysyłka. Spóźniona klatka jest pomijana
+    tylko wtedy, gdy czeka już nowsza - wolna konwersja nie zatrzyma obrazu.
+    Dla każdej wysłanej klatki liczy bajty zmienione względem poprzednio
+    wysłanej; delta=True wysyła tylko zmiany (VramShadow).
+    """
+
+    def __init__(self, ser, fps, chunk_size, delta=False, verbose=False):
+        self.ser = ser
+        self.period = 1.0 / fps if fps > 0 else 0.0
+        self.chunk_size = chunk_size
+        self.shadow = VramShadow() if delta else None
+        self.verbose = verbose
+        self.start = None
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.previous = None
+        self.changed = []  # zmienione bajty każdej wysłanej klatki
+        self.stats = StageStats("transmit")
+        self.latency = StageStats("end-to-end")
+
+    def __call__(self, frame, newer_waiting=False):
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now - frame.index * self.period
+        deadline = self.start + frame.index * self.period
+        if now < deadline:
+            time.sleep(deadline - now)
+        elif self.period and newer_waiting and now - deadline > self.period:
+            self.dropped += 1
+            return
+        start = time.perf_counter()
+        changed = changed_bytes(self.previous, frame.data)
+        self.previous = frame.data
+        self.changed.append(changed)
+        data = frame.data
+        if self.shadow is not None:
+            data = self.shadow.update(data)
+        if self.ser is not None and data:
+            sent = send_frame(self.ser, data, self.chunk_size, quiet=True)
+        else:
+            sent = len(data)
+        if self.verbose:
+            print(
+                f"Klatka {frame.index}: zmienione {changed} B "
+                f"({changed / len(frame.data) * 100:.1f}%), wysłano {sent} B"
+            )
+        self.bytes_sent += sent
+        self.sent += 1
+        self.stats.add(time.perf_counter() - start)
+        self.latency.add(time.perf_counter() - frame.created)
+
+
+def play(
+    source,
+    ser,
+    fps=10.0,
+    dither_type="floyd",
+    serpentine=False,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    raw_size=(GRAPHIC_WIDTH, GRAPHIC_HEIGHT),
+    loop=False,
+    max_frames=None,
+    report_every=0.0,
+    keep_threshold=None,
+    delta=False,
+    verbose=False,
+):
+    """
+    Uruchamia potok i czeka na jego koniec; zwraca (etapy, nadajnik)
+    """
+    queues = [queue.Queue(maxsize=QUEUE_SIZE) for _ in range(4)]
+    stop = threading.Event()
+    stages = [
+        Stage("resize", resize_frame, queues[0], queues[1], stop),
+        Stage(
+            "quantize",
+            make_quantizer(dither_type, serpentine, keep_threshold),
+            *queues[1:3],
+            stop,
+        ),
+        Stage("pack", pack_pixels, queues[2], queues[3], stop),
+    ]
+    transmitter = Transmitter(ser, fps, chunk_size, delta, verbose)
+    transmit_queue = queues[3]
+    for stage in stages:
+        stage.start()
+
+    decode = StageStats("decode")
+    source_iter = iter_source(source, raw_size, loop)
+    feed_errors = []
+
+    def feed():
+        index = 0
+        try:
+            while max_frames is None or index < max_frames:
+                start = time.perf_counter()
+                rgb = next(source_iter, None)
+                if rgb is None:
+                    break
+                decode.add(time.perf_counter() - start)
+                if not put_item(queues[0], Frame(index, rgb, start), stop):
+                    break
+                index += 1
+        except Exception as e:
+            feed_errors.append(e)
+            stop.set()
+        finally:
+            put_item(queues[0], STOP, stop)
+
+    feeder = threading.Thread(target=feed, name="decode", daemon=True)
+    feeder.start()
+
+    last_report = time.perf_counter()
+    try:
+        while True:
+            frame = get_item(transmit_queue, stop)
+            if frame is STOP:
+                break
+            transmitter(frame, newer_waiting=not transmit_queue.empty())
+            if report_every and time.perf_counter() - last_report >= report_every:
+                last_report = time.perf_counter()
+                sent, dropped = transmitter.sent, transmitter.dropped
+                last = transmitter.changed[-1] if transmitter.changed else 0
+                print(
+                    f"Wysłano {sent}, pominięto {dropped} klatek, "
+                    f"ostatnio zmienione {last} B"
+                )
+    except BaseException:
+        # Błąd wysyłki albo Ctrl+C - zatrzymaj pozostałe wątki
+        stop.set()
+        raise
+
+    feeder.join()
+    if feed_errors:
+        raise feed_errors[0]
+    for stage in stages:
+        stage.join()
+        if stage.error is not None:
+            raise stage.error
+    return [decode] + [s.stats for s in stages] + [transmitter.stats], transmitter
+
+
+def print_report(stats, transmitter, elapsed):
+    print("\n--- Raport odtwarzania ---")
+    for s in stats:
+        print(s.summary())
+    print(transmitter.latency.summary())
+    elapsed = max(elapsed, 1e-9)
+    fps = transmitter.sent / elapsed
+    rate = transmitter.bytes_sent / elapsed / 1024
+    print(f"Wysłane klatki: {transmitter.sent}  pominięte: {transmitter.dropped}")
+    print(f"Czas: {elapsed:.2f} s  ({fps:.2f} fps, {rate:.1f} KiB/s)")
+    # Pierwsza klatka zawsze zmienia całą ramkę, więc nie wchodzi do średniej
+    changed = transmitter.changed[1:]
+    if changed:
+        mean = sum(changed) / len(changed)
+        print(
+            f"Zmienione bajty na klatkę: śr. {mean:.0f} B "
+            f"({mean / FRAME_BYTES * 100:.1f}% ramki), maks. {max(changed)} B"
+        )
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Odtwarza wideo / sekwencję obrazów w trybie graficznym 200x150",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Przykłady:
+  %(prog)s film.mp4 /dev/ttyUSB1 --fps 10
+  %(prog)s "klatki/*.bmp" /dev/ttyUSB1 --loop
+  ffmpeg -i film.mp4 -f rawvideo -pix_fmt rgb24 -s 200x150 - | %(prog)s - /dev/ttyUSB1
+  %(prog)s film.mp4 null --fps 0     # bez urządzenia, tak szybko jak się da
+""",
+    )
+    parser.add_argument(
+        "source", help="Plik wideo, katalog, wzorzec obrazów albo '-' (rgb24 ze stdin)"
+    )
+    parser.add_argument("port", help="Port szeregowy (np. /dev/ttyUSB1) lub 'null'")
+    parser.add_argument(
+        "--baudrate", "-b", type=int, default=1000000, help="Prędkość portu"
+    )
+    parser.add_argument(
+        "--fps",
+        type=float,
+        default=10.0,
+        help="Docelowa liczba klatek/s (0 - bez limitu)",
+    )
+    parser.add_argument(
+        "--dither-type",
+        choices=["floyd", "ordered", "none"],
+        default="floyd",
+        help="Typ ditheringu",
+    )
+    parser.add_argument(
+        "--serpentine", action="store_true", help="Dithering serpentynowy"
+    )
+    parser.add_argument(
+        "--temporal",
+        type=float,
+        nargs="?",
+        const=DEFAULT_KEEP_THRESHOLD,
+        default=None,
+        metavar="PRÓG",
+        help="Dithering stabilny w czasie: piksel zostaje przy poprzednim kolorze, "
+        "dopóki różnica RGB nie przekroczy progu "
+        f"(domyślnie: {DEFAULT_KEEP_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Wysyłaj tylko zmienione bajty jako komendy SPI zamiast całych ramek",
+    )
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="Wypisz liczbę zmienionych bajtów dla każdej klatki",
+    )
+    parser.add_argument(
+        "--raw-size",
+        type=parse_size,
+        default=(GRAPHIC_WIDTH, GRAPHIC_HEIGHT),
+        help="Rozmiar klatek rgb24 ze stdin, np. 320x240 (domyślnie: 200x150)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=positive_int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Bajtów na jedno ser.write (domyślnie: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument("--loop", action="store_true", help="Odtwarzaj w pętli")
+    parser.add_argument(
+        "--frames", type=int, default=None, help="Maksymalna liczba klatek"
+    )
+    parser.add_argument(
+        "--report-every", type=float, default=5.0, help="Co ile sekund wypisać postęp"
+    )
+    args = parser.parse_args()
+
+    ser = None
+    if args.port != "null":
+        try:
+            ser = serial.Serial(args.port, args.baudrate, timeout=1)
+        except serial.SerialException as e:
+            print(f"Błąd otwarcia portu: {e}")
+            sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        stats, transmitter = play(
+            args.source,
+            ser,
+            fps=args.fps,
+            dither_type=args.dither_type,
+            serpentine=args.serpentine,
+            chunk_size=args.chunk_size,
+            raw_size=args.raw_size,
+            loop=args.loop,
+            max_frames=args.frames,
+            report_every=args.report_every,
+            keep_threshold=args.temporal,
+            delta=args.delta,
+            verbose=args.verbose,
+        )
+    except KeyboardInterrupt:
+        print("\nPrzerwano")
+        return
+    except Exception as e:
+        print(f"Błąd: {e}")
+        sys.exit(1)
+    finally:
+        if ser is not None:
+            ser.close()
+    print_report(stats, transmitter, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
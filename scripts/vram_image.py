@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Odczyt i zapis obrazów VRAM w formatach używanych przy syntezie i testach
+
+  .hex - $readmemh, jeden bajt na linię (tak jak vram_init.hex)
+  .bin - surowe bajty
+  .coe - Xilinx CORE Generator (memory_initialization_vector)
+  .mem - Xilinx data2mem / updatemem (@adres i bajty oddzielone spacjami)
+
+Zapis to jedno f.write() całego bufora, a odczyt mapuje plik do pamięci (mmap)
+i dekoduje typowy układ "XX\\n" wektorowo. Inne poprawne pliki $readmemh
+(komentarze, @adres, kilka wartości w linii) obsługuje wolniejsza ścieżka.
+
+Użycie jako skrypt - konwersja między formatami:
+  python vram_image.py vram_init.hex vram_init.coe
+  python vram_image.py obraz.bin obraz.hex --size 24576
+"""
+
+import argparse
+import mmap
+import os
+import re
+
+import numpy as np
+
+from spi_protocol import VRAM_SIZE
+
+FORMATS = ("hex", "bin", "coe", "mem")
+MEM_BYTES_PER_LINE = 16
+
+_HEX_DIGITS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+_NIBBLE = np.full(256, 0xFF, dtype=np.uint8)  # znak ASCII -> wartość cyfry hex
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _NIBBLE[_c] = _NIBBLE[ord(chr(_c).upper())] = _i
+_SEPARATORS = np.zeros(256, dtype=bool)
+_SEPARATORS[list(b" \t\r\n,")] = True
+_COMMENT_RE = re.compile(rb"//[^\n]*|/\*.*?\*/", re.S)
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext not in FORMATS:
+        supported = ", ".join(FORMATS)
+        raise ValueError(f"Nieznany format pliku: {path} (obsługiwane: {supported})")
+    return ext
+
+
+def _map_file(path):
+    """
+    Zawartość pliku jako bufor tylko do odczytu (mmap, pusty plik -> b"")
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _hex_pairs(chars):
+    """
+    Tablica (N, 2) znaków ASCII -> bajty; None, jeśli są znaki spoza hex
+    """
+    hi = _NIBBLE[chars[:, 0]]
+    lo = _NIBBLE[chars[:, 1]]
+    if (hi == 0xFF).any() or (lo == 0xFF).any():
+        return None
+    return (hi << 4) | lo
+
+
+def _decode_pairs(buf):
+    """
+    Wektorowy odczyt ciągu dwuznakowych wartości hex oddzielonych spacjami,
+    przecinkami lub końcami linii; None, jeśli tekst ma inny układ
+    """
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    is_digit = _NIBBLE[raw] != 0xFF
+    if not (is_digit | _SEPARATORS[raw]).all():
+        return None
+    edges = np.diff(is_digit.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if not (ends - starts == 2).all():
+        return None
+    return ((_NIBBLE[raw[starts]] << 4) | _NIBBLE[raw[starts + 1]]).tobytes()
+
+
+def _decode_readmem(buf):
+    """
+    Ogólny parser $readmemh: komentarze, @adres, dowolne białe znaki
+    """
+    text = _COMMENT_RE.sub(b" ", bytes(buf))
+    out = bytearray()
+    addr = 0
+    for token in text.split():
+        if token.startswith(b"@"):
+            addr = int(token[1:], 16)
+            continue
+        if addr >= len(out):
+            out.extend(bytes(addr - len(out) + 1))
+        out[addr] = int(token, 16) & 0xFF
+        addr += 1
+    return bytes(out)
+
+
+def decode_hex(buf):
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    # Najszybsza ścieżka: dokładnie "XX\n" na każdy bajt
+    if len(raw) % 3 == 0 and len(raw) and (raw[2::3] == 0x0A).all():
+        data = _hex_pairs(raw.reshape(-1, 3)[:, :2])
+        if data is not None:
+            return data.tobytes()
+    data = _decode_pairs(buf)
+    return data if data is not None else _decode_readmem(buf)
+
+
+def decode_mem(buf):
+    # Typowy plik .mem: jedna linia @adres na początku, potem same bajty
+    head, _, rest = bytes(buf[:64]).partition(b"\n")
+    if head.startswith(b"@") and re.fullmatch(rb"@[0-9A-Fa-f]+\s*", head):
+        data = _decode_pairs(buf[len(head) + 1 :])
+        if data is not None:
+            return bytes(int(head[1:], 16)) + data
+    return decode_hex(buf)
+
+
+def decode_coe(buf):
+    # Komentarze w .coe to linie zaczynające się od ";"
+    lines = bytes(buf).decode("ascii").splitlines()
+    text = "\n".join(line for line in lines if not line.lstrip().startswith(";"))
+    radix = re.search(r"memory_initialization_radix\s*=\s*(\d+)", text, re.I)
+    vector = re.search(r"memory_initialization_vector\s*=\s*([^;]*)", text, re.I)
+    if vector is None:
+        raise ValueError("Plik .coe bez memory_initialization_vector")
+    base = int(radix.group(1)) if radix else 16
+    if base == 16:
+        data = _decode_pairs(vector.group(1).encode("ascii"))
+        if data is not None:
+            return data
+    values = re.split(r"[\s,]+", vector.group(1).strip())
+    return bytes(int(v, base) & 0xFF for v in values if v)
+
+
+def decode_vram(buf, fmt):
+    """
+    Dekoduje zawartość pliku w danym formacie do bajtów VRAM
+    """
+    if fmt == "bin":
+        return bytes(buf)
+    if fmt == "hex":
+        return decode_hex(buf)
+    if fmt == "mem":
+        return decode_mem(buf)
+    if fmt == "coe":
+        return decode_coe(buf)
+    raise ValueError(f"Nieznany format: {fmt}")
+
+
+def _hex_lines(data, per_line=1, sep=b" "):
+    """
+    Bajty -> tekst hex (wielkie litery), per_line wartości w linii
+    """
+    data = np.frombuffer(bytes(data), dtype=np.uint8)
+    cells = np.empty((len(data), 3), dtype=np.uint8)
+    cells[:, 0] = _HEX_DIGITS[data >> 4]
+    cells[:, 1] = _HEX_DIGITS[data & 0x0F]
+    cells[:, 2] = sep[0]
+    cells[per_line - 1 :: per_line, 2] = 0x0A
+    if len(cells):
+        cells[-1, 2] = 0x0A
+    return cells.tobytes()
+
+
+def encode_vram(data, fmt):
+    """
+    Koduje bajty VRAM do zawartości pliku w danym formacie
+    """
+    if fmt == "bin":
+        return bytes(data)
+    if fmt == "hex":
+        return _hex_lines(data)
+    if fmt == "mem":
+        return b"@00000000\n" + _hex_lines(data, MEM_BYTES_PER_LINE)
+    if fmt == "coe":
+        body = _hex_lines(data, 1).replace(b"\n", b",\n")
+        if body:
+            body = body[:-2] + b";\n"
+        header = b"memory_initialization_radix=16;\nmemory_initialization_vector=\n"
+        return header + body
+    raise ValueError(f"Nieznany format: {fmt}")
+
+
+def read_vram(path, fmt=None):
+    """
+    Wczytuje obraz VRAM (format z rozszerzenia, jeśli nie podano)
+    """
+    fmt = fmt or detect_format(path)
+    buf = _map_file(path)
+    try:
+        return decode_vram(buf, fmt)
+    finally:
+        if isinstance(buf, mmap.mmap):
+            try:
+                buf.close()
+            except BufferError:
+                # Po błędzie dekodowania widoki numpy na mmap żyją jeszcze w traceback;
+                # mapowanie zostanie zwolnione razem z nimi, a wyjść ma błąd dekodowania
+                pass
+
+
+def write_vram(path, data, fmt=None):
+    """
+    Zapisuje obraz VRAM jednym wywołaniem write(); zwraca rozmiar pliku
+    """
+    fmt = fmt or detect_format(path)
+    content = encode_vram(data, fmt)
+    with open(path, "wb") as f:
+        f.write(content)
+    return len(content)
+
+
+def fit_size(data, size, fill=0x00):
+    """
+    Przycina albo dopełnia obraz do size bajtów
+    """
+    data = bytes(data[:size])
+    return data + bytes([fill]) * (size - len(data))
+
+
+def convert(src, dst, src_fmt=None, dst_fmt=None, size=None):
+    data = read_vram(src, src_fmt)
+    if size is not None:
+        data = fit_size(data, size)
+    write_vram(dst, data, dst_fmt)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Konwersja obrazów VRAM między formatami hex / bin / coe / mem"
+    )
+    parser.add_argument("input", help="Plik wejściowy")
+    parser.add_argument("output", help="Plik wyjściowy")
+    parser.add_argument(
+        "--from",
+        dest="src_fmt",
+        choices=FORMATS,
+        help="Format wejścia (domyślnie z rozszerzenia)",
+    )
+    parser.add_argument(
+        "--to",
+        dest="dst_fmt",
+        choices=FORMATS,
+        help="Format wyjścia (domyślnie z rozszerzenia)",
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=None,
+        help=f"Przytnij / dopełnij zerami do rozmiaru (np. {VRAM_SIZE})",
+    )
+    args = parser.parse_args()
+
+    data = convert(args.input, args.output, args.src_fmt, args.dst_fmt, args.size)
+    print(f"Zapisano {args.output}: {len(data)} bajtów")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Renderowanie zawartości VRAM (24 KB) do pełnej klatki RGB - podgląd bez płytki
+
+Tryb tekstowy odwzorowuje text_mode.v: znak i atrybut z VRAM, wiersz fontu
+(bit 7 = lewy piksel), starszy nibble atrybutu = kolor znaku, młodszy = tło,
+kolory z wbudowanej tabeli get_palette_color (paleta zapisana w VRAM nie jest
+przez sprzęt używana). Tryb graficzny odwzorowuje graphic_mode_6bitcolor.v:
+4 piksele w 3 bajtach, każdy powiększony (SMALL_COUNT_TO + 1) razy.
+
+Opóźnienia potoku w sprzęcie (przesunięcie o piksel) nie są odwzorowywane.
+
+Użycie jako skrypt:
+  python vram_render.py output_1440x900.hex podglad.png
+  python vram_render.py ramka.bin podglad.png --mode graphic -r 1024x768
+"""
+
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from pixel_pack import FRAME_BYTES, GRAPHIC_HEIGHT, GRAPHIC_WIDTH, unpack_pixels
+from spi_protocol import MODE_GRAPHICS, MODE_TEXT, VRAM_SIZE
+from vga_timing import load_timing
+from vram_image import read_vram
+
+FONT_HEIGHT = 16
+FONT_WIDTH = 8
+FONT_SIZE = 256 * FONT_HEIGHT
+
+# get_palette_color z text_mode.v ({R1,R0,G1,G0,B1,B0})
+TEXT_MODE_PALETTE = [
+    0b000000,  # czarny
+    0b000010,  # niebieski
+    0b001000,  # zielony
+    0b001010,  # cyjan
+    0b100000,  # czerwony
+    0b100010,  # magenta
+    0b100100,  # pomarańczowy
+    0b010101,  # ciemny szary
+    0b101010,  # jasny szary
+    0b010111,  # jasny niebieski
+    0b011101,  # jasny zielony
+    0b011111,  # jasny cyjan
+    0b110101,  # jasny czerwony
+    0b110111,  # jasny magenta
+    0b111101,  # żółty
+    0b111111,  # biały
+]
+
+
+def color_6bit_to_rgb(colors):
+    """
+    Tablica kolorów 6-bit (RRGGBB) -> RGB uint8 (poziomy 0, 85, 170, 255)
+    """
+    c = np.asarray(colors, dtype=np.uint8)
+    rgb = np.stack([(c >> 4) & 0x03, (c >> 2) & 0x03, c & 0x03], axis=-1)
+    return (rgb * 85).astype(np.uint8)
+
+
+TEXT_MODE_RGB = color_6bit_to_rgb(TEXT_MODE_PALETTE)
+GRAPHIC_MODE_RGB = color_6bit_to_rgb(np.arange(64))
+
+
+def _vram_array(vram):
+    data = np.frombuffer(bytes(vram), dtype=np.uint8)
+    if len(data) < VRAM_SIZE:
+        data = np.concatenate([data, np.zeros(VRAM_SIZE - len(data), np.uint8)])
+    return data
+
+
+def _get_timing(timing):
+    return load_timing(timing) if timing is None or isinstance(timing, str) else timing
+
+
+def render_text_indices(vram, timing=None):
+    """
+    Indeksy palety trybu tekstowego (wiersze*16, kolumny*8) bez ramki
+    """
+    timing = _get_timing(timing)
+    cols, rows = timing.text_cols, timing.text_rows
+    cells = cols * rows
+    data = _vram_array(vram)
+
+    chars = data[:cells].reshape(rows, cols)
+    attrs = data[cells : 2 * cells].reshape(rows, cols)
+    font = data[2 * cells : 2 * cells + FONT_SIZE].reshape(256, FONT_HEIGHT)
+    glyph_bits = np.unpackbits(font[:, :, None], axis=2).astype(bool)  # (256, 16, 8)
+
+    bits = glyph_bits[chars]  # (rows, cols, 16, 8)
+    fg = (attrs >> 4)[:, :, None, None]
+    bg = (attrs & 0x0F)[:, :, None, None]
+    indices = np.where(bits, fg, bg)
+    return indices.transpose(0, 2, 1, 3).reshape(rows * FONT_HEIGHT, cols * FONT_WIDTH)
+
+
+def render_text(vram, timing=None):
+    """
+    Pełna klatka RGB (VISIBLE_LINES, VISIBLE_AREA, 3) w trybie tekstowym
+    """
+    timing = _get_timing(timing)
+    indices = render_text_indices(vram, timing)
+    side = timing.defines.get("SIDE_PIXELS_BLACK_TEXT", 0)
+    bottom = timing.defines.get("BOTTOM_LINES_BLACK_TEXT", 0)
+    return _place(TEXT_MODE_RGB[indices], timing, side, bottom, 0)
+
+
+def render_graphic(vram, timing=None):
+    """
+    Pełna klatka RGB (VISIBLE_LINES, VISIBLE_AREA, 3) w trybie graficznym 200x150
+    """
+    timing = _get_timing(timing)
+    data = _vram_array(vram)[:FRAME_BYTES]
+    pixels = unpack_pixels(data.tobytes()).reshape(GRAPHIC_HEIGHT, GRAPHIC_WIDTH)
+    scale = timing.pixel_scale
+    rgb = GRAPHIC_MODE_RGB[pixels]
+    scaled = np.repeat(np.repeat(rgb, scale, axis=0), scale, axis=1)
+    side = timing.defines.get("SIDE_PIXELS_BLACK_GRAPHIC", 0)
+    bottom = timing.defines.get("BOTTOM_LINES_BLACK_GRAPHIC", 0)
+    return _place(scaled, timing, side, bottom, side)
+
+
+def _place(image, timing, side, bottom, x):
+    """
+    Wstawia obraz w czarną klatkę i wygasza obszar poza can_color z vga_gen.v
+    """
+    frame = np.zeros((timing.visible_lines, timing.visible_area, 3), dtype=np.uint8)
+    h = min(image.shape[0], timing.visible_lines - bottom)
+    w = min(image.shape[1], timing.visible_area - side - x)
+    frame[:h, x : x + w] = image[:h, :w]
+    frame[:, :side] = 0
+    frame[:, timing.visible_area - side :] = 0
+    return frame
+
+
+def render(vram, mode=MODE_TEXT, timing=None):
+    """
+    Klatka RGB dla trybu z rejestru mode (0 i nieobsługiwane tryby - czarny ekran)
+    """
+    if mode == MODE_TEXT:
+        return render_text(vram, timing)
+    if mode == MODE_GRAPHICS:
+        return render_graphic(vram, timing)
+    timing = _get_timing(timing)
+    return np.zeros((timing.visible_lines, timing.visible_area, 3), dtype=np.uint8)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Renderuje obraz VRAM do PNG tak, jak pokaże go monitor"
+    )
+    parser.add_argument("vram", help="Plik VRAM (.hex, .bin, .coe, .mem)")
+    parser.add_argument("output", help="Wyjściowy plik PNG")
+    parser.add_argument(
+        "--mode", choices=["text", "graphic"], default="text", help="Tryb wyświetlania"
+    )
+    parser.add_argument(
+        "--resolution", "-r", default=None, help="Tryb z timings/ (domyślnie wybrany)"
+    )
+    args = parser.parse_args()
+
+    mode = MODE_TEXT if args.mode == "text" else MODE_GRAPHICS
+    frame = render(read_vram(args.vram), mode, args.resolution)
+    Image.fromarray(frame).save(args.output)
+    print(f"Zapisano {args.output} ({frame.shape[1]}x{frame.shape[0]})")
+
+
+if __name__ == "__main__":
+    main()
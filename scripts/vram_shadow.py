@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Kopia VRAM po stronie hosta (24 KB) i wysyłanie tylko zmienionych fragmentów
+
+VramShadow pamięta ostatnią wysłaną zawartość VRAM, porównuje z nią nową ramkę
+i zwraca strumień komend SPI (0x02 ustaw adres + 0xH1 zapis) tylko dla zmian.
+Bliskie fragmenty są łączone, jeśli przesłanie niezmienionych bajtów pomiędzy
+nimi jest tańsze niż nowa komenda adresu i nagłówek zapisu. Z use_fill ciągi
+równych bajtów w zmianach idą komendą wypełnienia 0xH5.
+
+Użycie jako skrypt - ile kosztuje przejście między dwoma obrazami VRAM:
+  python vram_shadow.py stary.bin nowy.bin
+  python vram_shadow.py vram_init.hex nowy.hex
+"""
+
+import sys
+
+import numpy as np
+
+from spi_protocol import SET_ADDR_LEN, VRAM_SIZE, WRITE_HEADER_LEN, CommandStream
+from vram_image import read_vram
+
+# Przerwa (w bajtach) między zmianami, którą opłaca się wysłać zamiast nowej komendy
+MERGE_GAP = SET_ADDR_LEN + WRITE_HEADER_LEN
+
+
+def changed_bytes(old, new):
+    """
+    Liczba bajtów, którymi różnią się dwie ramki (old None - cała nowa ramka)
+    """
+    new = np.frombuffer(bytes(new), dtype=np.uint8)
+    if old is None:
+        return len(new)
+    old = np.frombuffer(bytes(old), dtype=np.uint8)
+    if len(old) != len(new):
+        raise ValueError(f"Ramki mają różne rozmiary: {len(old)} i {len(new)}")
+    return int(np.count_nonzero(old != new))
+
+
+class VramShadow:
+    def __init__(
+        self, initial=None, size=VRAM_SIZE, merge_gap=MERGE_GAP, use_fill=False
+    ):
+        self.size = size
+        self.merge_gap = merge_gap
+        self.use_fill = use_fill
+        self.data = np.zeros(size, dtype=np.uint8)
+        # Dopóki zawartość VRAM nie jest znana, pierwsza aktualizacja wysyła wszystko
+        self.known = initial is not None
+        if initial is not None:
+            self.data[: len(initial)] = np.frombuffer(bytes(initial), dtype=np.uint8)
+        # Adres, pod który trafi następny zapis (None - nieznany)
+        self.next_addr = None
+
+        self.frames = 0
+        self.payload_bytes = 0
+        self.sent_bytes = 0
+        self.full_bytes = 0
+
+    def invalidate(self):
+        """
+        Zapomnij zawartość VRAM (np. po resecie FPGA) - następna aktualizacja wyśle całość
+        """
+        self.known = False
+        self.next_addr = None
+
+    def diff(self, frame, offset=0):
+        """
+        Zwraca listę fragmentów (start, end) [adresy VRAM] do wysłania dla nowej ramki
+        """
+        new = np.frombuffer(bytes(frame), dtype=np.uint8)
+        if offset < 0 or offset + len(new) > self.size:
+            raise ValueError(
+                f"Ramka {offset}+{len(new)} wychodzi poza VRAM ({self.size} bajtów)"
+            )
+        if not self.known:
+            return [(offset, offset + len(new))] if len(new) else []
+
+        changed = np.flatnonzero(self.data[offset : offset + len(new)] != new)
+        if len(changed) == 0:
+            return []
+
+        # Granice ciągłych zmian, z połączeniem krótkich przerw między nimi
+        breaks = np.flatnonzero(np.diff(changed) > self.merge_gap + 1)
+        starts = changed[np.concatenate(([0], breaks + 1))] + offset
+        ends = changed[np.concatenate((breaks, [len(changed) - 1]))] + offset + 1
+        return list(zip(starts.tolist(), ends.tolist()))
+
+    def update(self, frame, offset=0):
+        """
+        Porównuje ramkę z kopią VRAM, zapisuje ją w kopii i zwraca bajty komend SPI
+        """
+        frame = bytes(frame)
+        stream = CommandStream(addr=self.next_addr, use_fill=self.use_fill)
+        for start, end in self.diff(frame, offset):
+            stream.set_addr(start)
+            stream.write(frame[start - offset : end - offset])
+            self.payload_bytes += end - start
+        out = stream.to_bytes()
+        self.next_addr = stream.addr
+
+        self.data[offset : offset + len(frame)] = np.frombuffer(frame, dtype=np.uint8)
+        self.known = True
+        self.frames += 1
+        self.sent_bytes += len(out)
+        self.full_bytes += len(frame)
+        return out
+
+    def send(self, ser, frame, offset=0):
+        """
+        Wysyła do portu tylko zmiany; zwraca liczbę wysłanych bajtów
+        """
+        stream = self.update(frame, offset)
+        if stream:
+            ser.write(stream)
+        return len(stream)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "payload_bytes": self.payload_bytes,
+            "sent_bytes": self.sent_bytes,
+            "full_bytes": self.full_bytes,
+        }
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Użycie: python vram_shadow.py stary.bin nowy.bin")
+        sys.exit(1)
+
+    old = read_vram(sys.argv[1])
+    new = read_vram(sys.argv[2])
+
+    shadow = VramShadow(old)
+    spans = shadow.diff(new)
+    stream = shadow.update(new)
+    filled = VramShadow(old, use_fill=True).update(new)
+    print(f"Zmienione fragmenty: {len(spans)}")
+    for start, end in spans[:20]:
+        print(f"  0x{start:04X}-0x{end - 1:04X} ({end - start} bajtów)")
+    if len(spans) > 20:
+        print(f"  ... i {len(spans) - 20} więcej")
+    print(f"Pełna ramka: {len(new)} bajtów, delta: {len(stream)} bajtów")
+    print(f"Z komendą wypełnienia (0xH5): {len(filled)} bajtów")
+
+
+if __name__ == "__main__":
+    main()